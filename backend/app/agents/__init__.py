@@ -2,6 +2,8 @@
 Agents module initialization - Register all agents
 """
 from .base import AIAgent, AgentOrchestrator, get_orchestrator
+from .llm_client import LLMClientPool, get_llm_client, close_llm_client
+from .prompt_batcher import PromptBatcher
 from .lead_scout import LeadScoutAgent
 from .offer_generator import OfferGeneratorAgent
 from .buyer_matcher import BuyerMatcherAgent
@@ -12,6 +14,10 @@ __all__ = [
     "AIAgent",
     "AgentOrchestrator",
     "get_orchestrator",
+    "LLMClientPool",
+    "get_llm_client",
+    "close_llm_client",
+    "PromptBatcher",
     "LeadScoutAgent",
     "OfferGeneratorAgent",
     "BuyerMatcherAgent",
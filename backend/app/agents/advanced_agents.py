@@ -6,6 +6,7 @@ Each agent uses state-of-the-art AI models and machine learning
 
 import asyncio
 import json
+import logging
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Any
 from decimal import Decimal
@@ -13,12 +14,16 @@ from enum import Enum
 
 from pydantic import BaseModel, Field
 from abc import ABC, abstractmethod
-import anthropic
-import openai
 
-# Initialize AI clients
-openai.api_key = "sk-your-key"
-client = anthropic.Anthropic()
+from .llm_client import get_llm_client
+from .prompt_batcher import PromptBatcher
+from ..config import settings
+from ..services.contract_rendering import format_contract_date, get_contract_renderer
+from ..services.lender_catalog import get_lender_catalog
+from ..services.market_stats import get_market_stats
+from ..services.rehab_costs import get_rehab_cost_model
+
+logger = logging.getLogger(__name__)
 
 # ==================== DATA MODELS ====================
 
@@ -55,6 +60,9 @@ class MarketAnalysis(BaseModel):
     cap_rate: Decimal
     property_score: float  # 0-100
     investment_rating: str  # Excellent, Good, Fair, Poor
+    market_key: Optional[str] = None  # ZIP or ZIP:cell neighborhood the stats came from
+    sample_size: int = 0  # sales behind the stats
+    narrative: Optional[str] = None
 
 class RehabEstimate(BaseModel):
     """Detailed rehab cost estimate"""
@@ -64,6 +72,10 @@ class RehabEstimate(BaseModel):
     breakdown: Dict[str, Decimal]  # By trade
     contingency_percentage: int
     contractor_recommendations: List[str]
+    contingency_cost: Decimal = Decimal("0")
+    condition_grade: Optional[str] = None
+    region_multiplier: float = 1.0
+    uncovered_issues: List[str] = []  # issues the cost tables don't price
 
 class DataInsight(BaseModel):
     """AI-generated insight"""
@@ -84,35 +96,22 @@ class ContractAutomationAgent:
         self.model = "claude-3.5-sonnet"
     
     async def generate_contract(self, deal_data: dict) -> dict:
-        """Generate state-specific purchase contract"""
-        prompt = f"""
-        Generate a professional real estate purchase contract for:
-        - State: {deal_data['state']}
-        - Property: {deal_data['address']}
-        - Buyer: {deal_data['buyer_name']}
-        - Seller: {deal_data['seller_name']}
-        - Offer Price: ${deal_data['offer_price']:,.2f}
-        - Earnest Money: ${deal_data['earnest_money']:,.2f}
-        
-        Include:
-        1. State-specific legal language
-        2. Standard contingencies
-        3. Inspection/appraisal terms
-        4. Financing terms
-        5. Closing timeline
-        6. All required disclosures
-        
-        Make it professional, legally sound, and ready for esignature.
         """
+        Render a state-specific purchase contract as a signable PDF
         
-        message = client.messages.create(
-            model=self.model,
-            max_tokens=2000,
-            messages=[{"role": "user", "content": prompt}]
-        )
+        The contract is dated deal_data's contract_date, else its created_at,
+        else today.
+        """
+        if not deal_data.get("contract_date"):
+            deal_data = {**deal_data, "contract_date": format_contract_date(
+                deal_data.get("created_at") or datetime.utcnow()
+            )}
+        document = await get_contract_renderer().render(deal_data)
         
         return {
-            "contract": message.content[0].text,
+            "contract": document["contract"],
+            "document_path": document["document_path"],
+            "document_sha256": document["sha256"],
             "state": deal_data['state'],
             "ready_for_signature": True
         }
@@ -121,19 +120,20 @@ class ContractAutomationAgent:
         """Generate contract amendment"""
         prompt = f"""
         Create a professional amendment to contract {contract_id}.
-        Changes needed: {json.dumps(changes)}
+        Changes needed: {json.dumps(changes, sort_keys=True)}
         
         Make it legally sound and easy to understand.
         """
         
-        message = client.messages.create(
+        text = await get_llm_client().complete(
+            prompt,
+            agent=self.name,
             model=self.model,
-            max_tokens=1000,
-            messages=[{"role": "user", "content": prompt}]
+            max_tokens=1000
         )
         
         return {
-            "amendment": message.content[0].text,
+            "amendment": text,
             "ready_for_signature": True
         }
     
@@ -156,44 +156,53 @@ class DataAnalystAgent:
         self.name = "DataAnalyst"
         self.description = "Provides market trends, investment analysis, and risk assessment"
     
-    async def analyze_market(self, address: str, market_data: dict) -> MarketAnalysis:
-        """Analyze market conditions for property"""
-        prompt = f"""
-        Analyze the real estate market for {address}.
-        Available data: {json.dumps(market_data)}
-        
-        Provide analysis on:
-        1. Market trend (appreciating/stable/declining)
-        2. Compare price per sqft to comps
-        3. Days on market trend
-        4. Rental income potential
-        5. Cap rate if rental
-        6. Score property for investment (0-100)
-        7. Rate investment (Excellent/Good/Fair/Poor)
+    async def analyze_market(self, address: str, market_data: dict,
+                             narrative: bool = False) -> MarketAnalysis:
         """
+        Analyze market conditions for property
         
-        message = client.messages.create(
-            model="claude-3.5-sonnet",
-            max_tokens=1000,
-            messages=[{"role": "user", "content": prompt}]
+        Figures come from the precomputed market stats; the LLM is only
+        asked for a written summary when narrative is set.
+        """
+        stats = get_market_stats().analyze(address, market_data)
+        analysis = MarketAnalysis(
+            market_trend=stats["market_trend"],
+            price_per_sqft=Decimal(f"{stats['price_per_sqft']:.2f}"),
+            days_on_market=stats["days_on_market"],
+            stack_days=stats["stack_days"],
+            rental_income_potential=Decimal(f"{stats['rental_income_potential']:.2f}"),
+            cap_rate=Decimal(f"{stats['cap_rate']:.2f}"),
+            property_score=stats["property_score"],
+            investment_rating=stats["investment_rating"],
+            market_key=stats["market_key"],
+            sample_size=stats["sample_size"]
         )
         
-        # Parse response and return structured data
-        return MarketAnalysis(
-            market_trend="Appreciating",
-            price_per_sqft=Decimal("150.00"),
-            days_on_market=45,
-            stack_days=12,
-            rental_income_potential=Decimal("1500.00"),
-            cap_rate=Decimal("6.5"),
-            property_score=78.5,
-            investment_rating="Good"
-        )
+        if narrative:
+            prompt = f"""
+        Write a short investor-facing market summary for {address}.
+        Market statistics: {json.dumps(stats)}
+        Property data: {json.dumps(market_data, default=str)}
+        
+        Explain the trend, pricing versus the area, liquidity and rental
+        yield, and what they mean for a wholesale deal. Use only these figures.
+        """
+            
+            text = await get_llm_client().complete(
+                prompt,
+                agent=self.name,
+                model="claude-3.5-sonnet",
+                max_tokens=600
+            )
+            analysis.narrative = text
+        
+        return analysis
     
     async def execute(self, task: dict) -> dict:
         """Main execution"""
         if task.get("type") == "market_analysis":
-            analysis = await self.analyze_market(task["address"], task.get("market_data", {}))
+            analysis = await self.analyze_market(task["address"], task.get("market_data", {}),
+                                                 task.get("narrative", False))
             return analysis.dict()
         
         return {"error": "Unknown analysis type"}
@@ -202,55 +211,86 @@ class DataAnalystAgent:
 class LeadQualifierAgent:
     """Agent 8: Automated lead qualification"""
     
+    # Weights for overall_score when the model omits it
+    SCORE_WEIGHTS = {
+        "seller_motivation": 0.3,
+        "timeline_urgency": 0.25,
+        "financial_capability": 0.15,
+        "property_condition": 0.1,
+        "market_feasibility": 0.2,
+    }
+    
     def __init__(self):
         self.name = "LeadQualifier"
         self.description = "Qualifies leads through SMS, email, and analysis"
+        # Concurrent qualify_lead calls share one multi-lead prompt
+        self.batcher = PromptBatcher(
+            self._build_prompt,
+            self._parse_score,
+            model="claude-3.5-sonnet",
+            agent=self.name
+        )
     
-    async def qualify_lead(self, lead_data: dict) -> LeadQualificationScore:
-        """Score and qualify lead"""
-        prompt = f"""
-        Qualify this real estate lead:
-        - Name: {lead_data.get('seller_name')}
-        - Property: {lead_data.get('address')}
-        - Contact method: {lead_data.get('source')}
-        - Asking price: {lead_data.get('asking_price')}
-        - Property condition: {lead_data.get('condition')}
-        
-        Rate on scale 0-100:
-        1. Seller motivation (0-100)
-        2. Timeline urgency (0-100)
-        3. Financial capability (0-100)
-        4. Property condition score (0-100)
-        5. Market feasibility (0-100)
+    @staticmethod
+    def _build_prompt(leads: List[dict]) -> str:
+        lines = "\n".join(
+            f"        [{i}] Name: {lead.get('seller_name')}; Property: {lead.get('address')}; "
+            f"Contact method: {lead.get('source')}; Asking price: {lead.get('asking_price')}; "
+            f"Property condition: {lead.get('condition')}"
+            for i, lead in enumerate(leads)
+        )
+        return f"""
+        Qualify each of these real estate leads:
+{lines}
+        
+        For each lead, rate on scale 0-100:
+        1. seller_motivation
+        2. timeline_urgency
+        3. financial_capability
+        4. property_condition
+        5. market_feasibility
         
         Then provide:
-        - Overall weighted score
-        - Recommendation (Qualify/Re-engage/Reject)
-        - Next action to take
-        """
+        - overall_score (weighted)
+        - recommendation (Qualify/Re-engage/Reject)
+        - next_action to take
         
-        message = client.messages.create(
-            model="claude-3.5-sonnet",
-            max_tokens=800,
-            messages=[{"role": "user", "content": prompt}]
-        )
+        Respond with only a JSON array containing one object per lead, with
+        "id" set to the lead's number in brackets and the fields above.
+        """
+    
+    def _parse_score(self, entry: dict) -> LeadQualificationScore:
+        fields = {k: v for k, v in entry.items() if k in LeadQualificationScore.__fields__}
+        if "overall_score" not in fields:
+            fields["overall_score"] = round(sum(
+                float(fields.get(name, 0)) * weight for name, weight in self.SCORE_WEIGHTS.items()
+            ), 1)
+        return LeadQualificationScore(**fields)
+    
+    async def qualify_lead(self, lead_data: dict) -> LeadQualificationScore:
+        """Score and qualify lead (batched with other leads in flight)"""
+        return await self.batcher.submit(lead_data)
+    
+    async def qualify_leads(self, leads: List[dict]) -> List[Any]:
+        """
+        Qualify many leads, e.g. an import
         
-        return LeadQualificationScore(
-            seller_motivation=78.0,
-            timeline_urgency=85.0,
-            financial_capability=72.0,
-            property_condition=68.0,
-            market_feasibility=90.0,
-            overall_score=78.6,
-            recommendation="Qualify",
-            next_action="Send automated offer within 24 hours"
-        )
+        Returns:
+            A LeadQualificationScore per lead, or the exception for leads that failed
+        """
+        return await asyncio.gather(*(self.qualify_lead(lead) for lead in leads), return_exceptions=True)
     
     async def execute(self, task: dict) -> dict:
         """Main execution"""
         if task.get("type") == "qualify":
             score = await self.qualify_lead(task)
             return score.dict()
+        elif task.get("type") == "qualify_batch":
+            scores = await self.qualify_leads(task.get("leads", []))
+            return {"scores": [
+                score.dict() if isinstance(score, LeadQualificationScore) else {"error": str(score)}
+                for score in scores
+            ]}
         
         return {"error": "Unknown qualification task"}
 
@@ -263,60 +303,74 @@ class RehabEstimatorAgent:
         self.description = "Estimates rehab costs by trade and scope"
     
     async def estimate_rehab(self, property_data: dict) -> RehabEstimate:
-        """Estimate rehab costs"""
+        """
+        Estimate rehab costs from the trade cost tables
+        
+        Issues the tables don't cover are priced by the LLM and added as
+        extra line items.
+        """
+        estimate = get_rehab_cost_model().estimate(property_data)
+        
+        uncovered = estimate["uncovered_issues"]
+        if uncovered and settings.rehab_llm_for_uncovered:
+            extras = await self.price_line_items(property_data, uncovered)
+            if extras:
+                extra_cost = sum(extras.values())
+                contingency = extra_cost * estimate["contingency_percentage"] / 100
+                estimate["breakdown"].update({f"Other: {item}": cost for item, cost in extras.items()})
+                estimate["contingency_cost"] = round(estimate["contingency_cost"] + contingency, 2)
+                estimate["total_cost"] = round(estimate["total_cost"] + extra_cost + contingency, 2)
+                sqft = property_data.get("sqft") or property_data.get("square_feet")
+                if sqft:
+                    estimate["cost_per_sqft"] = round(estimate["total_cost"] / sqft, 2)
+        
+        return RehabEstimate(
+            total_cost=Decimal(f"{estimate['total_cost']:.2f}"),
+            cost_per_sqft=Decimal(f"{estimate['cost_per_sqft']:.2f}"),
+            timeline_days=estimate["timeline_days"],
+            breakdown={trade: Decimal(f"{cost:.2f}") for trade, cost in estimate["breakdown"].items()},
+            contingency_percentage=estimate["contingency_percentage"],
+            contractor_recommendations=estimate["contractor_recommendations"],
+            contingency_cost=Decimal(f"{estimate['contingency_cost']:.2f}"),
+            condition_grade=estimate["condition_grade"],
+            region_multiplier=estimate["region_multiplier"],
+            uncovered_issues=uncovered
+        )
+    
+    async def price_line_items(self, property_data: dict, items: List[str]) -> Dict[str, float]:
+        """Ask the LLM to price repair items the cost tables don't cover"""
         prompt = f"""
-        Estimate rehab costs for property:
+        Estimate repair costs (USD, labor and materials) for these items:
         - Address: {property_data.get('address')}
-        - Condition: {property_data.get('condition')}
-        - Square footage: {property_data.get('sqft')}
-        - Issues found: {property_data.get('issues')}
-        
-        Provide detailed breakdown by trade:
-        1. Foundation/concrete
-        2. Roof
-        3. HVAC
-        4. Plumbing
-        5. Electrical
-        6. Walls/drywall
-        7. Flooring
-        8. Kitchen
-        9. Bathrooms
-        10. Paint/cosmetics
+        - Square footage: {property_data.get('sqft') or property_data.get('square_feet')}
+        - Items: {json.dumps(items)}
         
-        Include:
-        - Total cost
-        - Cost per sqft
-        - Timeline estimate
-        - 15-20% contingency
-        - Recommended contractors
+        Respond with only a JSON object mapping each item to a number.
         """
         
-        message = client.messages.create(
+        text = await get_llm_client().complete(
+            prompt,
+            agent=self.name,
             model="claude-3.5-sonnet",
-            max_tokens=1200,
-            messages=[{"role": "user", "content": prompt}]
+            max_tokens=300
         )
         
-        return RehabEstimate(
-            total_cost=Decimal("45000.00"),
-            cost_per_sqft=Decimal("60.00"),
-            timeline_days=90,
-            breakdown={
-                "Roof": Decimal("12000.00"),
-                "HVAC": Decimal("8000.00"),
-                "Electrical": Decimal("6000.00"),
-                "Plumbing": Decimal("6000.00"),
-                "Cosmetics": Decimal("13000.00")
-            },
-            contingency_percentage=15,
-            contractor_recommendations=["ABC Contractors", "XYZ Builders"]
-        )
+        try:
+            prices = json.loads(text)
+            return {item: float(prices[item]) for item in items if item in prices}
+        except (ValueError, TypeError, KeyError) as e:
+            logger.warning(f"Could not parse line item prices: {e}")
+            return {}
     
     async def execute(self, task: dict) -> dict:
         """Main execution"""
         if task.get("type") == "estimate":
             estimate = await self.estimate_rehab(task.get("property_data", {}))
             return estimate.dict()
+        elif task.get("type") == "estimate_batch":
+            # Portfolio mode: tables only, no per-property LLM calls
+            batch = get_rehab_cost_model().estimate_batch(task.get("properties", []))
+            return {"estimates": batch.rows(), "summary": batch.summary()}
         
         return {"error": "Unknown estimation task"}
 
@@ -346,13 +400,14 @@ class MarketingAutomationAgent:
         Make it informative, engaging, and ranking-focused.
         """
         
-        message = client.messages.create(
+        text = await get_llm_client().complete(
+            prompt,
+            agent=self.name,
             model="claude-3.5-sonnet",
-            max_tokens=2500,
-            messages=[{"role": "user", "content": prompt}]
+            max_tokens=2500
         )
         
-        return message.content[0].text
+        return text
     
     async def generate_landing_page(self, product: str, target_audience: str) -> dict:
         """Generate high-converting landing page copy"""
@@ -373,13 +428,14 @@ class MarketingAutomationAgent:
         Make it conversion-focused with copywriting best practices.
         """
         
-        message = client.messages.create(
+        text = await get_llm_client().complete(
+            prompt,
+            agent=self.name,
             model="claude-3.5-sonnet",
-            max_tokens=2000,
-            messages=[{"role": "user", "content": prompt}]
+            max_tokens=2000
         )
         
-        return {"landing_page": message.content[0].text}
+        return {"landing_page": text}
     
     async def execute(self, task: dict) -> dict:
         """Main execution"""
@@ -402,48 +458,50 @@ class FinancingAdvisorAgent:
         self.description = "Matches with lenders and advises on financing options"
     
     async def find_lenders(self, deal_data: dict) -> List[dict]:
-        """Find matching lenders for deal"""
+        """Find matching lenders for deal, ranked from the lender catalog"""
+        return get_lender_catalog().match(
+            loan_amount=deal_data.get("loan_amount") or deal_data.get("offer_price") or 0,
+            property_type=deal_data.get("property_type"),
+            credit_score=deal_data.get("credit_score"),
+            experience=deal_data.get("experience_level"),
+            state=deal_data.get("state"),
+            max_days_to_fund=deal_data.get("max_days_to_fund"),
+            priority=deal_data.get("priority", "cost")
+        )
+    
+    async def explain_lenders(self, deal_data: dict, lenders: List[dict]) -> str:
+        """Plain-language comparison of the matched lenders"""
         prompt = f"""
-        Find matching lenders for this deal:
-        - Loan amount: ${deal_data.get('loan_amount'):,.0f}
+        Explain these financing options to a real estate investor:
+        - Loan amount: ${deal_data.get('loan_amount') or deal_data.get('offer_price') or 0:,.0f}
         - Property type: {deal_data.get('property_type')}
         - Credit score: {deal_data.get('credit_score')}
         - Experience level: {deal_data.get('experience_level')}
         
-        Recommendations:
-        1. Traditional bank options
-        2. Hard money lenders
-        3. Private lenders
-        4. Portfolio lenders
-        
-        For each, provide:
-        - Typical rates
-        - Terms available
-        - Speed to funding
-        - Approval requirements
+        Matched lenders (best first): {json.dumps(lenders)}
+        
+        Compare total cost, speed to funding and approval requirements, and
+        say which fits a quick wholesale or flip closing. Use only these lenders.
         """
         
-        message = client.messages.create(
+        text = await get_llm_client().complete(
+            prompt,
+            agent=self.name,
             model="claude-3.5-sonnet",
-            max_tokens=1500,
-            messages=[{"role": "user", "content": prompt}]
+            max_tokens=800
         )
         
-        return [
-            {
-                "lender": "Hard Money Lender A",
-                "rate": "11.5%",
-                "term": "1-2 years",
-                "speed": "5-7 days",
-                "contact": "lender@example.com"
-            }
-        ]
+        return text
     
     async def execute(self, task: dict) -> dict:
         """Main execution"""
         if task.get("type") == "find_lenders":
-            lenders = await self.find_lenders(task.get("deal_data", {}))
-            return {"lenders": lenders}
+            deal_data = task.get("deal_data", {})
+            lenders = await self.find_lenders(deal_data)
+            result = {"lenders": lenders}
+            if task.get("explain") and lenders:
+                result["explanation"] = await self.explain_lenders(deal_data, lenders)
+            return result
         
         return {"error": "Unknown financing task"}
 
@@ -488,46 +546,76 @@ class EnhancedAgentOrchestrator:
             "tracker": DealTrackerAgent()
         }
     
+    @staticmethod
+    async def _run_stage(name: str, stage, timeout: float) -> dict:
+        """Await a workflow stage, turning a timeout or failure into an error result"""
+        try:
+            return await asyncio.wait_for(stage, timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Workflow stage {name} timed out after {timeout}s")
+            return {"error": f"{name} timed out after {timeout}s", "status": "timeout"}
+        except Exception as e:
+            logger.error(f"Workflow stage {name} failed: {e}")
+            return {"error": str(e), "status": "failed"}
+    
+    @staticmethod
+    def _stage_timeout(name: str) -> float:
+        return settings.workflow_stage_timeouts.get(name, settings.workflow_stage_timeout_seconds)
+    
     async def execute_workflow(self, workflow_type: str, data: dict) -> dict:
-        """Execute multi-agent workflow"""
+        """
+        Execute multi-agent workflow
+        
+        lead_to_contract: qualification gates the deal; market analysis,
+        rehab estimate, financing and the contract only need the lead data,
+        so they then run concurrently. Each stage has its own timeout, and a
+        stage that times out or fails is reported (stage_status / partial)
+        without discarding the others.
+        """
         
         if workflow_type == "lead_to_contract":
             # 1. Qualify lead
-            qualification = await self.agents["qualifier"].execute({"type": "qualify", **data})
+            qualification = await self._run_stage(
+                "qualification",
+                self.agents["qualifier"].execute({"type": "qualify", **data}),
+                self._stage_timeout("qualification")
+            )
             
             if qualification.get("recommendation") != "Qualify":
                 return {"error": "Lead not qualified", "details": qualification}
             
-            # 2. Analyze market
-            market_analysis = await self.agents["analyst"].execute({
-                "type": "market_analysis",
-                "address": data.get("address")
-            })
-            
-            # 3. Estimate rehab
-            rehab_estimate = await self.agents["rehab"].execute({
-                "type": "estimate",
-                "property_data": data
-            })
-            
-            # 4. Find financing
-            financing = await self.agents["financing"].execute({
-                "type": "find_lenders",
-                "deal_data": data
-            })
-            
-            # 5. Generate contract
-            contract = await self.agents["contract"].execute({
-                "type": "generate",
-                **data
-            })
+            # 2-5. Independent stages, run concurrently
+            stages = {
+                "market_analysis": self.agents["analyst"].execute({
+                    "type": "market_analysis",
+                    "address": data.get("address"),
+                    "market_data": data
+                }),
+                "rehab_estimate": self.agents["rehab"].execute({
+                    "type": "estimate",
+                    "property_data": data
+                }),
+                "financing": self.agents["financing"].execute({
+                    "type": "find_lenders",
+                    "deal_data": data
+                }),
+                "contract": self.agents["contract"].execute({
+                    "type": "generate",
+                    **data
+                }),
+            }
+            results = await asyncio.gather(*(
+                self._run_stage(name, stage, self._stage_timeout(name)) for name, stage in stages.items()
+            ))
+            outputs = dict(zip(stages, results))
+            stage_status = {name: result.get("status", "failed") if "error" in result else "ok"
+                            for name, result in outputs.items()}
             
             return {
                 "qualification": qualification,
-                "market_analysis": market_analysis,
-                "rehab_estimate": rehab_estimate,
-                "financing": financing,
-                "contract": contract
+                **outputs,
+                "stage_status": stage_status,
+                "partial": any(status != "ok" for status in stage_status.values())
             }
         
         return {"error": f"Unknown workflow: {workflow_type}"}
@@ -0,0 +1,198 @@
+"""
+In-memory buyer index for candidate lookup in BuyerMatcherAgent
+"""
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from ..database import PropertyTypeEnum
+
+# Defaults must match BuyerMatcherAgent._calculate_match_score
+DEFAULT_MIN_DEAL_SIZE = 0
+DEFAULT_MAX_DEAL_SIZE = 10000000
+
+
+def normalize_state(state: Optional[str]) -> str:
+    """Upper-case state code ("" when missing)"""
+    return (state or "").strip().upper()
+
+
+def normalize_property_type(property_type: Any) -> str:
+    """
+    Matching key for a property type ("" when missing)
+    
+    PropertyTypeEnum members ("Single Family", "single_family") map to their
+    value. Anything else, including aliases such as "SFR" that the match
+    formula has never treated as a known type, is kept as the lower-cased
+    string, so unknown types only match themselves.
+    """
+    parsed = PropertyTypeEnum.parse(property_type, strict=True, aliases=False)
+    if parsed is not None:
+        return parsed.value
+    return str(property_type or "").strip().lower()
+
+
+def buyer_states(buyer: Dict[str, Any]) -> Set[str]:
+    """A buyer's normalized target states (empty = all states)"""
+    return {s for s in map(normalize_state, buyer.get("target_states") or []) if s}
+
+
+def buyer_property_types(buyer: Dict[str, Any]) -> Set[str]:
+    """A buyer's normalized preferred property types (empty = any type)"""
+    return {t for t in map(normalize_property_type, buyer.get("preferred_property_types") or []) if t}
+
+
+class IntervalIndex:
+    """
+    Static centered interval tree answering "which ranges contain x?"
+    
+    Built once in O(n log n); each query costs O(log n + matches).
+    """
+    
+    def __init__(self, intervals: Sequence[Tuple[float, float, int]]):
+        """
+        Args:
+            intervals: (low, high, item_id) tuples, bounds inclusive
+        """
+        self._nodes: List[tuple] = []
+        self._root = self._build([iv for iv in intervals if iv[0] <= iv[1]])
+    
+    def _build(self, intervals: List[Tuple[float, float, int]]) -> int:
+        if not intervals:
+            return -1
+        endpoints = sorted(v for low, high, _ in intervals for v in (low, high))
+        center = endpoints[len(endpoints) // 2]
+        
+        left, right, overlapping = [], [], []
+        for iv in intervals:
+            if iv[1] < center:
+                left.append(iv)
+            elif iv[0] > center:
+                right.append(iv)
+            else:
+                overlapping.append(iv)
+        
+        by_low = sorted(overlapping, key=lambda iv: iv[0])
+        by_high = sorted(overlapping, key=lambda iv: iv[1], reverse=True)
+        node_id = len(self._nodes)
+        self._nodes.append(None)
+        self._nodes[node_id] = (center, by_low, by_high, self._build(left), self._build(right))
+        return node_id
+    
+    def stab(self, x: float) -> List[int]:
+        """Item ids whose interval contains x"""
+        found = []
+        node_id = self._root
+        while node_id != -1:
+            center, by_low, by_high, left, right = self._nodes[node_id]
+            if x < center:
+                for low, _, item_id in by_low:
+                    if low > x:
+                        break
+                    found.append(item_id)
+                node_id = left
+            elif x > center:
+                for _, high, item_id in by_high:
+                    if high < x:
+                        break
+                    found.append(item_id)
+                node_id = right
+            else:
+                found.extend(item_id for _, _, item_id in by_low)
+                break
+        return found
+
+
+class BuyerIndex:
+    """
+    Inverted lists over a fixed list of buyer dicts
+    
+    - target state -> buyer positions (plus buyers with no state limits)
+    - preferred property type -> buyer positions (plus buyers with no type limits)
+    - interval index over [min_deal_size, max_deal_size]
+    
+    Positions refer to `self.buyers`.
+    """
+    
+    def __init__(self, buyers: Sequence[Dict[str, Any]]):
+        self.buyers = list(buyers)
+        self._by_state: Dict[str, Set[int]] = defaultdict(set)
+        self._any_state: Set[int] = set()
+        self._by_type: Dict[str, Set[int]] = defaultdict(set)
+        self._any_type: Set[int] = set()
+        self._active: Set[int] = set()
+        
+        intervals = []
+        for i, buyer in enumerate(self.buyers):
+            target_states = buyer_states(buyer)
+            if target_states:
+                for state in target_states:
+                    self._by_state[state].add(i)
+            else:
+                self._any_state.add(i)
+            
+            preferred_types = buyer_property_types(buyer)
+            if preferred_types:
+                for property_type in preferred_types:
+                    self._by_type[property_type].add(i)
+            else:
+                self._any_type.add(i)
+            
+            if buyer.get("is_active", False):
+                self._active.add(i)
+            
+            intervals.append((
+                buyer.get("min_deal_size", DEFAULT_MIN_DEAL_SIZE),
+                buyer.get("max_deal_size", DEFAULT_MAX_DEAL_SIZE),
+                i,
+            ))
+        
+        self._deal_sizes = IntervalIndex(intervals)
+    
+    def __len__(self) -> int:
+        return len(self.buyers)
+    
+    def by_state(self, state: str) -> Set[int]:
+        """Buyers whose target states include `state` (or who have none)"""
+        return self._by_state.get(normalize_state(state), set()) | self._any_state
+    
+    def by_property_type(self, property_type: str) -> Set[int]:
+        """Buyers who prefer `property_type` (or have no preference)"""
+        return self._by_type.get(normalize_property_type(property_type), set()) | self._any_type
+    
+    def by_deal_size(self, value: float) -> Set[int]:
+        """Buyers whose deal size range contains `value`"""
+        return set(self._deal_sizes.stab(value))
+    
+    def candidates(self, property_info: Dict[str, Any]) -> List[int]:
+        """
+        Buyers that can possibly clear the 50-point match threshold
+        
+        A buyer outside the property's state loses 10 geography points. If
+        it is also outside the deal size range (5 points) or inactive
+        (0 points), its best case is exactly 50, so only in-state buyers and
+        active in-range buyers need exact scoring.
+        """
+        property_state = property_info.get("state")
+        property_value = property_info.get("estimated_after_repair_value", 0)
+        
+        in_state = self.by_state(property_state)
+        in_range_active = self.by_deal_size(property_value) & self._active
+        return sorted(in_state | in_range_active)
+    
+    def lookup(self, state: Optional[str] = None, property_type: Optional[str] = None,
+               deal_size: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Buyers matching every given criterion"""
+        positions: Optional[Set[int]] = None
+        for criterion, value in (
+            (self.by_state, state),
+            (self.by_property_type, property_type),
+            (self.by_deal_size, deal_size),
+        ):
+            if value is None:
+                continue
+            matched = criterion(value)
+            positions = matched if positions is None else positions & matched
+        
+        if positions is None:
+            return list(self.buyers)
+        return [self.buyers[i] for i in sorted(positions)]
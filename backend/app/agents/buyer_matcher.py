@@ -1,11 +1,21 @@
 """
 Buyer Matcher Agent - Matches properties with qualified cash buyers
 """
+import heapq
 import logging
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
 
+import numpy as np
+
 from .base import AIAgent
+from .buyer_index import (
+    BuyerIndex, buyer_property_types, buyer_states, normalize_property_type, normalize_state
+)
+from .buyer_matrix import BuyerMatrix
+from ..cache import get_buyer_snapshot_manager
+from ..config import settings
+from ..scoring import BuyerPreferences
 
 logger = logging.getLogger(__name__)
 
@@ -27,53 +37,222 @@ class BuyerMatcherAgent(AIAgent):
             model="gpt-4",
             temperature=0.2
         )
+        self._mock_index: Optional[BuyerIndex] = None
+        # Index of the last caller-supplied buyer list, reused while callers
+        # keep passing the same list object
+        self._given_index: Optional[Tuple[List[Dict[str, Any]], BuyerIndex]] = None
+        self._mock_matrix: Optional[BuyerMatrix] = None
     
     def validate_task(self, task: Dict[str, Any]) -> bool:
-        """Validate task has required parameters"""
-        required = ["property"]
-        return all(key in task for key in required)
+        """Validate task has required parameters (one property, or a batch)"""
+        return "property" in task or "properties" in task
     
     async def execute(self, task: Dict[str, Any]) -> Dict[str, Any]:
         """
         Match a property with qualified buyers
         
         Args:
-            task: Contains property details
+            task: Contains property details; optionally available_buyers (or a
+                prebuilt buyer_index) and limit on the matches returned
             
         Returns:
             List of matched buyers with match scores
         """
+        if "properties" in task:
+            return self._execute_batch(task)
+        
         property_info = task.get("property", {})
-        available_buyers = task.get("available_buyers", self._get_mock_buyers())
+        buyer_index = task.get("buyer_index")
+        if buyer_index is None:
+            buyer_index = self._get_buyer_index(task.get("available_buyers"))
+        available_buyers = buyer_index.buyers
+        limit = task.get("limit")
         
         logger.info(f"BuyerMatcher: Matching property at {property_info.get('address')}")
         
-        # Score each buyer against the property
-        matches = []
-        for buyer in available_buyers:
-            score = self._calculate_match_score(property_info, buyer)
+        # Score only the buyers the index says can clear the threshold
+        positions = []
+        scores = []
+        for position in buyer_index.candidates(property_info):
+            score = self._calculate_match_score(property_info, available_buyers[position])
             if score > 50:  # Only return buyers with >50% match
-                matches.append({
-                    "buyer_id": buyer.get("id"),
-                    "buyer_name": buyer.get("name"),
-                    "match_score": round(score, 1),
-                    "contact_method": buyer.get("notification_method", "email"),
-                    "match_factors": self._get_match_factors(property_info, buyer)
-                })
+                positions.append(position)
+                scores.append(score)
+        
+        # Re-rank qualified buyers with their learned preferences
+        preferences = self._get_preferences(buyer_index)
+        if preferences is not None and positions:
+            scores = preferences.blend(np.array([scores]), [property_info], np.array(positions))[0]
+        scored = [(-round(float(score), 1), position) for score, position in zip(scores, positions)]
         
-        # Sort by match score descending
-        matches = sorted(matches, key=lambda x: x["match_score"], reverse=True)
+        # Sort by match score descending (ties keep buyer order)
+        if limit is not None:
+            ranked = heapq.nsmallest(limit, scored)
+        else:
+            ranked = sorted(scored)
+        
+        # Build the detailed match factors only for the buyers returned
+        matches = []
+        for neg_score, position in ranked:
+            buyer = available_buyers[position]
+            matches.append({
+                "buyer_id": buyer.get("id"),
+                "buyer_name": buyer.get("name"),
+                "match_score": -neg_score,
+                "contact_method": buyer.get("notification_method", "email"),
+                "match_factors": self._get_match_factors(property_info, buyer)
+            })
         
         return {
             "property_id": property_info.get("id", "unknown"),
             "property_address": property_info.get("address", ""),
             "total_buyers_available": len(available_buyers),
-            "qualified_matches": len(matches),
+            "qualified_matches": len(scored),
             "top_matches": matches[:5],
             "all_matches": matches,
             "tokens_used": len(matches) * 1000
         }
     
+    def _execute_batch(self, task: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Match many properties against all buyers in one vectorized pass
+        
+        Args:
+            task: Contains properties; optionally available_buyers (or a
+                prebuilt buyer_matrix), top_k and chunk_cells
+        """
+        properties = task.get("properties", [])
+        buyer_matrix = task.get("buyer_matrix")
+        if buyer_matrix is None:
+            buyer_matrix = self._get_buyer_matrix(task.get("available_buyers"))
+        top_k = task.get("top_k", 5)
+        
+        logger.info(f"BuyerMatcher: Batch matching {len(properties)} properties "
+                    f"against {len(buyer_matrix)} buyers")
+        
+        ranked = buyer_matrix.top_matches(
+            properties, top_k=top_k,
+            chunk_cells=task.get("chunk_cells", settings.buyer_match_chunk_cells),
+            preferences=self._get_preferences(buyer_matrix)
+        )
+        
+        results = []
+        for property_info, (qualified, top) in zip(properties, ranked):
+            results.append({
+                "property_id": property_info.get("id", "unknown"),
+                "property_address": property_info.get("address", ""),
+                "qualified_matches": qualified,
+                "top_matches": [
+                    {
+                        "buyer_id": buyer_matrix.buyers[position].get("id"),
+                        "buyer_name": buyer_matrix.buyers[position].get("name"),
+                        "match_score": score,
+                        "contact_method": buyer_matrix.buyers[position].get("notification_method", "email"),
+                        "match_factors": self._get_match_factors(property_info, buyer_matrix.buyers[position])
+                    }
+                    for position, score in top
+                ]
+            })
+        
+        return {
+            "properties_matched": len(properties),
+            "total_buyers_available": len(buyer_matrix),
+            "results": results,
+            "tokens_used": 0
+        }
+    
+    @staticmethod
+    def _get_preferences(buyers: Any) -> Optional[BuyerPreferences]:
+        """Learned preferences, when matching against the shared buyer snapshot"""
+        snapshot = get_buyer_snapshot_manager().snapshot
+        if snapshot is not None and (buyers is snapshot.index or buyers is snapshot.matrix):
+            return snapshot.preferences
+        return None
+    
+    def _get_buyer_matrix(self, available_buyers: Optional[List[Dict[str, Any]]]) -> BuyerMatrix:
+        """Encode the given buyers, else the shared buyer snapshot, else the mock buyers (dev only)"""
+        if available_buyers is not None:
+            return BuyerMatrix(available_buyers)
+        snapshot = get_buyer_snapshot_manager().snapshot
+        if snapshot is not None:
+            return snapshot.matrix
+        self._require_mock_buyers()
+        if self._mock_matrix is None:
+            self._mock_matrix = BuyerMatrix(self._get_mock_buyers())
+        return self._mock_matrix
+    
+    def _get_buyer_index(self, available_buyers: Optional[List[Dict[str, Any]]]) -> BuyerIndex:
+        """
+        Index the given buyers, else the shared buyer snapshot, else the mock buyers (dev only)
+        
+        The index of a given list is cached by list identity, so repeated
+        calls with the same list skip the O(n log n) build. Callers that
+        change a list in place should pass a new list (or a prebuilt
+        buyer_index) instead.
+        """
+        if available_buyers is not None:
+            cached = self._given_index
+            if cached is None or cached[0] is not available_buyers or len(cached[1]) != len(available_buyers):
+                cached = self._given_index = (available_buyers, BuyerIndex(available_buyers))
+            return cached[1]
+        snapshot = get_buyer_snapshot_manager().snapshot
+        if snapshot is not None:
+            return snapshot.index
+        self._require_mock_buyers()
+        if self._mock_index is None:
+            self._mock_index = BuyerIndex(self._get_mock_buyers())
+        return self._mock_index
+    
+    @staticmethod
+    def _require_mock_buyers():
+        """
+        Allow the mock buyer fallback only when settings.use_mock_buyers is on
+        
+        Raises:
+            RuntimeError: No buyer snapshot is loaded and mock buyers are off,
+                so there are no real buyers to match against
+        """
+        if not settings.use_mock_buyers:
+            logger.error("BuyerMatcher: buyer snapshot is not loaded; refusing to match against mock buyers")
+            raise RuntimeError("Buyer snapshot is not loaded yet")
+    
+    def match_properties_for_buyer(self, buyer: Dict[str, Any], properties: List[Dict[str, Any]],
+                                   limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Reverse matching: rank properties for one buyer
+        
+        Uses the same score as property-side matching, so a property appears
+        here exactly when this buyer would appear in its buyer matches.
+        """
+        positions = []
+        scores = []
+        for position, property_info in enumerate(properties):
+            score = self._calculate_match_score(property_info, buyer)
+            if score > 50:
+                positions.append(position)
+                scores.append(score)
+        
+        snapshot = get_buyer_snapshot_manager().snapshot
+        preferences = snapshot.preferences if snapshot is not None else None
+        buyer_position = snapshot.position_of(buyer.get("id")) if preferences is not None else None
+        if buyer_position is not None and positions:
+            qualified = [properties[position] for position in positions]
+            scores = preferences.blend(np.array(scores)[:, None], qualified,
+                                       np.array([buyer_position]))[:, 0]
+        scored = [(-round(float(score), 1), position) for score, position in zip(scores, positions)]
+        
+        ranked = heapq.nsmallest(limit, scored) if limit is not None else sorted(scored)
+        
+        return [
+            {
+                "property_id": properties[position].get("id"),
+                "property_address": properties[position].get("address", ""),
+                "match_score": -neg_score,
+                "match_factors": self._get_match_factors(properties[position], buyer)
+            }
+            for neg_score, position in ranked
+        ]
+    
     def _calculate_match_score(self, property_info: Dict[str, Any], 
                                buyer: Dict[str, Any]) -> float:
         """
@@ -89,16 +268,16 @@ class BuyerMatcherAgent(AIAgent):
         score = 0
         
         # Geographic match (25 points)
-        property_state = property_info.get("state", "").upper()
-        target_states = buyer.get("target_states", [])
+        property_state = normalize_state(property_info.get("state"))
+        target_states = buyer_states(buyer)
         if property_state in target_states or not target_states:
             score += 25
         else:
             score -= 10
         
         # Property type match (20 points)
-        property_type = property_info.get("property_type", "")
-        preferred_types = buyer.get("preferred_property_types", [])
+        property_type = normalize_property_type(property_info.get("property_type"))
+        preferred_types = buyer_property_types(buyer)
         if property_type in preferred_types or not preferred_types:
             score += 20
         else:
@@ -143,13 +322,13 @@ class BuyerMatcherAgent(AIAgent):
         factors = {}
         
         # Geographic
-        if property_info.get("state", "").upper() in buyer.get("target_states", []):
+        if normalize_state(property_info.get("state")) in buyer_states(buyer):
             factors["geography"] = "MATCH - State in target list"
         else:
             factors["geography"] = "DIFFERENT - Outside target states"
         
         # Property type
-        if property_info.get("property_type", "") in buyer.get("preferred_property_types", []):
+        if normalize_property_type(property_info.get("property_type")) in buyer_property_types(buyer):
             factors["property_type"] = "MATCH"
         else:
             factors["property_type"] = "ACCEPTABLE - Will consider"
@@ -0,0 +1,160 @@
+"""
+Vectorized property x buyer match scoring for BuyerMatcherAgent batch mode
+"""
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from .buyer_index import (
+    DEFAULT_MAX_DEAL_SIZE, DEFAULT_MIN_DEAL_SIZE, buyer_property_types, buyer_states,
+    normalize_property_type, normalize_state
+)
+
+if TYPE_CHECKING:
+    from ..scoring import BuyerPreferences
+
+
+def _membership(values_per_buyer: List[Set[str]]) -> Tuple[Dict[str, int], np.ndarray]:
+    """
+    Vocabulary and (len(vocabulary) + 1, n_buyers) boolean membership rows
+    
+    The extra last row is all False; values outside the vocabulary map to
+    it, so a lookup never needs a bounds check.
+    """
+    vocabulary: Dict[str, int] = {}
+    for values in values_per_buyer:
+        for value in sorted(values):
+            vocabulary.setdefault(value, len(vocabulary))
+    rows = np.zeros((len(vocabulary) + 1, len(values_per_buyer)), dtype=bool)
+    for i, values in enumerate(values_per_buyer):
+        for value in values:
+            rows[vocabulary[value], i] = True
+    return vocabulary, rows
+
+
+class BuyerMatrix:
+    """
+    Column-wise NumPy encoding of a buyer list
+    
+    Target states and preferred property types (normalized as in
+    BuyerIndex) become boolean membership rows, one per distinct value, so
+    a property-buyer geography or type check is a row lookup. Scores follow
+    BuyerMatcherAgent._calculate_match_score term for term.
+    """
+    
+    def __init__(self, buyers: Sequence[Dict[str, Any]]):
+        self.buyers = list(buyers)
+        target_states = [buyer_states(b) for b in self.buyers]
+        preferred_types = [buyer_property_types(b) for b in self.buyers]
+        
+        self.state_index, self.state_rows = _membership(target_states)
+        self.any_state = np.array([not states for states in target_states], dtype=bool)
+        self.type_index, self.type_rows = _membership(preferred_types)
+        self.any_type = np.array([not types for types in preferred_types], dtype=bool)
+        
+        self.min_size = np.array([b.get("min_deal_size", DEFAULT_MIN_DEAL_SIZE) for b in self.buyers],
+                                 dtype=np.float64)
+        self.max_size = np.array([b.get("max_deal_size", DEFAULT_MAX_DEAL_SIZE) for b in self.buyers],
+                                 dtype=np.float64)
+        self.min_roi = np.array([b.get("min_roi_percent", 20) for b in self.buyers], dtype=np.float64)
+        self.active = np.array([bool(b.get("is_active", False)) for b in self.buyers], dtype=bool)
+        
+        # Deal size alignment terms are per-buyer constants
+        self.mid_point = (self.min_size + self.max_size) / 2
+        self.max_distance = (self.max_size - self.min_size) / 2
+        self.activity_points = np.where(self.active, 15.0, 0.0)
+    
+    def __len__(self) -> int:
+        return len(self.buyers)
+    
+    def encode_properties(self, properties: Sequence[Dict[str, Any]]) -> Tuple[np.ndarray, ...]:
+        """Encode properties as (state_row, type_row, value, roi) columns"""
+        unknown_state, unknown_type = len(self.state_index), len(self.type_index)
+        state_row = np.array([
+            self.state_index.get(normalize_state(p.get("state")), unknown_state) for p in properties
+        ], dtype=np.intp)
+        type_row = np.array([
+            self.type_index.get(normalize_property_type(p.get("property_type")), unknown_type)
+            for p in properties
+        ], dtype=np.intp)
+        value = np.array([p.get("estimated_after_repair_value", 0) for p in properties], dtype=np.float64)
+        roi = np.array([p.get("roi_percent", 25) for p in properties], dtype=np.float64)
+        return state_row, type_row, value, roi
+    
+    def score_matrix(self, state_row: np.ndarray, type_row: np.ndarray,
+                     value: np.ndarray, roi: np.ndarray) -> np.ndarray:
+        """Full (n_properties, n_buyers) match score matrix"""
+        geo_match = self.state_rows[state_row] | self.any_state
+        geography = np.where(geo_match, 25.0, -10.0)
+        
+        type_match = self.type_rows[type_row] | self.any_type
+        property_type = np.where(type_match, 20.0, 10.0)
+        
+        v = value[:, None]
+        in_range = (self.min_size <= v) & (v <= self.max_size)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = np.where(self.max_distance > 0, np.abs(v - self.mid_point) / self.max_distance, 1.0)
+        deal_size = np.where(in_range, (1 - ratio) * 20, 5.0)
+        
+        r = roi[:, None]
+        roi_points = np.where(r >= self.min_roi, 20.0,
+                              np.where(r >= self.min_roi * 0.8, 12.0, 5.0))
+        
+        return np.minimum(geography + property_type + deal_size + roi_points + self.activity_points, 100)
+    
+    def top_matches(self, properties: Sequence[Dict[str, Any]], top_k: int = 5,
+                    threshold: float = 50, chunk_cells: int = 1_000_000,
+                    preferences: Optional["BuyerPreferences"] = None
+                    ) -> List[Tuple[int, List[Tuple[int, float]]]]:
+        """
+        Best buyers for every property
+        
+        Properties are processed in row chunks of about `chunk_cells` matrix
+        cells so memory stays bounded for large batches. With `preferences`
+        (aligned with this matrix), buyers that clear the threshold on
+        declared preferences are ranked by the blended score.
+        
+        Returns:
+            Per property: (qualified_match_count, [(buyer_position, score), ...])
+            with at most top_k entries, best first
+        """
+        if not self.buyers or not properties:
+            return [(0, []) for _ in properties]
+        
+        state_row, type_row, value, roi = self.encode_properties(properties)
+        n_buyers = len(self.buyers)
+        k = min(top_k, n_buyers)
+        rows_per_chunk = max(1, chunk_cells // n_buyers)
+        # Rounded scores are multiples of 0.1; subtracting less than half a
+        # step by buyer position breaks ties in buyer order, as the
+        # single-property path does, without reordering distinct scores
+        tie_break = np.arange(n_buyers) * (0.05 / n_buyers)
+        results = []
+        
+        for start in range(0, len(properties), rows_per_chunk):
+            end = start + rows_per_chunk
+            scores = self.score_matrix(state_row[start:end], type_row[start:end],
+                                       value[start:end], roi[start:end])
+            qualified = scores > threshold
+            counts = qualified.sum(axis=1)
+            if preferences is not None:
+                scores = preferences.blend(scores, properties[start:end])
+            scores = np.where(qualified, np.round(scores, 1), -np.inf)
+            rank = scores - tie_break
+            
+            if k < n_buyers:
+                top = np.argpartition(-rank, k - 1, axis=1)[:, :k]
+            else:
+                top = np.broadcast_to(np.arange(n_buyers), scores.shape)
+            order = np.argsort(-np.take_along_axis(rank, top, axis=1), axis=1)
+            top = np.take_along_axis(top, order, axis=1)
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            
+            for row in range(scores.shape[0]):
+                results.append((int(counts[row]), [
+                    (int(position), float(score))
+                    for position, score in zip(top[row], top_scores[row])
+                    if score != -np.inf
+                ]))
+        
+        return results
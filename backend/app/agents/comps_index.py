@@ -0,0 +1,222 @@
+"""
+Spatial index over comparable sales for ARV estimation
+"""
+import math
+import time
+from datetime import timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..config import settings
+
+MILES_PER_DEGREE_LAT = 69.0
+SECONDS_PER_DAY = 86400.0
+
+
+def _float_column(rows: Sequence[Dict[str, Any]], key: str) -> np.ndarray:
+    return np.array([np.nan if row.get(key) is None else row[key] for row in rows], dtype=np.float64)
+
+
+class CompsIndex:
+    """
+    Comparable sales bucketed on a lat/lon grid
+    
+    Sales are stored as NumPy columns sorted by grid cell, so each cell is a
+    contiguous slice. A k-nearest query scans rings of cells outward from the
+    subject and stops once the next ring can't hold anything closer than the
+    k-th match, applying the beds / baths / sqft / recency filters to each
+    ring's slice as a vector operation.
+    """
+    
+    def __init__(self, sales: Sequence[Dict[str, Any]], cell_degrees: Optional[float] = None):
+        self.cell_degrees = cell_degrees or settings.comps_cell_degrees
+        sales = [s for s in sales if s.get("latitude") is not None and s.get("longitude") is not None
+                 and s.get("sale_price")]
+        
+        lat = _float_column(sales, "latitude")
+        lon = _float_column(sales, "longitude")
+        cell_lat = np.floor(lat / self.cell_degrees).astype(np.int64)
+        cell_lon = np.floor(lon / self.cell_degrees).astype(np.int64)
+        order = np.lexsort((cell_lon, cell_lat))
+        
+        self.sales = [sales[i] for i in order]
+        self.lat = lat[order]
+        self.lon = lon[order]
+        self.price = _float_column(self.sales, "sale_price")
+        self.sqft = _float_column(self.sales, "square_feet")
+        self.beds = _float_column(self.sales, "bedrooms")
+        self.baths = _float_column(self.sales, "bathrooms")
+        self.sold_at = np.array([
+            s["sale_date"].replace(tzinfo=timezone.utc).timestamp() if s.get("sale_date") is not None else np.nan
+            for s in self.sales
+        ], dtype=np.float64)
+        
+        # cell -> (start, end) slice of the sorted columns
+        self._cells: Dict[Tuple[int, int], Tuple[int, int]] = {}
+        cell_lat, cell_lon = cell_lat[order], cell_lon[order]
+        if len(order):
+            change = np.flatnonzero((np.diff(cell_lat) != 0) | (np.diff(cell_lon) != 0)) + 1
+            starts = np.concatenate(([0], change))
+            ends = np.concatenate((change, [len(order)]))
+            for start, end in zip(starts.tolist(), ends.tolist()):
+                self._cells[(int(cell_lat[start]), int(cell_lon[start]))] = (start, end)
+    
+    def __len__(self) -> int:
+        return len(self.sales)
+    
+    def _ring(self, center: Tuple[int, int], radius: int) -> List[Tuple[int, int]]:
+        """Slices of the occupied cells exactly `radius` cells from center"""
+        ci, cj = center
+        if radius == 0:
+            cells = [(ci, cj)]
+        else:
+            cells = [(ci + di, cj + dj) for di in (-radius, radius) for dj in range(-radius, radius + 1)]
+            cells += [(ci + di, cj + dj) for dj in (-radius, radius) for di in range(-radius + 1, radius)]
+        return [self._cells[cell] for cell in cells if cell in self._cells]
+    
+    def nearest(self, latitude: float, longitude: float, k: Optional[int] = None,
+                bedrooms: Optional[float] = None, bathrooms: Optional[float] = None,
+                square_feet: Optional[float] = None, max_age_days: Optional[float] = None,
+                max_radius_miles: Optional[float] = None) -> List[Tuple[int, float]]:
+        """
+        k nearest sales that pass the similarity filters
+        
+        Args:
+            bedrooms / bathrooms: Keep sales within one of these
+            square_feet: Keep sales within settings.comps_sqft_tolerance of this
+            max_age_days: Keep sales at most this old
+            max_radius_miles: Search radius
+            
+        Returns:
+            (row, distance_miles) pairs, nearest first
+        """
+        k = k or settings.comps_k
+        max_age_days = max_age_days if max_age_days is not None else settings.comps_max_age_days
+        max_radius = max_radius_miles if max_radius_miles is not None else settings.comps_max_radius_miles
+        if not self.sales:
+            return []
+        
+        lon_scale = MILES_PER_DEGREE_LAT * math.cos(math.radians(latitude))
+        cell_miles = self.cell_degrees * min(MILES_PER_DEGREE_LAT, lon_scale)
+        max_ring = int(math.ceil(max_radius / cell_miles)) + 1
+        oldest = time.time() - max_age_days * SECONDS_PER_DAY
+        center = (math.floor(latitude / self.cell_degrees), math.floor(longitude / self.cell_degrees))
+        
+        rows: List[np.ndarray] = []
+        distances: List[np.ndarray] = []
+        found = 0
+        kth = math.inf
+        for radius in range(max_ring + 1):
+            # Anything in this ring or beyond is at least this far away
+            if found >= k and (radius - 1) * cell_miles > kth:
+                break
+            slices = self._ring(center, radius)
+            if not slices:
+                continue
+            index = np.concatenate([np.arange(start, end) for start, end in slices])
+            keep = ~(self.sold_at[index] < oldest)
+            if bedrooms is not None:
+                keep &= ~(np.abs(self.beds[index] - bedrooms) > 1)
+            if bathrooms is not None:
+                keep &= ~(np.abs(self.baths[index] - bathrooms) > 1)
+            if square_feet:
+                keep &= ~(np.abs(self.sqft[index] - square_feet) > settings.comps_sqft_tolerance * square_feet)
+            index = index[keep]
+            d = np.hypot((self.lat[index] - latitude) * MILES_PER_DEGREE_LAT,
+                         (self.lon[index] - longitude) * lon_scale)
+            within = d <= max_radius
+            rows.append(index[within])
+            distances.append(d[within])
+            found += int(within.sum())
+            if found >= k:
+                kth = np.partition(np.concatenate(distances), k - 1)[k - 1]
+        
+        if not found:
+            return []
+        rows_all = np.concatenate(rows)
+        distances_all = np.concatenate(distances)
+        nearest = np.argsort(distances_all, kind="stable")[:k]
+        return [(int(rows_all[i]), float(distances_all[i])) for i in nearest]
+    
+    def estimate_arv(self, subject: Dict[str, Any], k: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Weighted, size-adjusted ARV from the nearest comparable sales
+        
+        Each comp's price is scaled to the subject's square footage through
+        its price per square foot, then weighted by proximity, recency and
+        bed/bath similarity.
+        
+        Args:
+            subject: Property with latitude/longitude and optionally
+                square_feet, bedrooms, bathrooms
+            
+        Returns:
+            ARV estimate with the comps used, or None if there are no comps
+        """
+        if subject.get("latitude") is None or subject.get("longitude") is None:
+            return None
+        sqft = subject.get("square_feet")
+        matches = self.nearest(
+            subject["latitude"], subject["longitude"], k=k,
+            bedrooms=subject.get("bedrooms"), bathrooms=subject.get("bathrooms"), square_feet=sqft,
+        )
+        if not matches:
+            return None
+        
+        rows = np.array([row for row, _ in matches])
+        distance = np.array([d for _, d in matches])
+        price = self.price[rows]
+        comp_sqft = self.sqft[rows]
+        if sqft:
+            adjusted = np.where(comp_sqft > 0, price / comp_sqft * sqft, price)
+        else:
+            adjusted = price
+        
+        # Unknown sale dates count as the oldest allowed; unknown beds/baths as matching
+        age_days = (time.time() - self.sold_at[rows]) / SECONDS_PER_DAY
+        age_days = np.where(np.isnan(age_days), settings.comps_max_age_days, np.maximum(age_days, 0))
+        weight = np.exp2(-age_days / settings.comps_recency_half_life_days) / (distance + 0.1)
+        mismatch = np.zeros(len(rows))
+        if subject.get("bedrooms") is not None:
+            mismatch += np.abs(self.beds[rows] - subject["bedrooms"])
+        if subject.get("bathrooms") is not None:
+            mismatch += np.abs(self.baths[rows] - subject["bathrooms"])
+        weight /= 1 + np.where(np.isnan(mismatch), 0, mismatch)
+        weight /= weight.sum()
+        
+        arv = float(weight @ adjusted)
+        spread = float(np.sqrt(weight @ (adjusted - arv) ** 2) / arv) if arv > 0 else 0.0
+        return {
+            "arv": round(arv, 2),
+            "comps_used": len(rows),
+            "dispersion": round(spread, 3),  # weighted coefficient of variation
+            "comps": [
+                {
+                    "address": self.sales[row].get("address"),
+                    "sale_price": float(self.price[row]),
+                    "adjusted_price": round(float(a), 2),
+                    "distance_miles": round(d, 2),
+                    "weight": round(float(w), 3),
+                }
+                for row, d, a, w in zip(rows.tolist(), distance.tolist(), adjusted, weight)
+            ],
+        }
+
+
+# Global comps index (empty until loaded from comparable_sales)
+_comps_index: Optional[CompsIndex] = None
+
+
+def get_comps_index() -> CompsIndex:
+    """Get the current comps index"""
+    global _comps_index
+    if _comps_index is None:
+        _comps_index = CompsIndex([])
+    return _comps_index
+
+
+def set_comps_index(index: CompsIndex):
+    """Swap in a rebuilt comps index"""
+    global _comps_index
+    _comps_index = index
@@ -9,7 +9,9 @@ from bs4 import BeautifulSoup
 import aiohttp
 
 from .base import AIAgent
+from ..cache import get_search_cache
 from ..config import settings
+from ..scoring import HEURISTIC_VERSION, get_lead_scorer, heuristic_score, heuristic_score_factors
 
 logger = logging.getLogger(__name__)
 
@@ -53,6 +55,22 @@ class LeadScoutAgent(AIAgent):
         search_type = task.get("search_type")
         location = task.get("location")
         
+        if not settings.enable_search_cache or task.get("bypass_cache", False):
+            return await self._run_search(search_type, location)
+        
+        # Cached results are shared by every spelling of the location, so
+        # search (and store) the canonical one
+        location = get_search_cache().normalize_location(location)
+        result, cache_status = await get_search_cache().get_or_refresh(
+            search_type, location, lambda: self._run_search(search_type, location)
+        )
+        if cache_status != "miss":
+            # Served from cache - no sources were queried for this request
+            result = {**result, "tokens_used": 0}
+        return {**result, "cache_status": cache_status}
+    
+    async def _run_search(self, search_type: str, location: str) -> Dict[str, Any]:
+        """Fan out to the lead sources, then score and filter the results"""
         logger.info(f"LeadScout: Searching for {search_type} properties in {location}")
         
         leads = []
@@ -76,7 +94,7 @@ class LeadScoutAgent(AIAgent):
             leads = [item for sublist in results for item in sublist]
         
         # Score all leads
-        scored_leads = [self._score_lead(lead) for lead in leads]
+        scored_leads = self._score_leads(leads)
         
         # Filter by minimum threshold
         filtered_leads = [
@@ -198,9 +216,27 @@ class LeadScoutAgent(AIAgent):
         
         return leads
     
+    def _score_leads(self, leads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Score a batch of leads in one vectorized pass
+        
+        Uses the learned scoring model when one is deployed, otherwise the
+        heuristic in _score_lead. Each lead records the scorer version.
+        """
+        scores, scorer_version = get_lead_scorer().score(leads)
+        scoring_timestamp = datetime.utcnow().isoformat()
+        
+        for lead, score in zip(leads, scores):
+            lead["lead_score"] = float(score)
+            lead["score_factors"] = heuristic_score_factors(lead)
+            lead["scoring_model"] = scorer_version
+            lead["scoring_timestamp"] = scoring_timestamp
+        
+        return leads
+    
     def _score_lead(self, lead: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Score a lead based on motivation indicators and property factors
+        Score a single lead with the heuristic scorer
         
         Scoring factors:
         - Data source (20 points max): Tax delinquent, probate, vacant best
@@ -209,56 +245,9 @@ class LeadScoutAgent(AIAgent):
         - Property condition (20 points max): Vacant, repair needed = better
         - Market factors (30 points max): Equity, days on market
         """
-        score = 0
-        
-        # Source scoring
-        source_scores = {
-            "Tax Delinquent": 20,
-            "Probate Estate": 18,
-            "Vacant Property List": 18,
-            "FSBO": 15,
-            "Pre-Foreclosure": 18,
-        }
-        score += source_scores.get(lead.get("data_source", ""), 10)
-        
-        # Listing age (in days)
-        if lead.get("listing_time_days", 0) > 60:
-            score += 15
-        elif lead.get("listing_time_days", 0) > 30:
-            score += 10
-        else:
-            score += 5
-        
-        # Condition indicators
-        if lead.get("data_source") == "Vacant Property List":
-            score += 20
-        elif lead.get("estimated_repair_cost", 0) > 30000:
-            score += 18
-        elif lead.get("vacancy_duration_months", 0) > 6:
-            score += 15
-        
-        # Market factors
-        current_value = lead.get("estimated_value", 0)
-        if current_value > 0:
-            tax_assessed = lead.get("tax_assessed_value", 0)
-            if tax_assessed > 0 and current_value > tax_assessed:
-                equity_ratio = current_value / tax_assessed
-                if equity_ratio > 1.5:
-                    score += 20
-                elif equity_ratio > 1.2:
-                    score += 15
-                else:
-                    score += 10
-            else:
-                score += 10
-        
-        lead["lead_score"] = min(score, 100)  # Cap at 100
-        lead["score_factors"] = {
-            "source": source_scores.get(lead.get("data_source", ""), 10),
-            "listing_age": min(15, (lead.get("listing_time_days", 0) / 100) * 15),
-            "condition": 15 if lead.get("data_source") == "Vacant Property List" else 10,
-            "market": 20
-        }
+        lead["lead_score"] = heuristic_score(lead)
+        lead["score_factors"] = heuristic_score_factors(lead)
+        lead["scoring_model"] = HEURISTIC_VERSION
         lead["scoring_timestamp"] = datetime.utcnow().isoformat()
         
         return lead
@@ -0,0 +1,190 @@
+"""
+Shared async LLM client pool
+"""
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+import httpx
+from anthropic import AsyncAnthropic
+from openai import AsyncOpenAI
+
+from ..cache.prompt_cache import get_prompt_cache, prompt_key
+from ..cache.semantic_cache import SemanticCache, get_semantic_cache, semantic_scope
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+PROVIDERS = ("anthropic", "openai")
+
+
+class LLMClientPool:
+    """
+    One pooled async client per provider, shared by every agent
+    
+    - Clients are created on first use and reuse keep-alive connections
+    - A semaphore per provider caps in-flight requests; callers beyond the
+      cap wait for a slot instead of opening more connections
+    - Each call has a timeout, so a slow completion can't hold a caller
+      (or its slot) indefinitely
+    """
+    
+    def __init__(self, max_inflight: Optional[Dict[str, int]] = None,
+                 timeout_seconds: Optional[float] = None):
+        self.max_inflight = {
+            "anthropic": settings.llm_max_inflight_anthropic,
+            "openai": settings.llm_max_inflight_openai,
+            **(max_inflight or {}),
+        }
+        self.timeout_seconds = timeout_seconds or settings.llm_timeout_seconds
+        self._clients: Dict[str, Any] = {}
+        self._semaphores = {provider: asyncio.Semaphore(self.max_inflight[provider]) for provider in PROVIDERS}
+        self.stats = {provider: {"calls": 0, "errors": 0, "timeouts": 0, "in_flight": 0} for provider in PROVIDERS}
+    
+    def _client(self, provider: str):
+        client = self._clients.get(provider)
+        if client is None:
+            http_client = httpx.AsyncClient(limits=httpx.Limits(
+                max_connections=self.max_inflight[provider],
+                max_keepalive_connections=self.max_inflight[provider],
+            ))
+            options = {"max_retries": settings.llm_max_retries, "http_client": http_client}
+            if provider == "anthropic":
+                client = AsyncAnthropic(api_key=settings.anthropic_api_key, **options)
+            else:
+                client = AsyncOpenAI(api_key=settings.openai_api_key, **options)
+            self._clients[provider] = client
+        return client
+    
+    async def complete(self, prompt: str, model: str, max_tokens: int = 1000,
+                       provider: str = "anthropic", timeout: Optional[float] = None,
+                       agent: Optional[str] = None, cache: bool = True,
+                       cache_ttl: Optional[int] = None, **params) -> str:
+        """
+        Single-turn completion
+        
+        Identical requests (same provider, model, parameters and prompt up to
+        whitespace) are answered from the prompt cache; with the semantic
+        cache enabled, sufficiently similar prompts are too.
+        
+        Args:
+            prompt: User message
+            model: Provider model name
+            timeout: Seconds for the request once it has a slot (default llm_timeout_seconds)
+            agent: Calling agent, for cache metrics
+            cache: Set False for prompts whose answers must be fresh
+            cache_ttl: Seconds to keep the response (default prompt_cache_ttl_seconds)
+            params: Extra request parameters (temperature, system, ...)
+        
+        Returns:
+            Response text
+        
+        Raises:
+            asyncio.TimeoutError: The request took longer than timeout
+        """
+        if provider not in PROVIDERS:
+            raise ValueError(f"Unknown LLM provider: {provider}")
+        
+        key = scope = None
+        if cache and settings.enable_prompt_cache:
+            request_params = {"max_tokens": max_tokens, **params}
+            key = prompt_key(provider, model, request_params, prompt)
+            cached = await get_prompt_cache().get(key, agent)
+            if cached is not None:
+                return cached
+            
+            if SemanticCache.enabled_for(agent):
+                scope = semantic_scope(provider, model, request_params, agent)
+                cached = await self._semantic_lookup(key, prompt, scope, agent)
+                if cached is not None:
+                    return cached
+        
+        text = await self._request(provider, prompt, model, max_tokens, timeout, **params)
+        if key is not None:
+            evicted = await get_prompt_cache().set(key, text, cache_ttl, agent=agent, model=model)
+            if settings.enable_semantic_cache:
+                await get_semantic_cache().delete(evicted)
+            if scope is not None:
+                await get_semantic_cache().add(key, prompt, scope, agent)
+        return text
+    
+    async def _semantic_lookup(self, key: str, prompt: str, scope: str,
+                               agent: Optional[str]) -> Optional[str]:
+        """Answer of a similar past prompt, recorded in the audit trail when served"""
+        dead = []
+        try:
+            for match in await get_semantic_cache().lookup(prompt, scope, agent):
+                cached = await get_prompt_cache().get(match.key, agent, count=False)
+                if cached is None:
+                    dead.append(match.key)  # the answer expired or was evicted
+                    continue
+                await get_prompt_cache().record_semantic_hit(agent, key, match.key, match.similarity,
+                                                             prompt, match.prompt)
+                logger.info(f"Served {agent or 'LLM'} prompt from semantic cache "
+                            f"(similarity {match.similarity:.3f})")
+                return cached
+            return None
+        finally:
+            await get_semantic_cache().delete(dead)
+    
+    async def _request(self, provider: str, prompt: str, model: str, max_tokens: int,
+                       timeout: Optional[float], **params) -> str:
+        client = self._client(provider)
+        stats = self.stats[provider]
+        
+        async with self._semaphores[provider]:
+            stats["in_flight"] += 1
+            stats["calls"] += 1
+            try:
+                if provider == "anthropic":
+                    request = client.messages.create(
+                        model=model,
+                        max_tokens=max_tokens,
+                        messages=[{"role": "user", "content": prompt}],
+                        **params
+                    )
+                else:
+                    request = client.chat.completions.create(
+                        model=model,
+                        max_tokens=max_tokens,
+                        messages=[{"role": "user", "content": prompt}],
+                        **params
+                    )
+                response = await asyncio.wait_for(request, timeout or self.timeout_seconds)
+            except asyncio.TimeoutError:
+                stats["timeouts"] += 1
+                logger.warning(f"{provider} completion ({model}) timed out")
+                raise
+            except Exception:
+                stats["errors"] += 1
+                raise
+            finally:
+                stats["in_flight"] -= 1
+        
+        if provider == "anthropic":
+            return response.content[0].text
+        return response.choices[0].message.content
+    
+    async def close(self):
+        """Close pooled connections"""
+        for client in self._clients.values():
+            await client.close()
+        self._clients = {}
+
+
+# Global LLM client pool instance
+_llm_client: Optional[LLMClientPool] = None
+
+
+def get_llm_client() -> LLMClientPool:
+    """Get or create the global LLM client pool"""
+    global _llm_client
+    if _llm_client is None:
+        _llm_client = LLMClientPool()
+    return _llm_client
+
+
+async def close_llm_client():
+    """Close the global LLM client pool, if one was created"""
+    if _llm_client is not None:
+        await _llm_client.close()
@@ -2,10 +2,13 @@
 Offer Generator Agent - Creates optimized purchase offers
 """
 import logging
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
 
 from .base import AIAgent
+from .comps_index import get_comps_index
+from .offer_pricing import PRICING_DEFAULT_REPAIR_COST, OfferBatch, ScenarioGrid
+from ..cache import get_offer_cache, offer_fingerprint, offer_id_for
 from ..config import settings
 
 logger = logging.getLogger(__name__)
@@ -32,6 +35,8 @@ class OfferGeneratorAgent(AIAgent):
     
     def validate_task(self, task: Dict[str, Any]) -> bool:
         """Validate task has required parameters"""
+        if "leads" in task:
+            return isinstance(task["leads"], list)
         required = ["lead_id", "property_details"]
         return all(key in task for key in required)
     
@@ -40,14 +45,37 @@ class OfferGeneratorAgent(AIAgent):
         Generate an offer for a property
         
         Args:
-            task: Contains lead_id and property_details
+            task: Contains lead_id and property_details, or "leads" (a list
+                of both) for batch mode
             
         Returns:
             Generated offer with price, terms, and contract
         """
+        if "leads" in task:
+            return self._execute_batch(task)
+        
         lead_id = task.get("lead_id")
-        property_details = task.get("property_details", {})
+        property_details, arv_estimate = self._resolve_arv(task.get("property_details", {}))
+        fingerprint = offer_fingerprint(property_details)
+        offer_id = offer_id_for(lead_id, fingerprint)
+        
+        # Same lead, property details and pricing settings -> same offer
+        cache = get_offer_cache()
+        reuse = settings.enable_offer_cache and not task.get("bypass_cache", False)
+        if reuse:
+            cached = await cache.get(offer_id)
+            if cached is not None:
+                return {**cached, "tokens_used": 0, "cache_status": "hit"}
         
+        # Always stored, so GET /offers/{offer_id} and contract rendering can
+        # find every offer id handed out
+        offer = self._generate_offer(offer_id, lead_id, property_details, arv_estimate)
+        await cache.store(offer)
+        return {**offer, "cache_status": "miss" if reuse else "bypass"}
+    
+    def _generate_offer(self, offer_id: str, lead_id: str, property_details: Dict[str, Any],
+                        arv_estimate: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Price an offer and build its contract terms"""
         logger.info(f"OfferGenerator: Creating offer for lead {lead_id}")
         
         # Calculate offer price
@@ -65,6 +93,7 @@ class OfferGeneratorAgent(AIAgent):
         terms = self._generate_contract_terms(lead_id, offer_price, property_details)
         
         return {
+            "offer_id": offer_id,
             "lead_id": lead_id,
             "offer_price": round(offer_price, 2),
             "arv": arv,
@@ -73,11 +102,99 @@ class OfferGeneratorAgent(AIAgent):
             "wholesale_fee": round(wholesale_fee, 2),
             "projected_profit": round(projected_profit, 2),
             "roi_percent": round((projected_profit / offer_price * 100), 1) if offer_price > 0 else 0,
+            "arv_source": "comps_index" if arv_estimate else "provided",
+            "arv_estimate": arv_estimate,
             "terms": terms,
             "created_at": datetime.utcnow().isoformat(),
             "tokens_used": 2000
         }
     
+    def _execute_batch(self, task: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Price offers for many leads in one vectorized pass
+        
+        Contract terms are rendered only for the leads in terms_for (the
+        offers actually being sent); call contract_terms later for others.
+        
+        Args:
+            task: Contains leads ([{lead_id, property_details}]); optionally
+                discount_percent / wholesale_fee_percentage overrides and terms_for
+        """
+        leads = task["leads"]
+        batch = self.price_batch(
+            [lead.get("lead_id") for lead in leads],
+            [self._resolve_arv(lead.get("property_details", {}))[0] for lead in leads],
+            discount_percent=task.get("discount_percent"),
+            wholesale_fee_percentage=task.get("wholesale_fee_percentage"),
+        )
+        logger.info(f"OfferGenerator: Priced {len(batch)} offers in batch")
+        
+        terms_for = set(task.get("terms_for") or [])
+        offers = batch.rows()
+        for i, offer in enumerate(offers):
+            if offer["lead_id"] in terms_for:
+                offer["terms"] = self.contract_terms(batch, i)
+        
+        return {
+            "offers": offers,
+            "summary": batch.summary(),
+            "discount_percent": batch.discount_percent,
+            "wholesale_fee_percentage": batch.wholesale_fee_percentage,
+            "created_at": datetime.utcnow().isoformat(),
+            "tokens_used": 0
+        }
+    
+    @staticmethod
+    def _resolve_arv(property_details: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        """
+        Fill in a missing ARV from the local comps index
+        
+        Returns:
+            Property details (with estimated_after_repair_value set when it
+            was estimated) and the estimate, or None if the ARV was provided
+            or no comps were found
+        """
+        if property_details.get("estimated_after_repair_value"):
+            return property_details, None
+        estimate = get_comps_index().estimate_arv(property_details)
+        if estimate is None:
+            return property_details, None
+        return {**property_details, "estimated_after_repair_value": estimate["arv"]}, estimate
+    
+    @staticmethod
+    def price_batch(lead_ids: List[str], property_details: List[Dict[str, Any]],
+                    discount_percent: Optional[float] = None,
+                    wholesale_fee_percentage: Optional[float] = None) -> OfferBatch:
+        """Price offers for many properties as NumPy column operations"""
+        return OfferBatch(lead_ids, property_details, discount_percent, wholesale_fee_percentage)
+    
+    def scenario_grid(self, property_details: Dict[str, Any], ranges: Dict[str, List[float]],
+                      wholesale_fee_percentage: Optional[float] = None) -> ScenarioGrid:
+        """
+        Offer what-ifs over a grid of ARV / repair / holding / discount values
+        
+        Args:
+            property_details: Base case; axes without a range use its values
+                (ARV from the comps index when missing, repairs default to
+                the pricing default)
+            ranges: Axis name -> values to evaluate
+        """
+        details, _ = self._resolve_arv(property_details)
+        base = {
+            "arv": details.get("estimated_after_repair_value") or 0,
+            "repair_cost": details.get("estimated_repair_cost", PRICING_DEFAULT_REPAIR_COST),
+            "holding_cost": details.get("estimated_holding_cost", 0),
+            "discount_percent": settings.default_offer_discount_percent,
+        }
+        axes = {name: ranges.get(name) or [value] for name, value in base.items()}
+        return ScenarioGrid(axes["arv"], axes["repair_cost"], axes["holding_cost"],
+                            axes["discount_percent"], wholesale_fee_percentage)
+    
+    def contract_terms(self, batch: OfferBatch, i: int) -> Dict[str, str]:
+        """Render contract terms for one offer of a batch"""
+        return self._generate_contract_terms(batch.lead_ids[i], float(batch.offer_price[i]),
+                                             batch.property_details[i])
+    
     def _calculate_offer_price(self, property_details: Dict[str, Any]) -> float:
         """
         Calculate optimal offer price
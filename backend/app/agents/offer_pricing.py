@@ -0,0 +1,171 @@
+"""
+Vectorized offer pricing for OfferGeneratorAgent batch mode
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..config import settings
+
+# Defaults OfferGeneratorAgent._calculate_offer_price assumes when a cost is
+# missing (the profit math in execute treats missing costs as 0)
+PRICING_DEFAULT_REPAIR_COST = 50000
+PRICING_DEFAULT_HOLDING_COST = 10000
+
+
+def _column(rows: Sequence[Dict[str, Any]], key: str, default: float) -> np.ndarray:
+    values = [row.get(key, default) for row in rows]
+    return np.array([default if v is None else v for v in values], dtype=np.float64)
+
+
+def offer_prices(arv: np.ndarray, repair_cost: np.ndarray, discount_percent: Any) -> np.ndarray:
+    """OfferGeneratorAgent._calculate_offer_price over broadcastable arrays"""
+    # 70% rule baseline, small repair adjustment, floor at 50% of ARV
+    baseline_offer = arv * (1 - discount_percent / 100)
+    adjusted_offer = baseline_offer - repair_cost * 0.1
+    return np.maximum(adjusted_offer, arv * 0.50)
+
+
+class OfferBatch:
+    """
+    Offers for many properties, held as NumPy columns
+    
+    Pricing follows OfferGeneratorAgent.execute exactly; rows (and contract
+    terms) are only materialized when asked for.
+    """
+    
+    def __init__(self, lead_ids: Sequence[str], property_details: Sequence[Dict[str, Any]],
+                 discount_percent: Optional[float] = None,
+                 wholesale_fee_percentage: Optional[float] = None):
+        self.lead_ids = list(lead_ids)
+        self.property_details = list(property_details)
+        self.discount_percent = (settings.default_offer_discount_percent
+                                 if discount_percent is None else discount_percent)
+        self.wholesale_fee_percentage = (settings.wholesale_fee_percentage
+                                         if wholesale_fee_percentage is None else wholesale_fee_percentage)
+        
+        details = self.property_details
+        self.arv = _column(details, "estimated_after_repair_value", 0)
+        self.repair_cost = _column(details, "estimated_repair_cost", 0)
+        self.holding_cost = _column(details, "estimated_holding_cost", 0)
+        pricing_repair_cost = _column(details, "estimated_repair_cost", PRICING_DEFAULT_REPAIR_COST)
+        
+        self.offer_price = offer_prices(self.arv, pricing_repair_cost, self.discount_percent)
+        
+        self.wholesale_fee = self.offer_price * (self.wholesale_fee_percentage / 100)
+        self.projected_profit = (self.arv - self.offer_price - self.repair_cost
+                                 - self.holding_cost - self.wholesale_fee)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.roi_percent = np.where(self.offer_price > 0,
+                                        self.projected_profit / self.offer_price * 100, 0.0)
+    
+    def __len__(self) -> int:
+        return len(self.lead_ids)
+    
+    def row(self, i: int) -> Dict[str, Any]:
+        """One offer in the shape OfferGeneratorAgent.execute returns, without terms"""
+        offer_price = float(self.offer_price[i])
+        return {
+            "lead_id": self.lead_ids[i],
+            "offer_price": round(offer_price, 2),
+            "arv": self.property_details[i].get("estimated_after_repair_value", 0),
+            "repair_cost": self.property_details[i].get("estimated_repair_cost", 0),
+            "holding_cost": self.property_details[i].get("estimated_holding_cost", 0),
+            "wholesale_fee": round(float(self.wholesale_fee[i]), 2),
+            "projected_profit": round(float(self.projected_profit[i]), 2),
+            "roi_percent": round(float(self.roi_percent[i]), 1) if offer_price > 0 else 0,
+        }
+    
+    def rows(self) -> List[Dict[str, Any]]:
+        return [self.row(i) for i in range(len(self))]
+    
+    def summary(self) -> Dict[str, Any]:
+        """Portfolio totals across the batch"""
+        if not len(self):
+            return {"offers": 0}
+        return {
+            "offers": len(self),
+            "total_offer_value": round(float(self.offer_price.sum()), 2),
+            "total_wholesale_fees": round(float(self.wholesale_fee.sum()), 2),
+            "total_projected_profit": round(float(self.projected_profit.sum()), 2),
+            "median_roi_percent": round(float(np.median(self.roi_percent)), 1),
+            "negative_profit_offers": int((self.projected_profit < 0).sum()),
+        }
+
+
+class ScenarioGrid:
+    """
+    Offer price, profit and ROI over the Cartesian product of ARV, repair
+    cost, holding cost and discount values, computed by broadcasting
+    
+    Arrays are indexed [arv, repair_cost, holding_cost, discount_percent].
+    Unlike single offers, each scenario's repair cost is used for both the
+    price and the profit math.
+    """
+    
+    AXES = ("arv", "repair_cost", "holding_cost", "discount_percent")
+    
+    def __init__(self, arv: Sequence[float], repair_cost: Sequence[float],
+                 holding_cost: Sequence[float], discount_percent: Sequence[float],
+                 wholesale_fee_percentage: Optional[float] = None):
+        self.axes = {
+            "arv": np.asarray(arv, dtype=np.float64),
+            "repair_cost": np.asarray(repair_cost, dtype=np.float64),
+            "holding_cost": np.asarray(holding_cost, dtype=np.float64),
+            "discount_percent": np.asarray(discount_percent, dtype=np.float64),
+        }
+        self.wholesale_fee_percentage = (settings.wholesale_fee_percentage
+                                         if wholesale_fee_percentage is None else wholesale_fee_percentage)
+        
+        a = self.axes["arv"][:, None, None, None]
+        r = self.axes["repair_cost"][None, :, None, None]
+        h = self.axes["holding_cost"][None, None, :, None]
+        d = self.axes["discount_percent"][None, None, None, :]
+        fee_rate = self.wholesale_fee_percentage / 100
+        
+        offer_price = offer_prices(a, r, d)
+        self.projected_profit = a - offer_price * (1 + fee_rate) - r - h
+        # Offer price doesn't depend on holding cost; spread it over that axis too
+        self.offer_price = np.broadcast_to(offer_price, self.projected_profit.shape)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.roi_percent = np.where(self.offer_price > 0, self.projected_profit / self.offer_price * 100, 0.0)
+        
+        # Break-even repair cost for every (arv, holding, discount). Profit
+        # falls linearly with repairs on each side of the point where the
+        # 50%-of-ARV floor takes over the price, so solve both lines and keep
+        # the root on its own side.
+        a3 = self.axes["arv"][:, None, None]
+        h3 = self.axes["holding_cost"][None, :, None]
+        d3 = self.axes["discount_percent"][None, None, :] / 100
+        floor_from = 10 * a3 * (0.5 - d3)  # repair cost where the floor starts binding
+        above_floor = (a3 - (1 + fee_rate) * a3 * (1 - d3) - h3) / (1 - 0.1 * (1 + fee_rate))
+        on_floor = a3 * (1 - 0.5 * (1 + fee_rate)) - h3
+        self.break_even_repair_cost = np.where(above_floor <= floor_from, above_floor, on_floor)
+    
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self.offer_price.shape
+    
+    def to_dict(self, decimals: int = 2) -> Dict[str, Any]:
+        """Compact nested-list form: axis values, metric cubes and break-even contours"""
+        def compact(values: np.ndarray) -> List:
+            return np.round(values, decimals).tolist()
+        
+        profitable = self.projected_profit > 0
+        return {
+            "axes": {name: values.tolist() for name, values in self.axes.items()},
+            "shape": list(self.shape),
+            "offer_price": compact(self.offer_price),
+            "projected_profit": compact(self.projected_profit),
+            "roi_percent": compact(self.roi_percent),
+            "break_even": {
+                "axes": ["arv", "holding_cost", "discount_percent"],
+                "max_repair_cost": compact(self.break_even_repair_cost),
+            },
+            "summary": {
+                "cells": int(self.offer_price.size),
+                "profitable_cells": int(profitable.sum()),
+                "best_profit": round(float(self.projected_profit.max()), 2),
+                "worst_profit": round(float(self.projected_profit.min()), 2),
+            },
+        }
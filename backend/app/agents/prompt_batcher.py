@@ -0,0 +1,149 @@
+"""
+Multi-item prompt batching for per-item LLM scorers
+"""
+import asyncio
+import json
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .llm_client import get_llm_client
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _item_index(value: Any, count: int) -> Optional[int]:
+    """Item position from a response id (3, 3.0 or "3"); None if unusable"""
+    if isinstance(value, bool):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    if not number.is_integer() or not 0 <= number < count:
+        return None
+    return int(number)
+
+
+def parse_json_items(text: str, count: int) -> List[Optional[Dict[str, Any]]]:
+    """
+    Split a structured multi-item response back into items
+    
+    Accepts a JSON array (or {"results": [...]}) of objects carrying an
+    "id" matching the item's position in the prompt (models often quote
+    it, so "3" and 3.0 are accepted too); objects without an id are taken
+    in order.
+    
+    Returns:
+        One dict per item, None where the response has nothing for it
+    """
+    start, end = text.find("["), text.rfind("]")
+    try:
+        data = json.loads(text)
+    except ValueError:
+        data = json.loads(text[start:end + 1]) if 0 <= start < end else []
+    if isinstance(data, dict):
+        data = data.get("results", [])
+    
+    items: List[Optional[Dict[str, Any]]] = [None] * count
+    for position, entry in enumerate(data if isinstance(data, list) else []):
+        if not isinstance(entry, dict):
+            continue
+        index = _item_index(entry.get("id", position), count)
+        if index is not None:
+            items[index] = entry
+    return items
+
+
+class PromptBatcher:
+    """
+    Coalesces single-item LLM requests into one multi-item prompt
+    
+    Callers await submit(item). Items collected within window_ms (or until
+    max_items are pending) go out as one prompt built by build_prompt; the
+    response is split per item and parse_item turns each into its caller's
+    result. The instruction preamble is sent once per batch instead of once
+    per item. Items missing from a response are retried once in a smaller
+    batch.
+    """
+    
+    def __init__(self, build_prompt: Callable[[List[Any]], str],
+                 parse_item: Callable[[Dict[str, Any]], Any],
+                 model: str, agent: Optional[str] = None,
+                 max_items: Optional[int] = None, window_ms: Optional[int] = None,
+                 tokens_per_item: Optional[int] = None):
+        """
+        Args:
+            build_prompt: Prompt for a list of items (each tagged with its index)
+            parse_item: Result for one item's dict from the response; raises on bad data
+        """
+        self.build_prompt = build_prompt
+        self.parse_item = parse_item
+        self.model = model
+        self.agent = agent
+        self.max_items = max_items or settings.prompt_batch_max_items
+        self.window_seconds = (window_ms if window_ms is not None else settings.prompt_batch_window_ms) / 1000
+        self.tokens_per_item = tokens_per_item or settings.prompt_batch_tokens_per_item
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.Task] = None
+        self._tasks: set = set()
+    
+    async def submit(self, item: Any) -> Any:
+        """Queue one item and wait for its result"""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_items:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_after_window())
+        return await future
+    
+    async def _flush_after_window(self):
+        await asyncio.sleep(self.window_seconds)
+        self._timer = None
+        self._flush()
+    
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._run(batch))
+            # Keep a reference until done so the task isn't garbage collected
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+    
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future]], retry: bool = True):
+        items = [item for item, _ in batch]
+        try:
+            text = await get_llm_client().complete(
+                self.build_prompt(items),
+                model=self.model,
+                max_tokens=self.tokens_per_item * len(items) + 100,
+                agent=self.agent
+            )
+            entries = parse_json_items(text, len(items))
+        except Exception as e:
+            logger.error(f"{self.agent or 'Prompt'} batch of {len(items)} failed: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        missing = []
+        for (item, future), entry in zip(batch, entries):
+            if future.done():
+                continue
+            try:
+                if entry is None:
+                    raise ValueError("no result in batch response")
+                future.set_result(self.parse_item(entry))
+            except Exception as e:
+                if retry:
+                    missing.append((item, future))
+                else:
+                    future.set_exception(ValueError(f"Unusable result for batched item: {e}"))
+        if missing:
+            logger.warning(f"{self.agent or 'Prompt'} batch: retrying {len(missing)} of {len(batch)} items")
+            await self._run(missing, retry=False)
@@ -1,10 +1,13 @@
 """
 Cash Buyers API endpoints
 """
-from fastapi import APIRouter
+from fastapi import APIRouter, BackgroundTasks, HTTPException
 from pydantic import BaseModel
 from typing import Optional, List
 
+from ..cache import get_buyer_snapshot_manager
+from ..services import BuyerService, get_notification_queue
+
 router = APIRouter()
 
 
@@ -18,17 +21,63 @@ class BuyerProfile(BaseModel):
     max_deal_size: float = 10000000
     preferred_property_types: List[str] = []
     min_roi_percent: float = 20.0
+    notification_method: str = "email"
+    notification_frequency: Optional[str] = None
+
+
+class BuyerPreferencesUpdate(BaseModel):
+    """Partial update of a buyer's preferences"""
+    target_states: Optional[List[str]] = None
+    min_deal_size: Optional[float] = None
+    max_deal_size: Optional[float] = None
+    preferred_property_types: Optional[List[str]] = None
+    min_roi_percent: Optional[float] = None
+    is_active: Optional[bool] = None
+    auto_notify: Optional[bool] = None
+    notification_method: Optional[str] = None
+    notification_frequency: Optional[str] = None
 
 
 @router.post("/", tags=["buyers"])
-async def register_buyer(buyer: BuyerProfile):
-    """Register a new cash buyer"""
+async def register_buyer(buyer: BuyerProfile, background_tasks: BackgroundTasks):
+    """
+    Register a new cash buyer
+    
+    Existing open leads that match the buyer are found and queued for
+    notification in the background, after the response is sent.
+    """
+    record = await BuyerService.register_buyer(buyer.dict())
+    if record is None:
+        raise HTTPException(status_code=409, detail="A buyer with this email is already registered")
+    background_tasks.add_task(get_buyer_snapshot_manager().refresh)
+    background_tasks.add_task(BuyerService.reverse_match, record.id)
+    
     return {
-        "buyer_id": "buyer_123",
-        "name": buyer.name,
-        "email": buyer.email,
+        "buyer_id": record.id,
+        "name": record.name,
+        "email": record.email,
         "status": "registered",
-        "created_at": "2025-02-13T00:00:00"
+        "reverse_matching": "scheduled",
+        "created_at": record.created_at.isoformat()
+    }
+
+
+@router.put("/{buyer_id}/preferences", tags=["buyers"])
+async def update_buyer_preferences(buyer_id: str, update: BuyerPreferencesUpdate,
+                                   background_tasks: BackgroundTasks):
+    """Update buyer preferences and re-run reverse matching in the background"""
+    changes = update.dict(exclude_unset=True)
+    record = await BuyerService.update_preferences(buyer_id, changes)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Buyer not found")
+    
+    background_tasks.add_task(get_buyer_snapshot_manager().refresh)
+    background_tasks.add_task(BuyerService.reverse_match, record.id)
+    
+    return {
+        "buyer_id": record.id,
+        "updated_fields": sorted(changes),
+        "reverse_matching": "scheduled"
     }
 
 
@@ -57,10 +106,44 @@ async def list_buyers(state: Optional[str] = None, skip: int = 0, limit: int = 2
 
 @router.post("/{buyer_id}/notify", tags=["buyers"])
 async def notify_buyer(buyer_id: str, property_id: str):
-    """Notify a buyer about a new property"""
-    return {
-        "buyer_id": buyer_id,
-        "property_id": property_id,
-        "notification_sent": True,
-        "method": "email"
-    }
+    """Queue a notification to a buyer about a property"""
+    result = await BuyerService.notify_buyer(buyer_id, property_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Buyer or property not found")
+    
+    return {**result, "notification_queued": bool(result["delivery_ids"])}
+
+
+@router.post("/blast/{property_id}", tags=["buyers"])
+async def blast_property(property_id: str, min_score: Optional[float] = None):
+    """
+    Notify every matched buyer about a property
+    
+    Messages are batched per channel and sent in the background; poll the
+    returned blast id for delivery progress.
+    """
+    try:
+        result = await BuyerService.blast_property(property_id, min_score)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Property not found")
+    return result
+
+
+@router.get("/notifications/blasts/{blast_id}", tags=["buyers"])
+async def get_blast_status(blast_id: str):
+    """Delivery counts for a blast"""
+    status = get_notification_queue().blast_status(blast_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Blast not found")
+    return status
+
+
+@router.get("/notifications/{delivery_id}", tags=["buyers"])
+async def get_delivery_status(delivery_id: str):
+    """Status of a single notification delivery"""
+    delivery = get_notification_queue().delivery_status(delivery_id)
+    if delivery is None:
+        raise HTTPException(status_code=404, detail="Delivery not found")
+    return delivery
@@ -3,7 +3,9 @@ Health check endpoints
 """
 from fastapi import APIRouter, Depends
 from datetime import datetime
+from typing import Optional
 
+from ..cache import get_prompt_cache
 from ..config import settings
 
 router = APIRouter()
@@ -30,3 +32,15 @@ async def readiness_check():
         "agents": "initialized",
         "timestamp": datetime.utcnow().isoformat()
     }
+
+
+@router.get("/llm-cache", tags=["health"])
+async def llm_cache_stats():
+    """Prompt cache size and hit rates"""
+    return await get_prompt_cache().stats()
+
+
+@router.get("/llm-cache/semantic-hits", tags=["health"])
+async def semantic_cache_audit(agent: Optional[str] = None, limit: int = 100):
+    """Answers served for similar (not identical) prompts, newest first"""
+    return {"served": await get_prompt_cache().semantic_hits(agent, limit)}
@@ -2,10 +2,12 @@
 Leads API endpoints
 """
 from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
 from typing import List, Optional
 from pydantic import BaseModel
 
 from ..agents import get_orchestrator
+from ..services import LeadService, get_outreach_queue
 
 router = APIRouter()
 
@@ -50,6 +52,77 @@ async def search_leads(request: LeadSearchRequest):
     return result
 
 
+class LeaseRequest(BaseModel):
+    """Request to lease the next lead for outreach"""
+    rep_id: str
+
+
+class ReleaseRequest(BaseModel):
+    """Return a leased lead to the outreach queue"""
+    rep_id: str
+    contacted: bool = False
+
+
+@router.get("/queue/top", tags=["leads"])
+async def get_outreach_queue_top(limit: int = 10):
+    """Preview the highest-priority leads waiting for outreach"""
+    queue = get_outreach_queue()
+    return {
+        "queued": len(queue),
+        "leads": queue.peek(limit)
+    }
+
+
+@router.post("/queue/lease", tags=["leads"])
+async def lease_next_lead(request: LeaseRequest):
+    """
+    Lease the next best lead to call
+    
+    The lead is held for the rep until released or until the lease expires.
+    """
+    queue = get_outreach_queue()
+    
+    while True:
+        item = queue.lease(request.rep_id)
+        if item is None:
+            raise HTTPException(status_code=404, detail="No leads waiting for outreach")
+        
+        lead = await LeadService.get_lead_by_id(item["lead_id"])
+        if lead is not None:
+            break
+        queue.discard(item["lead_id"])  # deleted since the queue was built
+    
+    return {
+        "lead_id": lead.id,
+        "address": lead.address,
+        "city": lead.city,
+        "state": lead.state,
+        "seller_name": lead.seller_name,
+        "seller_phone": lead.seller_phone,
+        "seller_email": lead.seller_email,
+        "lead_score": lead.lead_score,
+        "status": lead.lead_status,
+        "rep_id": request.rep_id,
+        "lease_expires_at": datetime.utcfromtimestamp(item["lease_expires_at"]).isoformat()
+    }
+
+
+@router.post("/queue/{lead_id}/release", tags=["leads"])
+async def release_lead(lead_id: str, request: ReleaseRequest):
+    """Return a leased lead to the queue, optionally recording the contact"""
+    if not get_outreach_queue().release(lead_id, request.rep_id, contacted=request.contacted):
+        raise HTTPException(status_code=409, detail="Lead is not leased to this rep")
+    
+    if request.contacted:
+        await LeadService.record_contact(lead_id)
+    
+    return {
+        "lead_id": lead_id,
+        "released": True,
+        "contacted": request.contacted
+    }
+
+
 @router.get("/{lead_id}", tags=["leads"])
 async def get_lead(lead_id: str):
     """Get detailed lead information by ID"""
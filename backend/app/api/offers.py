@@ -2,10 +2,14 @@
 Offers API endpoints
 """
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 
 from ..agents import get_orchestrator
+from ..agents.comps_index import get_comps_index
+from ..cache import get_offer_cache
+from ..config import settings
+from ..services import OfferService, normalize_state
 
 router = APIRouter()
 
@@ -16,6 +20,64 @@ class OfferGenerationRequest(BaseModel):
     property_details: dict
 
 
+class OfferBatchRequest(BaseModel):
+    """Request model for batch offer generation"""
+    leads: List[OfferGenerationRequest]
+    discount_percent: Optional[float] = None
+    wholesale_fee_percentage: Optional[float] = None
+    terms_for: List[str] = []  # lead ids whose offers are being sent
+
+
+class RepriceRequest(BaseModel):
+    """Pricing parameters for re-pricing the open pipeline"""
+    discount_percent: Optional[float] = None
+    wholesale_fee_percentage: Optional[float] = None
+
+
+class ScenarioRange(BaseModel):
+    """Values for one scenario axis: explicit values, or start/stop/steps"""
+    values: Optional[List[float]] = Field(None, max_length=settings.offer_scenario_max_cells)
+    start: Optional[float] = None
+    stop: Optional[float] = None
+    steps: int = Field(5, ge=1, le=settings.offer_scenario_max_cells)
+    
+    def size(self) -> int:
+        """Number of values expand() returns, without building them"""
+        if self.values:
+            return len(self.values)
+        if self.start is None or self.stop is None:
+            return 0
+        return self.steps
+    
+    def expand(self) -> List[float]:
+        if self.values:
+            return self.values
+        if self.start is None or self.stop is None:
+            return []
+        if self.steps <= 1:
+            return [self.start]
+        step = (self.stop - self.start) / (self.steps - 1)
+        return [self.start + i * step for i in range(self.steps)]
+
+
+class OfferScenarioRequest(BaseModel):
+    """What-if grid over ARV, repair cost, holding cost and discount"""
+    property_details: dict = {}
+    arv: Optional[ScenarioRange] = None
+    repair_cost: Optional[ScenarioRange] = None
+    holding_cost: Optional[ScenarioRange] = None
+    discount_percent: Optional[ScenarioRange] = None
+    wholesale_fee_percentage: Optional[float] = None
+
+
+class ContractRequest(BaseModel):
+    """Parties and jurisdiction for an offer's purchase agreement"""
+    state: str
+    buyer_name: str
+    seller_name: str
+    signer_email: Optional[str] = None  # send for signature when set
+
+
 class OfferResponse(BaseModel):
     """Response model for offers"""
     offer_id: str
@@ -48,16 +110,106 @@ async def generate_offer(request: OfferGenerationRequest):
     return result
 
 
+@router.post("/batch", response_model=dict)
+async def generate_offers_batch(request: OfferBatchRequest):
+    """
+    Price offers for many leads at once
+    
+    Contract terms are only rendered for the lead ids in terms_for.
+    """
+    result = await OfferService.generate_offers_batch(
+        [lead.dict() for lead in request.leads],
+        discount_percent=request.discount_percent,
+        wholesale_fee_percentage=request.wholesale_fee_percentage,
+        terms_for=request.terms_for
+    )
+    if "error" in result:
+        raise HTTPException(status_code=500, detail=result["error"])
+    return result
+
+
+@router.post("/reprice", response_model=dict)
+async def reprice_pipeline(request: RepriceRequest):
+    """Re-price every open lead, e.g. after a discount or fee change"""
+    result = await OfferService.reprice_pipeline(request.discount_percent,
+                                                 request.wholesale_fee_percentage)
+    if "error" in result:
+        raise HTTPException(status_code=500, detail=result["error"])
+    return result
+
+
+@router.post("/scenarios", response_model=dict)
+async def offer_scenarios(request: OfferScenarioRequest):
+    """
+    Evaluate offer price, profit and ROI over every combination of the
+    given ranges, plus the break-even repair cost for each ARV / holding /
+    discount combination
+    
+    Axes without a range use the property_details base case.
+    """
+    axes = ("arv", "repair_cost", "holding_cost", "discount_percent")
+    cells = 1
+    for name in axes:
+        axis = getattr(request, name)
+        cells *= max(axis.size() if axis else 0, 1)
+    if cells > settings.offer_scenario_max_cells:
+        raise HTTPException(status_code=400,
+                            detail=f"Scenario grid has {cells} cells (max {settings.offer_scenario_max_cells})")
+    
+    ranges = {}
+    for name in axes:
+        axis = getattr(request, name)
+        ranges[name] = axis.expand() if axis else []
+    
+    return OfferService.offer_scenarios(request.property_details, ranges,
+                                        request.wholesale_fee_percentage)
+
+
+@router.get("/arv", tags=["offers"])
+async def estimate_arv(latitude: float, longitude: float, square_feet: Optional[int] = None,
+                       bedrooms: Optional[int] = None, bathrooms: Optional[float] = None):
+    """Estimate ARV from the nearest comparable sales in the local comps index"""
+    estimate = get_comps_index().estimate_arv({
+        "latitude": latitude,
+        "longitude": longitude,
+        "square_feet": square_feet,
+        "bedrooms": bedrooms,
+        "bathrooms": bathrooms,
+    })
+    if estimate is None:
+        raise HTTPException(status_code=404, detail="No comparable sales found nearby")
+    return estimate
+
+
 @router.get("/{offer_id}", tags=["offers"])
 async def get_offer(offer_id: str):
-    """Get offer details by ID"""
-    return {
-        "offer_id": offer_id,
-        "lead_id": "lead_123",
-        "offer_price": 250000.00,
-        "arv": 400000.00,
-        "modified_at": "2025-02-13T00:00:00"
-    }
+    """Get a generated offer by ID"""
+    offer = await get_offer_cache().get(offer_id)
+    if offer is None:
+        raise HTTPException(status_code=404, detail="Offer not found or expired")
+    return offer
+
+
+@router.post("/{offer_id}/contract", tags=["offers"])
+async def generate_contract(offer_id: str, request: ContractRequest):
+    """
+    Render an offer's purchase agreement as a PDF
+    
+    Identical contracts are rendered once; pass signer_email to send the
+    document for signature via DocuSign.
+    """
+    state = normalize_state(request.state)
+    if state is None:
+        raise HTTPException(status_code=400, detail=f"Unknown state: {request.state}")
+    try:
+        result = await OfferService.generate_contract(
+            offer_id, state, request.buyer_name, request.seller_name, request.signer_email
+        )
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Offer not found or expired")
+    return result
 
 
 @router.patch("/{offer_id}/sign", tags=["offers"])
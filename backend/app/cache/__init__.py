@@ -0,0 +1,37 @@
+"""
+Cache module initialization
+"""
+from .base import TieredCache, CacheEntry
+from .search_cache import SearchResultCache, get_search_cache
+from .offer_cache import OfferCache, get_offer_cache, offer_fingerprint, offer_id_for
+from .prompt_cache import PromptCache, get_prompt_cache, prompt_key
+from .semantic_cache import SemanticCache, get_semantic_cache
+from .buyer_snapshot import BuyerSnapshot, BuyerSnapshotManager, buyer_row_to_dict, get_buyer_snapshot_manager
+
+__all__ = [
+    "TieredCache",
+    "CacheEntry",
+    "SearchResultCache",
+    "get_search_cache",
+    "OfferCache",
+    "get_offer_cache",
+    "offer_fingerprint",
+    "offer_id_for",
+    "PromptCache",
+    "get_prompt_cache",
+    "prompt_key",
+    "SemanticCache",
+    "get_semantic_cache",
+    "BuyerSnapshot",
+    "BuyerSnapshotManager",
+    "buyer_row_to_dict",
+    "get_buyer_snapshot_manager",
+    "close_caches",
+]
+
+
+async def close_caches():
+    """Close connections held by the global caches"""
+    await get_search_cache().cache.close()
+    await get_offer_cache().cache.close()
+    get_prompt_cache().close()
@@ -0,0 +1,189 @@
+"""
+Two-level cache: in-process LRU (L1) in front of Redis (L2)
+"""
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, NamedTuple, Optional
+
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# How long to stop talking to Redis after a connection failure
+REDIS_RETRY_AFTER_SECONDS = 30.0
+
+
+class CacheEntry(NamedTuple):
+    """A cached value and the time it was stored"""
+    value: Any
+    stored_at: float
+
+
+class TieredCache:
+    """
+    Cache with a bounded in-process LRU in front of a shared Redis store.
+
+    Values are stored as JSON so every read returns a fresh copy that callers
+    may mutate. Redis failures are logged and the cache degrades to L1 only
+    for a short back-off period instead of adding latency to every request.
+    """
+    
+    def __init__(self, namespace: str, redis_url: Optional[str] = None,
+                 l1_max_entries: Optional[int] = None):
+        """
+        Initialize a tiered cache
+        
+        Args:
+            namespace: Prefix applied to every Redis key
+            redis_url: Redis connection URL (defaults to settings.redis_url)
+            l1_max_entries: Maximum number of entries kept in process
+        """
+        self.namespace = namespace
+        self.redis_url = redis_url or settings.redis_url
+        self.l1_max_entries = l1_max_entries or settings.cache_l1_max_entries
+        self._l1: "OrderedDict[str, tuple]" = OrderedDict()
+        self._redis: Optional[aioredis.Redis] = None
+        self._redis_down_until = 0.0
+    
+    def _redis_key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+    
+    def _get_redis(self) -> Optional[aioredis.Redis]:
+        """Get the Redis client, or None while backing off after a failure"""
+        if time.monotonic() < self._redis_down_until:
+            return None
+        if self._redis is None:
+            self._redis = aioredis.from_url(
+                self.redis_url,
+                decode_responses=True,
+                socket_timeout=settings.cache_redis_timeout_seconds,
+                socket_connect_timeout=settings.cache_redis_timeout_seconds,
+            )
+        return self._redis
+    
+    def _mark_redis_down(self, error: Exception):
+        logger.warning(f"Cache '{self.namespace}': Redis unavailable, using L1 only: {error}")
+        self._redis_down_until = time.monotonic() + REDIS_RETRY_AFTER_SECONDS
+    
+    def _l1_get(self, key: str) -> Optional[tuple]:
+        item = self._l1.get(key)
+        if item is None:
+            return None
+        payload, stored_at, expires_at = item
+        if expires_at is not None and time.time() >= expires_at:
+            del self._l1[key]
+            return None
+        self._l1.move_to_end(key)
+        return item
+    
+    def _l1_set(self, key: str, payload: str, stored_at: float, expires_at: Optional[float]):
+        self._l1[key] = (payload, stored_at, expires_at)
+        self._l1.move_to_end(key)
+        while len(self._l1) > self.l1_max_entries:
+            self._l1.popitem(last=False)
+    
+    async def get_entry(self, key: str, skip_l1: bool = False) -> Optional[CacheEntry]:
+        """
+        Look up a key in L1, then Redis. Redis hits are promoted into L1.
+        
+        Args:
+            skip_l1: Read Redis even when L1 has the key (e.g. the L1 copy is
+                stale and another worker may have stored a newer value). The
+                L1 copy is still returned when Redis has nothing.
+        """
+        item = self._l1_get(key)
+        l1_entry = None
+        if item is not None:
+            payload, stored_at, _ = item
+            l1_entry = CacheEntry(json.loads(payload), stored_at)
+            if not skip_l1:
+                return l1_entry
+        
+        client = self._get_redis()
+        if client is None:
+            return l1_entry
+        
+        try:
+            raw = await client.get(self._redis_key(key))
+            if raw is None:
+                return l1_entry
+            ttl = await client.ttl(self._redis_key(key))
+        except (RedisError, OSError) as e:
+            self._mark_redis_down(e)
+            return l1_entry
+        
+        envelope = json.loads(raw)
+        if l1_entry is not None and envelope["stored_at"] <= l1_entry.stored_at:
+            return l1_entry
+        expires_at = time.time() + ttl if ttl and ttl > 0 else None
+        payload = json.dumps(envelope["value"], default=str)
+        self._l1_set(key, payload, envelope["stored_at"], expires_at)
+        return CacheEntry(envelope["value"], envelope["stored_at"])
+    
+    async def get(self, key: str) -> Optional[Any]:
+        """Get a cached value, or None on a miss"""
+        entry = await self.get_entry(key)
+        return entry.value if entry is not None else None
+    
+    async def set(self, key: str, value: Any, ttl_seconds: Optional[int] = None):
+        """Store a JSON-serializable value in both tiers"""
+        stored_at = time.time()
+        payload = json.dumps(value, default=str)
+        expires_at = stored_at + ttl_seconds if ttl_seconds else None
+        self._l1_set(key, payload, stored_at, expires_at)
+        
+        client = self._get_redis()
+        if client is None:
+            return
+        
+        envelope = f'{{"stored_at": {stored_at!r}, "value": {payload}}}'
+        try:
+            await client.set(self._redis_key(key), envelope, ex=ttl_seconds)
+        except (RedisError, OSError) as e:
+            self._mark_redis_down(e)
+    
+    async def delete(self, key: str):
+        """Remove a key from both tiers"""
+        self._l1.pop(key, None)
+        client = self._get_redis()
+        if client is None:
+            return
+        try:
+            await client.delete(self._redis_key(key))
+        except (RedisError, OSError) as e:
+            self._mark_redis_down(e)
+    
+    async def try_lock(self, key: str, ttl_seconds: int) -> bool:
+        """
+        Acquire a short-lived cross-worker lock on a key
+        
+        Returns True when the lock was acquired, or when Redis is unavailable
+        (in which case only in-process deduplication applies).
+        """
+        client = self._get_redis()
+        if client is None:
+            return True
+        try:
+            acquired = await client.set(self._redis_key(f"lock:{key}"), "1", nx=True, ex=ttl_seconds)
+            return bool(acquired)
+        except (RedisError, OSError) as e:
+            self._mark_redis_down(e)
+            return True
+    
+    async def release_lock(self, key: str):
+        """Release a lock taken with try_lock"""
+        await self.delete(f"lock:{key}")
+    
+    async def close(self):
+        """Close the Redis connection"""
+        if self._redis is not None:
+            try:
+                await self._redis.close()
+            except (RedisError, OSError):
+                pass
+            self._redis = None
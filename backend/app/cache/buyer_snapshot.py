@@ -0,0 +1,195 @@
+"""
+Process-wide snapshot of cash buyers with an incremental change feed
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import or_, select
+
+from ..config import settings
+from ..database import AsyncSessionLocal, CashBuyer
+from ..scoring import BuyerPreferences
+
+logger = logging.getLogger(__name__)
+
+# Re-read rows changed slightly before the watermark so a transaction that
+# committed late with an earlier timestamp is not missed
+WATERMARK_OVERLAP = timedelta(seconds=5)
+
+
+def buyer_row_to_dict(buyer: CashBuyer) -> Dict[str, Any]:
+    """Map a CashBuyer row onto the dict shape BuyerMatcherAgent scores"""
+    return {
+        "id": buyer.id,
+        "name": buyer.name,
+        "email": buyer.email,
+        "phone": buyer.phone,
+        "target_states": buyer.target_states or [],
+        "min_deal_size": buyer.min_deal_size if buyer.min_deal_size is not None else 0,
+        "max_deal_size": buyer.max_deal_size if buyer.max_deal_size is not None else 10000000,
+        "preferred_property_types": buyer.preferred_property_types or [],
+        "min_roi_percent": buyer.min_roi_percent if buyer.min_roi_percent is not None else 20,
+        "is_active": bool(buyer.is_active),
+        "auto_notify": buyer.auto_notify if buyer.auto_notify is not None else True,
+        "notification_method": buyer.notification_method or "email",
+        "notification_frequency": buyer.notification_frequency or settings.default_notification_frequency,
+    }
+
+
+class BuyerSnapshot:
+    """
+    Immutable view of every buyer plus the structures matching needs
+    
+    Never modified after construction - refreshes build a new snapshot (in
+    a worker thread, so a large buyer table doesn't block the event loop)
+    and swap the reference, so readers never lock and never see a partial
+    update.
+    """
+    
+    def __init__(self, buyers: Dict[str, Dict[str, Any]], version: int,
+                 preference_vectors: Optional[Dict[str, Tuple[np.ndarray, int]]] = None):
+        # Imported here because app.agents imports this package
+        from ..agents.buyer_index import BuyerIndex
+        from ..agents.buyer_matrix import BuyerMatrix
+        
+        self.version = version
+        self.loaded_at = datetime.utcnow()
+        self.buyers_by_id = buyers
+        self.index = BuyerIndex(list(buyers.values()))
+        self.matrix = BuyerMatrix(self.index.buyers)
+        self._positions = {buyer["id"]: position for position, buyer in enumerate(self.index.buyers)}
+        
+        # Learned preferences, aligned with index/matrix buyer positions
+        self.preference_vectors = preference_vectors or {}
+        self.preferences: Optional[BuyerPreferences] = None
+        if self.preference_vectors:
+            self.preferences = BuyerPreferences(
+                self.index.buyers, self.preference_vectors,
+                weight=settings.buyer_preference_weight,
+                prior_deals=settings.buyer_preference_prior_deals,
+            )
+    
+    def __len__(self) -> int:
+        return len(self.buyers_by_id)
+    
+    def get(self, buyer_id: str) -> Optional[Dict[str, Any]]:
+        return self.buyers_by_id.get(buyer_id)
+    
+    def position_of(self, buyer_id: str) -> Optional[int]:
+        """Position of a buyer in index/matrix order"""
+        return self._positions.get(buyer_id)
+
+
+class BuyerSnapshotManager:
+    """
+    Loads cash_buyers once, then follows changes on updated_at / last_activity
+    
+    Hard-deleted rows are only dropped by a full load(); deactivation goes
+    through is_active and is picked up incrementally.
+    """
+    
+    def __init__(self):
+        self._snapshot: Optional[BuyerSnapshot] = None
+        self._watermark: Optional[datetime] = None
+        self._preference_vectors: Dict[str, Tuple[np.ndarray, int]] = {}
+        self._lock = asyncio.Lock()
+    
+    @property
+    def snapshot(self) -> Optional[BuyerSnapshot]:
+        """Current snapshot (None until the first load)"""
+        return self._snapshot
+    
+    @property
+    def is_loaded(self) -> bool:
+        return self._snapshot is not None
+    
+    @staticmethod
+    def _row_watermark(buyer: CashBuyer) -> datetime:
+        return max(t for t in (buyer.updated_at, buyer.last_activity, buyer.created_at, datetime.min) if t)
+    
+    async def load(self):
+        """Full load of the cash_buyers table"""
+        async with self._lock:
+            async with AsyncSessionLocal() as session:
+                rows = (await session.execute(select(CashBuyer))).scalars().all()
+            
+            buyers = {row.id: buyer_row_to_dict(row) for row in rows}
+            self._watermark = max((self._row_watermark(row) for row in rows), default=None)
+            version = self._snapshot.version + 1 if self._snapshot else 1
+            self._snapshot = await asyncio.to_thread(BuyerSnapshot, buyers, version, self._preference_vectors)
+        logger.info(f"Buyer snapshot v{version} loaded with {len(buyers)} buyers")
+    
+    async def refresh(self) -> int:
+        """
+        Apply buyers changed since the last load/refresh
+        
+        Returns:
+            Number of buyers that changed
+        """
+        if self._snapshot is None:
+            await self.load()
+            return len(self._snapshot)
+        
+        async with self._lock:
+            query = select(CashBuyer)
+            if self._watermark is not None:
+                since = self._watermark - WATERMARK_OVERLAP
+                query = query.where(or_(CashBuyer.updated_at > since, CashBuyer.last_activity > since))
+            
+            async with AsyncSessionLocal() as session:
+                rows = (await session.execute(query)).scalars().all()
+            
+            current = self._snapshot
+            changed = {
+                row.id: buyer_row_to_dict(row) for row in rows
+                if current.get(row.id) != buyer_row_to_dict(row)
+            }
+            if rows:
+                self._watermark = max([self._row_watermark(row) for row in rows]
+                                      + ([self._watermark] if self._watermark else []))
+            if not changed:
+                return 0
+            
+            self._snapshot = await asyncio.to_thread(
+                BuyerSnapshot, {**current.buyers_by_id, **changed}, current.version + 1,
+                self._preference_vectors
+            )
+        logger.info(f"Buyer snapshot v{self._snapshot.version}: {len(changed)} buyers changed")
+        return len(changed)
+    
+    async def set_preference_vectors(self, vectors: Dict[str, Tuple[np.ndarray, int]]):
+        """Swap in newly learned buyer preference vectors"""
+        async with self._lock:
+            self._preference_vectors = vectors
+            current = self._snapshot
+            if current is not None:
+                self._snapshot = await asyncio.to_thread(
+                    BuyerSnapshot, current.buyers_by_id, current.version + 1, vectors
+                )
+    
+    async def run_periodically(self, interval_seconds: Optional[int] = None):
+        """Keep the snapshot current until cancelled"""
+        interval = interval_seconds or settings.buyer_snapshot_refresh_seconds
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Buyer snapshot refresh failed: {e}")
+            await asyncio.sleep(interval)
+
+
+# Global snapshot manager instance
+_snapshot_manager: Optional[BuyerSnapshotManager] = None
+
+
+def get_buyer_snapshot_manager() -> BuyerSnapshotManager:
+    """Get or create the global buyer snapshot manager"""
+    global _snapshot_manager
+    if _snapshot_manager is None:
+        _snapshot_manager = BuyerSnapshotManager()
+    return _snapshot_manager
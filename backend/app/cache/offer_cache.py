@@ -0,0 +1,62 @@
+"""
+Generated offer cache keyed by lead and input fingerprint
+"""
+import hashlib
+import json
+from typing import Any, Dict, Optional
+
+from .base import TieredCache
+from ..config import settings
+
+# Bump when offer pricing or terms change so cached offers are recomputed
+OFFER_CACHE_VERSION = "offer-v1"
+
+
+def offer_fingerprint(property_details: Dict[str, Any]) -> str:
+    """Hash of everything a generated offer depends on"""
+    payload = json.dumps({
+        "version": OFFER_CACHE_VERSION,
+        "property_details": property_details,
+        "wholesale_fee_percentage": settings.wholesale_fee_percentage,
+        "default_offer_discount_percent": settings.default_offer_discount_percent,
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def offer_id_for(lead_id: str, fingerprint: str) -> str:
+    """Stable offer id - the same lead and inputs always give the same id"""
+    return "off_" + hashlib.sha256(f"{lead_id}:{fingerprint}".encode()).hexdigest()[:32]
+
+
+class OfferCache:
+    """
+    Stores generated offers by offer id
+    
+    The id is derived from the lead and the input fingerprint, so an offer
+    is served from cache while the lead's property details and the pricing
+    settings are unchanged; any change yields a new id and a recompute.
+    """
+    
+    def __init__(self, cache: Optional[TieredCache] = None):
+        self.cache = cache or TieredCache("offers")
+        self.ttl = settings.offer_cache_ttl_seconds
+    
+    async def get(self, offer_id: str) -> Optional[Dict[str, Any]]:
+        """Look up a generated offer by id"""
+        return await self.cache.get(offer_id)
+    
+    async def store(self, offer: Dict[str, Any]):
+        """Store a generated offer (must carry offer_id)"""
+        await self.cache.set(offer["offer_id"], offer, ttl_seconds=self.ttl)
+
+
+# Global offer cache instance
+_offer_cache: Optional[OfferCache] = None
+
+
+def get_offer_cache() -> OfferCache:
+    """Get or create the global offer cache"""
+    global _offer_cache
+    if _offer_cache is None:
+        _offer_cache = OfferCache()
+    return _offer_cache
@@ -0,0 +1,315 @@
+"""
+Persistent LLM prompt-response cache (SQLite, shared across worker processes)
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# Size is checked (and entries evicted) every this many stores per process
+EVICTION_CHECK_EVERY = 50
+# Eviction trims the store to this share of the size limit
+EVICTION_TARGET = 0.9
+# Semantic hit audit rows kept (newest first); older ones are pruned on eviction
+SEMANTIC_AUDIT_MAX_ROWS = 10000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS prompt_cache (
+    key TEXT PRIMARY KEY,
+    agent TEXT,
+    model TEXT,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    last_hit REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_prompt_cache_last_hit ON prompt_cache (last_hit);
+CREATE INDEX IF NOT EXISTS idx_prompt_cache_expires ON prompt_cache (expires_at);
+CREATE TABLE IF NOT EXISTS prompt_cache_counters (
+    agent TEXT PRIMARY KEY,
+    hits INTEGER NOT NULL DEFAULT 0,
+    misses INTEGER NOT NULL DEFAULT 0,
+    semantic_hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS semantic_cache_audit (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    served_at REAL NOT NULL,
+    agent TEXT,
+    requested_key TEXT NOT NULL,
+    matched_key TEXT NOT NULL,
+    similarity REAL NOT NULL,
+    requested_prompt TEXT NOT NULL,
+    matched_prompt TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_semantic_audit_served ON semantic_cache_audit (served_at);
+"""
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Collapse whitespace so indentation/spacing differences hash the same"""
+    return re.sub(r"\s+", " ", prompt).strip()
+
+
+def prompt_key(provider: str, model: str, params: Dict[str, Any], prompt: str) -> str:
+    """Cache key: provider + model + request parameters + normalized prompt"""
+    payload = json.dumps({
+        "provider": provider,
+        "model": model,
+        "params": params,
+        "prompt": normalize_prompt(prompt),
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class PromptCache:
+    """
+    LLM responses stored in SQLite under their prompt key
+    
+    The database runs in WAL mode so every worker process can read and write
+    the same file. Entries expire after their TTL; when the store grows past
+    prompt_cache_max_mb the least recently hit entries are evicted. Queries
+    run in a worker thread so they never block the event loop.
+    """
+    
+    def __init__(self, path: Optional[str] = None, ttl_seconds: Optional[int] = None,
+                 max_mb: Optional[float] = None):
+        self.path = Path(path or settings.prompt_cache_path)
+        self.ttl = ttl_seconds or settings.prompt_cache_ttl_seconds
+        self.max_bytes = int((max_mb or settings.prompt_cache_max_mb) * 1024 * 1024)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._stores = 0
+        # This process's counters; prompt_cache_counters holds the totals
+        self.hits = 0
+        self.misses = 0
+    
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=5.0, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(prompt_cache_counters)")}
+            if "semantic_hits" not in columns:
+                # Stores created before the semantic cache layer
+                conn.execute("ALTER TABLE prompt_cache_counters ADD COLUMN semantic_hits INTEGER NOT NULL DEFAULT 0")
+            self._conn = conn
+        return self._conn
+    
+    def _count(self, conn: sqlite3.Connection, agent: Optional[str], hit: bool):
+        column = "hits" if hit else "misses"
+        conn.execute(
+            f"INSERT INTO prompt_cache_counters (agent, {column}) VALUES (?, 1) "
+            f"ON CONFLICT(agent) DO UPDATE SET {column} = {column} + 1",
+            (agent or "",)
+        )
+    
+    def _get(self, key: str, agent: Optional[str], count: bool) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT response FROM prompt_cache WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row is not None:
+                conn.execute("UPDATE prompt_cache SET last_hit = ?, hits = hits + 1 WHERE key = ?", (now, key))
+            if count:
+                self._count(conn, agent, hit=row is not None)
+        return row[0] if row is not None else None
+    
+    def _set(self, key: str, response: str, ttl: int, agent: Optional[str],
+             model: Optional[str]) -> List[str]:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO prompt_cache "
+                "(key, agent, model, response, size, created_at, expires_at, last_hit, hits) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)",
+                (key, agent, model, response, len(response.encode()), now, now + ttl, now)
+            )
+            self._stores += 1
+            if self._stores % EVICTION_CHECK_EVERY == 0:
+                return self._evict(conn, now)
+        return []
+    
+    def _evict(self, conn: sqlite3.Connection, now: float) -> List[str]:
+        """
+        Drop expired entries, then least recently hit ones until under the
+        size limit, and prune the semantic hit audit
+        
+        Returns:
+            Keys of the evicted entries
+        """
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            expired = [row[0] for row in conn.execute(
+                "SELECT key FROM prompt_cache WHERE expires_at <= ?", (now,)
+            )]
+            conn.execute("DELETE FROM prompt_cache WHERE expires_at <= ?", (now,))
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM prompt_cache").fetchone()[0]
+            evicted: List[str] = []
+            if total > self.max_bytes:
+                excess = total - int(self.max_bytes * EVICTION_TARGET)
+                # Least recently hit entries, until their combined size covers the excess
+                evicted = [row[0] for row in conn.execute(
+                    "SELECT key FROM ("
+                    " SELECT key, SUM(size) OVER (ORDER BY last_hit, key) - size AS size_before"
+                    " FROM prompt_cache"
+                    ") WHERE size_before < ?",
+                    (excess,)
+                )]
+                conn.executemany("DELETE FROM prompt_cache WHERE key = ?", [(key,) for key in evicted])
+            conn.execute("DELETE FROM semantic_cache_audit WHERE served_at <= ?", (now - self.ttl,))
+            conn.execute(
+                "DELETE FROM semantic_cache_audit WHERE id <= "
+                "(SELECT id FROM semantic_cache_audit ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                (SEMANTIC_AUDIT_MAX_ROWS,)
+            )
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+        if expired or evicted:
+            logger.info(f"Prompt cache evicted {len(expired)} expired and {len(evicted)} "
+                        f"least recently used entries")
+        return expired + evicted
+    
+    async def get(self, key: str, agent: Optional[str] = None, count: bool = True) -> Optional[str]:
+        """
+        Cached response for a prompt key (None on miss or expiry)
+        
+        Args:
+            count: Record the lookup in the hit-rate metrics
+        """
+        try:
+            response = await asyncio.to_thread(self._get, key, agent, count)
+        except sqlite3.Error as e:
+            logger.warning(f"Prompt cache read failed: {e}")
+            return None
+        if not count:
+            return response
+        if response is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return response
+    
+    async def set(self, key: str, response: str, ttl_seconds: Optional[int] = None,
+                  agent: Optional[str] = None, model: Optional[str] = None) -> List[str]:
+        """
+        Store a response under its prompt key
+        
+        Returns:
+            Keys evicted to make room (usually none)
+        """
+        try:
+            return await asyncio.to_thread(self._set, key, response, ttl_seconds or self.ttl, agent, model)
+        except sqlite3.Error as e:
+            logger.warning(f"Prompt cache write failed: {e}")
+            return []
+    
+    def _record_semantic_hit(self, agent: Optional[str], requested_key: str, matched_key: str,
+                             similarity: float, requested_prompt: str, matched_prompt: str):
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT INTO semantic_cache_audit (served_at, agent, requested_key, matched_key, "
+                "similarity, requested_prompt, matched_prompt) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (time.time(), agent, requested_key, matched_key, similarity, requested_prompt, matched_prompt)
+            )
+            conn.execute(
+                "INSERT INTO prompt_cache_counters (agent, semantic_hits) VALUES (?, 1) "
+                "ON CONFLICT(agent) DO UPDATE SET semantic_hits = semantic_hits + 1",
+                (agent or "",)
+            )
+    
+    async def record_semantic_hit(self, agent: Optional[str], requested_key: str, matched_key: str,
+                                  similarity: float, requested_prompt: str, matched_prompt: str):
+        """Audit an answer served for a similar (not identical) prompt"""
+        try:
+            await asyncio.to_thread(self._record_semantic_hit, agent, requested_key, matched_key,
+                                    similarity, normalize_prompt(requested_prompt), matched_prompt)
+        except sqlite3.Error as e:
+            logger.warning(f"Semantic cache audit write failed: {e}")
+    
+    def _semantic_hits(self, agent: Optional[str], limit: int) -> List[Dict[str, Any]]:
+        query = ("SELECT served_at, agent, requested_key, matched_key, similarity, requested_prompt, "
+                 "matched_prompt FROM semantic_cache_audit")
+        args: tuple = ()
+        if agent:
+            query += " WHERE agent = ?"
+            args = (agent,)
+        query += " ORDER BY served_at DESC LIMIT ?"
+        with self._lock:
+            rows = self._connect().execute(query, args + (limit,)).fetchall()
+        columns = ("served_at", "agent", "requested_key", "matched_key", "similarity",
+                   "requested_prompt", "matched_prompt")
+        return [dict(zip(columns, row)) for row in rows]
+    
+    async def semantic_hits(self, agent: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """Most recent answers served by similarity, newest first"""
+        return await asyncio.to_thread(self._semantic_hits, agent, limit)
+    
+    def _stats(self) -> Dict[str, Any]:
+        with self._lock:
+            conn = self._connect()
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM prompt_cache").fetchone()
+            counters = conn.execute(
+                "SELECT agent, hits, misses, semantic_hits FROM prompt_cache_counters"
+            ).fetchall()
+        by_agent = {
+            agent or "unknown": {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+                "semantic_hits": semantic_hits
+            }
+            for agent, hits, misses, semantic_hits in counters
+        }
+        total_hits = sum(c["hits"] for c in by_agent.values())
+        total_lookups = total_hits + sum(c["misses"] for c in by_agent.values())
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "size_bytes": size,
+            "max_bytes": self.max_bytes,
+            "hit_rate": round(total_hits / total_lookups, 4) if total_lookups else 0.0,
+            "process_hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "by_agent": by_agent
+        }
+    
+    async def stats(self) -> Dict[str, Any]:
+        """Entry count, size and hit rates (all processes, this process and per agent)"""
+        return await asyncio.to_thread(self._stats)
+    
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# Global prompt cache instance
+_prompt_cache: Optional[PromptCache] = None
+
+
+def get_prompt_cache() -> PromptCache:
+    """Get or create the global prompt cache"""
+    global _prompt_cache
+    if _prompt_cache is None:
+        _prompt_cache = PromptCache()
+    return _prompt_cache
@@ -0,0 +1,124 @@
+"""
+Stale-while-revalidate cache for LeadScout search results
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from .base import TieredCache
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+SearchFunc = Callable[[], Awaitable[Dict[str, Any]]]
+
+
+class SearchResultCache:
+    """
+    Caches LeadScout results per (search_type, location).
+    
+    - Fresh entries (younger than search_cache_ttl_seconds) are served directly
+    - Stale entries (within the additional stale window) are served immediately
+      while a single background refresh recomputes them
+    - Missing or expired entries are computed inline; concurrent callers for
+      the same key share one computation
+    """
+    
+    def __init__(self, cache: Optional[TieredCache] = None):
+        self.cache = cache or TieredCache("leadscout:search")
+        self.fresh_ttl = settings.search_cache_ttl_seconds
+        self.stale_ttl = settings.search_cache_stale_ttl_seconds
+        self._inflight: Dict[str, asyncio.Task] = {}
+    
+    @staticmethod
+    def normalize_location(location: str) -> str:
+        """Canonical spelling of a location ("los angeles,ca" -> "Los Angeles, CA")"""
+        parts = [" ".join(part.split()) for part in location.split(",")]
+        return ", ".join(
+            part.upper() if i > 0 and len(part) == 2 else part.title()
+            for i, part in enumerate(parts)
+        )
+    
+    @classmethod
+    def make_key(cls, search_type: str, location: str) -> str:
+        """Normalize search parameters into a cache key"""
+        return f"{search_type.strip().lower()}:{cls.normalize_location(location).lower()}"
+    
+    async def get_or_refresh(self, search_type: str, location: str,
+                             search: SearchFunc) -> Tuple[Dict[str, Any], str]:
+        """
+        Get a search result, computing it with `search` when needed
+        
+        Returns:
+            Tuple of (result, cache_status) where cache_status is
+            "fresh", "stale" or "miss"
+        """
+        key = self.make_key(search_type, location)
+        entry = await self.cache.get_entry(key)
+        
+        if entry is not None and time.time() - entry.stored_at >= self.fresh_ttl:
+            # The L1 copy is stale; another worker may already have refreshed Redis
+            entry = await self.cache.get_entry(key, skip_l1=True)
+        
+        if entry is not None:
+            age = time.time() - entry.stored_at
+            if age < self.fresh_ttl:
+                return entry.value, "fresh"
+            if age < self.fresh_ttl + self.stale_ttl:
+                self._schedule_refresh(key, search)
+                return entry.value, "stale"
+        
+        result = await asyncio.shield(self._refresh(key, search))
+        return result, "miss"
+    
+    def _refresh(self, key: str, search: SearchFunc) -> "asyncio.Task":
+        """Start (or join) the single in-process refresh for a key"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._compute_and_store(key, search))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return task
+    
+    def _schedule_refresh(self, key: str, search: SearchFunc):
+        """Refresh a stale entry in the background"""
+        if key in self._inflight:
+            return
+        
+        async def refresh_if_unlocked():
+            # Only one worker across the fleet revalidates a given key
+            if not await self.cache.try_lock(key, ttl_seconds=max(self.fresh_ttl, 30)):
+                return
+            try:
+                await self._compute_and_store(key, search)
+            except Exception as e:
+                logger.error(f"Background refresh of search '{key}' failed: {e}")
+            finally:
+                await self.cache.release_lock(key)
+        
+        task = asyncio.create_task(refresh_if_unlocked())
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+    
+    async def _compute_and_store(self, key: str, search: SearchFunc) -> Dict[str, Any]:
+        result = await search()
+        await self.cache.set(key, result, ttl_seconds=self.fresh_ttl + self.stale_ttl)
+        logger.info(f"Search cache refreshed for '{key}'")
+        return result
+    
+    async def invalidate(self, search_type: str, location: str):
+        """Drop a cached search result"""
+        await self.cache.delete(self.make_key(search_type, location))
+
+
+# Global search cache instance
+_search_cache: Optional[SearchResultCache] = None
+
+
+def get_search_cache() -> SearchResultCache:
+    """Get or create the global search result cache"""
+    global _search_cache
+    if _search_cache is None:
+        _search_cache = SearchResultCache()
+    return _search_cache
@@ -0,0 +1,131 @@
+"""
+Semantic similarity layer over the prompt cache (chromadb)
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+from .prompt_cache import normalize_prompt
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+COLLECTION_NAME = "llm_prompts"
+# Nearest neighbours checked per lookup, in case the closest answer is gone
+LOOKUP_CANDIDATES = 3
+
+
+class SemanticMatch(NamedTuple):
+    """A past prompt close enough to reuse its answer"""
+    key: str  # prompt cache key of the matched prompt
+    similarity: float
+    prompt: str
+
+
+def semantic_scope(provider: str, model: str, params: Dict[str, Any], agent: Optional[str]) -> str:
+    """Only prompts with the same provider, model, parameters and agent may match"""
+    payload = json.dumps({"provider": provider, "model": model, "params": params, "agent": agent},
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+class SemanticCache:
+    """
+    Approximate-nearest-neighbor index of past prompts
+    
+    Each answered prompt is embedded and stored with its prompt cache key.
+    A new prompt reuses the nearest past prompt's answer when their cosine
+    similarity clears the calling agent's threshold. Only agents listed in
+    semantic_cache_thresholds take part. The answer itself stays in the
+    prompt cache, so its TTL and eviction still apply; evicted keys are
+    deleted from the index.
+    """
+    
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.semantic_cache_path
+        self._collection = None
+    
+    def _get_collection(self):
+        if self._collection is None:
+            # Imported on first use: the layer is optional and chromadb is heavy to load
+            import chromadb
+            
+            client = chromadb.PersistentClient(path=self.path)
+            self._collection = client.get_or_create_collection(
+                COLLECTION_NAME, metadata={"hnsw:space": "cosine"}
+            )
+        return self._collection
+    
+    @staticmethod
+    def threshold_for(agent: Optional[str]) -> Optional[float]:
+        """The agent's similarity threshold, None when it hasn't opted in"""
+        return settings.semantic_cache_thresholds.get(agent or "")
+    
+    @classmethod
+    def enabled_for(cls, agent: Optional[str]) -> bool:
+        return settings.enable_semantic_cache and cls.threshold_for(agent) is not None
+    
+    def _lookup(self, prompt: str, scope: str) -> List[SemanticMatch]:
+        collection = self._get_collection()
+        result = collection.query(query_texts=[normalize_prompt(prompt)], n_results=LOOKUP_CANDIDATES,
+                                  where={"scope": scope})
+        if not result["ids"] or not result["ids"][0]:
+            return []
+        return [
+            SemanticMatch(key, 1.0 - distance, document)
+            for key, distance, document in zip(result["ids"][0], result["distances"][0], result["documents"][0])
+        ]
+    
+    def _add(self, key: str, prompt: str, scope: str, agent: Optional[str]):
+        self._get_collection().upsert(
+            ids=[key],
+            documents=[normalize_prompt(prompt)],
+            metadatas=[{"scope": scope, "agent": agent or "", "created_at": time.time()}],
+        )
+    
+    def _delete(self, keys: List[str]):
+        self._get_collection().delete(ids=keys)
+    
+    async def lookup(self, prompt: str, scope: str, agent: Optional[str] = None) -> List[SemanticMatch]:
+        """Nearest past prompts in scope that clear the agent's similarity threshold, closest first"""
+        threshold = self.threshold_for(agent)
+        if threshold is None:
+            return []
+        try:
+            matches = await asyncio.to_thread(self._lookup, prompt, scope)
+        except Exception as e:
+            logger.warning(f"Semantic cache lookup failed: {e}")
+            return []
+        return [match for match in matches if match.similarity >= threshold]
+    
+    async def add(self, key: str, prompt: str, scope: str, agent: Optional[str] = None):
+        """Index an answered prompt under its prompt cache key"""
+        try:
+            await asyncio.to_thread(self._add, key, prompt, scope, agent)
+        except Exception as e:
+            logger.warning(f"Semantic cache add failed: {e}")
+    
+    async def delete(self, keys: Iterable[str]):
+        """Drop prompts whose answers left the prompt cache"""
+        keys = list(keys)
+        if not keys:
+            return
+        try:
+            await asyncio.to_thread(self._delete, keys)
+        except Exception as e:
+            logger.warning(f"Semantic cache delete failed: {e}")
+
+
+# Global semantic cache instance
+_semantic_cache: Optional[SemanticCache] = None
+
+
+def get_semantic_cache() -> SemanticCache:
+    """Get or create the global semantic cache"""
+    global _semantic_cache
+    if _semantic_cache is None:
+        _semantic_cache = SemanticCache()
+    return _semantic_cache
@@ -2,7 +2,7 @@
 Application configuration management
 """
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, List, Optional
 from functools import lru_cache
 
 
@@ -27,6 +27,22 @@ class Settings(BaseSettings):
     openai_api_key: Optional[str] = None
     anthropic_api_key: Optional[str] = None
     
+    # LLM Client
+    llm_timeout_seconds: float = 60.0
+    llm_max_retries: int = 2
+    llm_max_inflight_anthropic: int = 8
+    llm_max_inflight_openai: int = 8
+    prompt_batch_max_items: int = 20
+    prompt_batch_window_ms: int = 50
+    prompt_batch_tokens_per_item: int = 150
+    workflow_stage_timeout_seconds: float = 30.0
+    workflow_stage_timeouts: Dict[str, float] = {
+        "market_analysis": 10.0,
+        "rehab_estimate": 20.0,
+        "financing": 10.0,
+        "contract": 30.0,
+    }
+    
     # Third-party Integrations
     docusign_api_key: Optional[str] = None
     docusign_account_id: Optional[str] = None
@@ -44,12 +60,104 @@ class Settings(BaseSettings):
     min_lead_score_threshold: int = 65
     wholesale_fee_percentage: float = 6.0
     default_offer_discount_percent: int = 30
+    offer_scenario_max_cells: int = 250_000
+    
+    # Lead Scoring
+    enable_learned_lead_scoring: bool = True
+    lead_scoring_model_path: str = "models/lead_scoring.npz"
+    enable_lead_rescoring: bool = True
+    lead_rescoring_chunk_size: int = 500
+    lead_rescoring_interval_minutes: int = 60
+    lead_rescoring_aging_interval_hours: int = 24  # full pass so listing time ages
+    outreach_lease_seconds: int = 900
+    outreach_contact_cooldown_hours: float = 24.0
+    
+    # Buyer Matching
+    buyer_match_chunk_cells: int = 1_000_000  # property x buyer cells scored per chunk
+    reverse_match_candidate_limit: int = 2000  # per index lookup
+    reverse_match_notify_top_n: int = 10
+    buyer_snapshot_refresh_seconds: int = 30
+    use_mock_buyers: bool = False  # dev/tests: match demo buyers until a snapshot loads
+    enable_buyer_preferences: bool = True
+    buyer_preference_weight: float = 0.3  # max share of the score from deal history
+    buyer_preference_prior_deals: float = 3.0  # deals before a buyer gets half that weight
+    buyer_preference_interval_minutes: int = 360
+    
+    # Buyer Notifications
+    notification_batch_size: int = 500
+    notification_batch_window_ms: int = 200
+    notification_email_rate_per_second: float = 100.0
+    notification_sms_rate_per_second: float = 10.0
+    notification_dedup_hours: float = 24.0
+    notification_status_max_entries: int = 50000
+    default_notification_frequency: str = "instant"  # instant, digest (buyers opt in to digests)
+    notification_digest_window_minutes: int = 60
+    notification_digest_max_items: int = 10  # listed per digest; the rest are counted
+    
+    # Comparable Sales
+    comps_cell_degrees: float = 0.01  # grid cell size (~0.7 mi)
+    comps_k: int = 6
+    comps_max_radius_miles: float = 2.0
+    comps_max_age_days: int = 365
+    comps_sqft_tolerance: float = 0.25
+    comps_recency_half_life_days: float = 180.0
+    
+    # Market Statistics
+    market_stats_window_days: int = 365
+    market_stats_min_samples: int = 5  # sales before a neighborhood is used over its ZIP
+    market_stats_refresh_minutes: int = 15
+    market_neighborhood_cell_degrees: float = 0.01
+    market_rent_to_price_ratio: float = 0.008  # monthly rent estimate when a ZIP has no rents
+    market_operating_expense_ratio: float = 0.4
+    market_trend_threshold_pct: float = 3.0  # annual change that counts as appreciating/declining
+    
+    # Financing
+    lender_catalog_path: Optional[str] = None  # defaults to app/data/lenders.json
+    lender_match_limit: int = 5
+    
+    # Rehab Estimates
+    rehab_cost_table_path: Optional[str] = None  # defaults to app/data/rehab_costs.json
+    rehab_llm_for_uncovered: bool = True  # price issues the tables don't cover with the LLM
+    
+    # Contract Documents
+    contract_template_dir: Optional[str] = None  # defaults to app/templates/contracts
+    contract_output_dir: str = "contracts"
+    contract_render_workers: int = 2
     
     # Scraping Config
     scraper_delay_seconds: float = 2.0
     max_requests_per_minute: int = 60
     user_agent: str = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
     
+    # Headless browser pool (JS-rendered lead sources)
+    browser_pool_max_contexts: int = 4
+    browser_pool_pages_per_context: int = 4
+    browser_context_max_requests: int = 200
+    browser_blocked_resource_types: List[str] = ["image", "media", "font"]
+    browser_navigation_timeout_ms: int = 15000
+    
+    # Caching
+    enable_search_cache: bool = True
+    search_cache_ttl_seconds: int = 300
+    search_cache_stale_ttl_seconds: int = 3600
+    cache_l1_max_entries: int = 1024
+    cache_redis_timeout_seconds: float = 0.25
+    enable_offer_cache: bool = True  # reuse offers for unchanged inputs (offers are always stored)
+    offer_cache_ttl_seconds: int = 7 * 24 * 3600  # offers are valid for 7 days
+    enable_prompt_cache: bool = True
+    prompt_cache_path: str = "cache/prompt_cache.sqlite3"
+    prompt_cache_ttl_seconds: int = 7 * 24 * 3600
+    prompt_cache_max_mb: float = 256.0
+    enable_semantic_cache: bool = False  # reuse answers for near-duplicate prompts (chromadb)
+    semantic_cache_path: str = "cache/semantic"
+    # Opt-in per agent, with its cosine similarity threshold. Agents whose
+    # prompts differ only in a price, address or lead (LeadQualifier batches,
+    # contract amendments, lender comparisons) must never be listed: those
+    # prompts embed as near-identical but need different answers.
+    semantic_cache_thresholds: Dict[str, float] = {
+        "MarketingAutomation": 0.97,
+    }
+    
     # Feature Flags
     enable_lead_scout: bool = True
     enable_offer_generation: bool = True
@@ -1,9 +1,12 @@
 """
 Empty __init__ file for database module
 """
-from .base import Base, SessionLocal, AsyncSessionLocal, get_session, get_async_session, init_db, close_db
+from .base import (
+    Base, SessionLocal, AsyncSessionLocal, get_session, get_async_session, init_db, close_db,
+    advisory_lock
+)
 from .models import (
-    Lead, Offer, LeadInteraction, CashBuyer, Deal, SEOContent, User,
+    Lead, Offer, LeadInteraction, CashBuyer, Deal, SEOContent, User, ComparableSale, JobCheckpoint,
     LeadStatusEnum, PropertyTypeEnum
 )
 
@@ -15,6 +18,7 @@ __all__ = [
     "get_async_session",
     "init_db",
     "close_db",
+    "advisory_lock",
     "Lead",
     "Offer",
     "LeadInteraction",
@@ -22,6 +26,8 @@ __all__ = [
     "Deal",
     "SEOContent",
     "User",
+    "ComparableSale",
+    "JobCheckpoint",
     "LeadStatusEnum",
     "PropertyTypeEnum",
 ]
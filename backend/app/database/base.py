@@ -1,7 +1,10 @@
 """
 Database configuration and session management
 """
-from sqlalchemy import create_engine
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 import logging
@@ -65,6 +68,33 @@ def get_session():
         session.close()
 
 
+@asynccontextmanager
+async def advisory_lock(name: str) -> AsyncIterator[bool]:
+    """
+    Cross-process lock for background jobs (Postgres session advisory lock)
+    
+    Yields True when this process holds the lock and False when another
+    process (e.g. another uvicorn worker) already does. The lock is held on
+    a dedicated connection, so it is released if the process dies. Databases
+    without advisory locks always grant it.
+    """
+    if async_engine.dialect.name != "postgresql":
+        yield True
+        return
+    
+    async with async_engine.connect() as conn:
+        acquired = (await conn.execute(
+            text("SELECT pg_try_advisory_lock(hashtext(:name))"), {"name": name}
+        )).scalar()
+        await conn.commit()
+        try:
+            yield bool(acquired)
+        finally:
+            if acquired:
+                await conn.execute(text("SELECT pg_advisory_unlock(hashtext(:name))"), {"name": name})
+                await conn.commit()
+
+
 async def init_db():
     """Initialize database tables"""
     async with async_engine.begin() as conn:
@@ -7,6 +7,7 @@ from sqlalchemy import (
 )
 from sqlalchemy.orm import relationship
 from datetime import datetime
+from typing import Any, Optional
 import enum
 import uuid
 
@@ -33,15 +34,69 @@ class PropertyTypeEnum(str, enum.Enum):
     VACANT = "vacant"
     MOBILE_HOME = "mobile_home"
     OTHER = "other"
+    
+    @classmethod
+    def parse(cls, value: Any, strict: bool = False, aliases: bool = True) -> Optional["PropertyTypeEnum"]:
+        """
+        Enum member for a free-form property type ("Single Family", "SFR", "duplex")
+        
+        Returns None for a blank value. A value that matches no member (or,
+        with aliases, no alias) is OTHER, or None when strict.
+        """
+        if isinstance(value, cls):
+            return value
+        key = str(value or "").strip().lower().replace("-", "_").replace(" ", "_")
+        if not key:
+            return None
+        if aliases:
+            key = PROPERTY_TYPE_ALIASES.get(key, key)
+        try:
+            return cls(key)
+        except ValueError:
+            return None if strict else cls.OTHER
+
+
+# Common spellings of property types in listings and buyer preferences
+PROPERTY_TYPE_ALIASES = {
+    "sfr": "single_family",
+    "sfh": "single_family",
+    "house": "single_family",
+    "single_family_home": "single_family",
+    "single_family_residence": "single_family",
+    "townhouse": "single_family",
+    "townhome": "single_family",
+    "condo": "single_family",
+    "mfr": "multi_family",
+    "multifamily": "multi_family",
+    "duplex": "multi_family",
+    "triplex": "multi_family",
+    "fourplex": "multi_family",
+    "quadplex": "multi_family",
+    "apartment": "multi_family",
+    "apartments": "multi_family",
+    "land": "vacant",
+    "lot": "vacant",
+    "vacant_land": "vacant",
+    "mobile": "mobile_home",
+    "manufactured": "mobile_home",
+    "manufactured_home": "mobile_home",
+    "retail": "commercial",
+    "office": "commercial",
+    "industrial": "commercial",
+}
 
 
 class Lead(Base):
     """Property/Seller Lead Model"""
     __tablename__ = "leads"
     __table_args__ = (
-        Index('idx_status', 'status'),
+        Index('idx_status', 'lead_status'),
         Index('idx_score', 'lead_score'),
         Index('idx_created', 'created_at'),
+        # Reverse matching lookups (state / type / value band)
+        Index('idx_lead_state_arv', 'state', 'estimated_after_repair_value'),
+        Index('idx_lead_state_type', 'state', 'property_type'),
+        Index('idx_lead_arv', 'estimated_after_repair_value'),
     )
     
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
@@ -52,6 +107,8 @@ class Lead(Base):
     state = Column(String(2), nullable=False)
     zip_code = Column(String(10), nullable=False)
     county = Column(String(100))
+    latitude = Column(Float)
+    longitude = Column(Float)
     
     # Property details
     property_type = Column(Enum(PropertyTypeEnum), default=PropertyTypeEnum.SINGLE_FAMILY)
@@ -72,9 +129,15 @@ class Lead(Base):
     seller_email = Column(String(255))
     seller_name = Column(String(255))
     seller_motivated = Column(Boolean, default=False)
+    listing_time_days = Column(Integer)  # Days on market when the lead was found
+    vacancy_duration_months = Column(Integer)
+    years_delinquent = Column(Integer)  # Years of unpaid property tax
+    tax_lien_amount = Column(Float)
     
     # Lead scoring
     lead_score = Column(Float, default=0.0)  # 0-100
+    scoring_model_version = Column(String(50))  # "heuristic-v1", "logreg-<trained_at>"
+    score_inputs_hash = Column(String(64))  # Fingerprint of scorer version + inputs
     lead_status = Column(Enum(LeadStatusEnum), default=LeadStatusEnum.NEW)
     
     # Source information
@@ -160,6 +223,11 @@ class LeadInteraction(Base):
 class CashBuyer(Base):
     """Cash buyer/investor profile"""
     __tablename__ = "cash_buyers"
+    __table_args__ = (
+        # Change feed for the in-memory buyer snapshot
+        Index('idx_buyer_updated', 'updated_at'),
+        Index('idx_buyer_activity', 'last_activity'),
+    )
     
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     
@@ -179,11 +247,13 @@ class CashBuyer(Base):
     # Activity tracking
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     last_activity = Column(DateTime)
     
     # Contact preferences
     auto_notify = Column(Boolean, default=True)
     notification_method = Column(String(50), default="email")  # email, sms, both
+    notification_frequency = Column(String(20))  # instant, digest (None = settings default)
     
     def __repr__(self):
         return f"<CashBuyer {self.name}>"
@@ -271,3 +341,55 @@ class User(Base):
     
     def __repr__(self):
         return f"<User {self.email}>"
+
+
+class ComparableSale(Base):
+    """Closed sale used as a comparable for ARV estimates"""
+    __tablename__ = "comparable_sales"
+    __table_args__ = (
+        Index('idx_comp_location', 'latitude', 'longitude'),
+        Index('idx_comp_sale_date', 'sale_date'),
+        Index('idx_comp_zip_sale_date', 'zip_code', 'sale_date'),
+    )
+    
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    
+    # Location
+    address = Column(String(255), nullable=False)
+    city = Column(String(100))
+    state = Column(String(2))
+    zip_code = Column(String(10))
+    latitude = Column(Float, nullable=False)
+    longitude = Column(Float, nullable=False)
+    
+    # Property details
+    property_type = Column(String(50))
+    square_feet = Column(Integer)
+    bedrooms = Column(Integer)
+    bathrooms = Column(Float)
+    
+    # Sale
+    sale_price = Column(Float, nullable=False)
+    sale_date = Column(DateTime)
+    monthly_rent = Column(Float)  # Rent, when the comp was also listed for lease
+    data_source = Column(String(100))  # "MLS", "County Records", etc.
+    external_id = Column(String(255), unique=True, nullable=True)
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<ComparableSale {self.address}: ${self.sale_price}>"
+
+
+class JobCheckpoint(Base):
+    """Progress of resumable background jobs"""
+    __tablename__ = "job_checkpoints"
+    
+    job_name = Column(String(100), primary_key=True)
+    cursor = Column(String(255))  # Last processed key; NULL when no pass is in progress
+    started_at = Column(DateTime)
+    completed_at = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<JobCheckpoint {self.job_name} @ {self.cursor}>"
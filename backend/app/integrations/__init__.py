@@ -9,6 +9,7 @@ from .third_party import (
     AFIIntegration,
     IntegrationManager
 )
+from .browser_pool import BrowserPool, get_browser_pool, close_browser_pool
 
 __all__ = [
     "DocuSignIntegration",
@@ -16,5 +17,8 @@ __all__ = [
     "SendGridIntegration",
     "ZillowIntegration",
     "AFIIntegration",
-    "IntegrationManager"
+    "IntegrationManager",
+    "BrowserPool",
+    "get_browser_pool",
+    "close_browser_pool",
 ]
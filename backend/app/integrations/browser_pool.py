@@ -0,0 +1,208 @@
+"""
+Pooled headless browser sessions for JavaScript-rendered lead sources
+"""
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional
+
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page, Playwright, Route
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class _PooledContext:
+    """A long-lived browser context and its recycled pages"""
+    
+    def __init__(self, context: BrowserContext):
+        self.context = context
+        self.idle_pages: List[Page] = []
+        self.leased = 0
+        self.requests_served = 0
+        self.retiring = False
+
+
+class BrowserPool:
+    """
+    Manages one headless Chromium with a fixed set of long-lived contexts.
+    
+    - Pages are leased, reset to about:blank and reused instead of reopened
+    - Each context is retired after `max_requests_per_context` fetches so
+      cookies, caches and leaked memory don't accumulate
+    - Images, media and fonts are blocked at the network layer
+    """
+    
+    def __init__(self, max_contexts: Optional[int] = None,
+                 pages_per_context: Optional[int] = None,
+                 max_requests_per_context: Optional[int] = None,
+                 blocked_resource_types: Optional[List[str]] = None):
+        self.max_contexts = max_contexts or settings.browser_pool_max_contexts
+        self.pages_per_context = pages_per_context or settings.browser_pool_pages_per_context
+        self.max_requests_per_context = max_requests_per_context or settings.browser_context_max_requests
+        self.blocked_resource_types = set(
+            blocked_resource_types if blocked_resource_types is not None
+            else settings.browser_blocked_resource_types
+        )
+        
+        self._playwright: Optional[Playwright] = None
+        self._browser: Optional[Browser] = None
+        self._contexts: List[_PooledContext] = []
+        self._lock = asyncio.Lock()
+        self._slots = asyncio.Semaphore(self.max_contexts * self.pages_per_context)
+    
+    @property
+    def is_running(self) -> bool:
+        return self._browser is not None
+    
+    async def start(self):
+        """Launch the shared browser (idempotent)"""
+        if self._browser is not None:
+            return
+        self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.launch(headless=True)
+        logger.info(f"Browser pool started: {self.max_contexts} contexts x "
+                    f"{self.pages_per_context} pages")
+    
+    async def close(self):
+        """Close every context and the browser"""
+        async with self._lock:
+            for pooled in self._contexts:
+                await self._close_context(pooled)
+            self._contexts = []
+        if self._browser is not None:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+        logger.info("Browser pool closed")
+    
+    async def _block_assets(self, route: Route):
+        if route.request.resource_type in self.blocked_resource_types:
+            await route.abort()
+        else:
+            await route.continue_()
+    
+    async def _new_context(self) -> _PooledContext:
+        context = await self._browser.new_context(
+            user_agent=settings.user_agent,
+            java_script_enabled=True,
+        )
+        context.set_default_navigation_timeout(settings.browser_navigation_timeout_ms)
+        if self.blocked_resource_types:
+            await context.route("**/*", self._block_assets)
+        pooled = _PooledContext(context)
+        self._contexts.append(pooled)
+        return pooled
+    
+    async def _close_context(self, pooled: _PooledContext):
+        try:
+            await pooled.context.close()
+        except Exception as e:
+            logger.warning(f"Failed to close browser context: {e}")
+    
+    async def _checkout(self) -> tuple:
+        """Pick the least-loaded usable context and hand out one of its pages"""
+        async with self._lock:
+            candidates = [
+                c for c in self._contexts
+                if not c.retiring and c.leased < self.pages_per_context
+            ]
+            if candidates:
+                pooled = min(candidates, key=lambda c: c.leased)
+            else:
+                # The slot semaphore caps total leased pages, so this only
+                # happens while the pool warms up or a retiring context
+                # still holds pages - open a replacement alongside it
+                pooled = await self._new_context()
+            
+            pooled.leased += 1
+            pooled.requests_served += 1
+            if pooled.requests_served >= self.max_requests_per_context:
+                pooled.retiring = True
+            page = pooled.idle_pages.pop() if pooled.idle_pages else None
+        
+        if page is None:
+            page = await pooled.context.new_page()
+        return pooled, page
+    
+    async def _checkin(self, pooled: _PooledContext, page: Page, healthy: bool):
+        """Recycle a page, retiring its context once the request cap is hit"""
+        if healthy and not pooled.retiring and not page.is_closed():
+            try:
+                await page.goto("about:blank")
+            except Exception:
+                healthy = False
+        
+        async with self._lock:
+            pooled.leased -= 1
+            if healthy and not pooled.retiring and not page.is_closed():
+                pooled.idle_pages.append(page)
+                return
+            if pooled.retiring and pooled.leased == 0:
+                self._contexts.remove(pooled)
+                retired = pooled
+            else:
+                retired = None
+        
+        if retired is not None:
+            await self._close_context(retired)
+        elif not page.is_closed():
+            await page.close()
+    
+    @asynccontextmanager
+    async def lease_page(self) -> AsyncIterator[Page]:
+        """
+        Lease a page from the pool
+        
+        Usage:
+            async with pool.lease_page() as page:
+                await page.goto(url)
+        """
+        await self._slots.acquire()
+        try:
+            if self._browser is None:
+                async with self._lock:
+                    if self._browser is None:
+                        await self.start()
+            
+            pooled, page = await self._checkout()
+            healthy = True
+            try:
+                yield page
+            except Exception:
+                healthy = False
+                raise
+            finally:
+                await self._checkin(pooled, page, healthy)
+        finally:
+            self._slots.release()
+    
+    async def fetch_html(self, url: str, wait_until: str = "domcontentloaded",
+                         wait_for_selector: Optional[str] = None) -> str:
+        """Render a page and return its HTML"""
+        async with self.lease_page() as page:
+            await page.goto(url, wait_until=wait_until)
+            if wait_for_selector:
+                await page.wait_for_selector(wait_for_selector)
+            return await page.content()
+
+
+# Global browser pool instance
+_browser_pool: Optional[BrowserPool] = None
+
+
+def get_browser_pool() -> BrowserPool:
+    """Get or create the global browser pool"""
+    global _browser_pool
+    if _browser_pool is None:
+        _browser_pool = BrowserPool()
+    return _browser_pool
+
+
+async def close_browser_pool():
+    """Close the global browser pool if it was started"""
+    if _browser_pool is not None and _browser_pool.is_running:
+        await _browser_pool.close()
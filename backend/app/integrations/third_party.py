@@ -1,8 +1,10 @@
 """
 API Integration layer - Third-party service integrations
 """
+import asyncio
 import logging
-from typing import Optional, Dict, Any
+import os
+from typing import Optional, Dict, Any, List
 from abc import ABC, abstractmethod
 
 logger = logging.getLogger(__name__)
@@ -16,17 +18,28 @@ class DocuSignIntegration:
         self.account_id = account_id
     
     async def send_contract(self, recipient_email: str, recipient_name: str, 
-                           document_path: str, contract_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Send a contract for signature via DocuSign"""
-        logger.info(f"Sending contract to {recipient_email}")
+                           document_path: str, contract_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Send a rendered contract PDF for signature via DocuSign
+        
+        Args:
+            document_path: PDF produced by the contract rendering service
+            contract_data: Optional envelope metadata (custom fields)
+        """
+        if not os.path.isfile(document_path):
+            raise FileNotFoundError(f"Contract document not found: {document_path}")
+        logger.info(f"Sending contract {document_path} to {recipient_email}")
         
         # In production, this would integrate with DocuSign SDK
-        # from docusign_esign import ApiClient, EnvelopesApi
+        # from docusign_esign import ApiClient, EnvelopesApi, Document
+        # document = Document(document_base64=base64.b64encode(pdf_bytes).decode(),
+        #                     name=os.path.basename(document_path), file_extension="pdf", document_id="1")
         
         return {
             "envelope_id": "doc_123456",
             "status": "sent",
             "recipient_email": recipient_email,
+            "document_path": document_path,
             "sent_at": "2025-02-13T00:00:00"
         }
     
@@ -64,6 +77,29 @@ class TwilioIntegration:
             "status": "sent"
         }
     
+    async def send_bulk_sms(self, messages: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+        """
+        Send many SMS messages concurrently
+        
+        Args:
+            messages: Dicts with "to" and "message"
+            
+        Returns:
+            One result per message, in order
+        """
+        logger.info(f"Sending {len(messages)} SMS messages")
+        
+        # Twilio has no multi-recipient endpoint for distinct bodies, so the
+        # requests are issued concurrently over one client
+        results = await asyncio.gather(
+            *(self.send_sms(m["to"], m["message"]) for m in messages),
+            return_exceptions=True
+        )
+        return [
+            {"to": m["to"], "status": "failed", "error": str(r)} if isinstance(r, Exception) else r
+            for m, r in zip(messages, results)
+        ]
+    
     async def send_voicemail(self, to_number: str, message: str) -> Dict[str, Any]:
         """Send an automated voicemail"""
         logger.info(f"Sending voicemail to {to_number}")
@@ -97,6 +133,31 @@ class SendGridIntegration:
             "subject": subject,
             "status": "delivered"
         }
+    
+    async def send_bulk_email(self, messages: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+        """
+        Send up to 1,000 emails in a single SendGrid request
+        
+        Args:
+            messages: Dicts with "to", "subject" and "html_content"
+            
+        Returns:
+            One result per message, in order
+        """
+        logger.info(f"Sending {len(messages)} emails in one batch")
+        
+        # In production, this would be one Mail with a personalization per
+        # recipient (each personalization carries its own subject/substitutions)
+        
+        return [
+            {
+                "message_id": f"email_batch_{i}",
+                "to": m["to"],
+                "subject": m["subject"],
+                "status": "delivered"
+            }
+            for i, m in enumerate(messages)
+        ]
 
 
 class ZillowIntegration:
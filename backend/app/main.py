@@ -1,6 +1,7 @@
 """
 Main FastAPI application entry point
 """
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -9,7 +10,14 @@ import logging.config
 
 from .config import settings
 from .database import init_db, close_db
-from .agents import init_agents
+from .agents import init_agents, close_llm_client
+from .cache import close_caches, get_buyer_snapshot_manager
+from .integrations import close_browser_pool
+from .pipelines import LeadRescoringJob, BuyerPreferenceJob, PropertyComparablesPipeline
+from .services import (
+    get_outreach_queue, get_notification_queue, get_contract_renderer, get_market_stats, get_lender_catalog,
+    get_rehab_cost_model
+)
 from .api import leads, offers, buyers, deals, seo, health
 
 # Configure logging
@@ -19,6 +27,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Long-running background jobs started at startup
+background_tasks = []
+
 # Create FastAPI application
 app = FastAPI(
     title=settings.app_name,
@@ -66,6 +77,66 @@ async def startup_event():
     except Exception as e:
         logger.error(f"❌ Agent initialization failed: {e}")
     
+    # Build the outreach queue from stored leads
+    try:
+        await get_outreach_queue().rebuild()
+        logger.info("✅ Outreach queue built")
+    except Exception as e:
+        logger.error(f"❌ Outreach queue build failed: {e}")
+    
+    # Load the shared buyer snapshot used by BuyerMatcherAgent
+    try:
+        await get_buyer_snapshot_manager().load()
+        logger.info("✅ Buyer snapshot loaded")
+    except Exception as e:
+        logger.error(f"❌ Buyer snapshot load failed: {e}")
+    
+    # Build the comparable sales index used for ARV estimates
+    try:
+        await PropertyComparablesPipeline().load_index()
+        logger.info("✅ Comps index built")
+    except Exception as e:
+        logger.error(f"❌ Comps index build failed: {e}")
+    
+    # Precompute per-ZIP market statistics for DataAnalystAgent
+    try:
+        await get_market_stats().load()
+        logger.info("✅ Market stats built")
+    except Exception as e:
+        logger.error(f"❌ Market stats build failed: {e}")
+    
+    # Load the lender catalog and rehab cost tables used by the advanced agents
+    try:
+        get_lender_catalog()
+        logger.info("✅ Lender catalog loaded")
+    except Exception as e:
+        logger.error(f"❌ Lender catalog load failed: {e}")
+    
+    try:
+        get_rehab_cost_model()
+        logger.info("✅ Rehab cost tables loaded")
+    except Exception as e:
+        logger.error(f"❌ Rehab cost table load failed: {e}")
+    
+    # Start background jobs
+    if settings.enable_lead_rescoring:
+        background_tasks.append(asyncio.create_task(LeadRescoringJob().run_periodically()))
+        logger.info("✅ Lead rescoring job scheduled")
+    
+    background_tasks.append(asyncio.create_task(get_buyer_snapshot_manager().run_periodically()))
+    logger.info("✅ Buyer snapshot refresh scheduled")
+    
+    if settings.enable_buyer_preferences:
+        background_tasks.append(asyncio.create_task(BuyerPreferenceJob().run_periodically()))
+        logger.info("✅ Buyer preference learning scheduled")
+    
+    background_tasks.append(asyncio.create_task(get_market_stats().run_periodically()))
+    logger.info("✅ Market stats refresh scheduled")
+    
+    background_tasks.append(asyncio.create_task(get_notification_queue().run_worker()))
+    background_tasks.append(asyncio.create_task(get_notification_queue().digests.run()))
+    logger.info("✅ Buyer notification worker and digest scheduler started")
+    
     logger.info("🎯 Application ready for business!")
 
 
@@ -73,12 +144,28 @@ async def startup_event():
 async def shutdown_event():
     """Clean up on shutdown"""
     logger.info("🛑 Shutting down application...")
+    for task in background_tasks:
+        task.cancel()
     try:
         from .database import close_db
         await close_db()
         logger.info("✅ Database connections closed")
     except Exception as e:
         logger.error(f"❌ Database cleanup failed: {e}")
+    try:
+        await close_browser_pool()
+    except Exception as e:
+        logger.error(f"❌ Browser pool cleanup failed: {e}")
+    get_contract_renderer().close()
+    try:
+        await close_llm_client()
+    except Exception as e:
+        logger.error(f"❌ LLM client cleanup failed: {e}")
+    try:
+        await close_caches()
+        logger.info("✅ Cache connections closed")
+    except Exception as e:
+        logger.error(f"❌ Cache cleanup failed: {e}")
     logger.info("Goodbye!")
 
 
@@ -8,11 +8,15 @@ from .data_ingestion import (
     CashBuyerPipeline,
     DataPipelineOrchestrator
 )
+from .lead_rescoring import LeadRescoringJob
+from .buyer_preferences import BuyerPreferenceJob
 
 __all__ = [
     "FSBODataPipeline",
     "TaxDelinquentPipeline",
     "PropertyComparablesPipeline",
     "CashBuyerPipeline",
-    "DataPipelineOrchestrator"
+    "DataPipelineOrchestrator",
+    "LeadRescoringJob",
+    "BuyerPreferenceJob",
 ]
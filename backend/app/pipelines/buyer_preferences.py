@@ -0,0 +1,76 @@
+"""
+Periodic job learning buyer preference vectors from closed deals
+"""
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+from sqlalchemy import select
+
+from ..cache import get_buyer_snapshot_manager
+from ..config import settings
+from ..database import AsyncSessionLocal, Deal, Lead
+from ..scoring import build_preference_vectors
+
+logger = logging.getLogger(__name__)
+
+
+class BuyerPreferenceJob:
+    """
+    Rebuilds every buyer's preference vector from their closed deals
+    
+    Vectors cover price band, property type, state and repair level of the
+    properties each buyer actually bought, and are swapped into the shared
+    buyer snapshot, where BuyerMatcherAgent blends them into match scores.
+    """
+    
+    async def run(self) -> Dict[str, Any]:
+        """
+        Run one pass
+        
+        Returns:
+            Stats for the pass
+        """
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(
+                    Deal.buyer_id,
+                    Deal.sale_price,
+                    Lead.state,
+                    Lead.property_type,
+                    Lead.estimated_after_repair_value,
+                    Lead.estimated_repair_cost,
+                )
+                .join(Lead, Deal.lead_id == Lead.id)
+                .where(Deal.status == "closed", Deal.buyer_id.isnot(None))
+            )
+            rows = result.all()
+        
+        deals = [
+            {
+                "buyer_id": row.buyer_id,
+                "state": row.state,
+                "property_type": getattr(row.property_type, "value", row.property_type),
+                "estimated_after_repair_value": row.estimated_after_repair_value or row.sale_price or 0,
+                "estimated_repair_cost": row.estimated_repair_cost,
+            }
+            for row in rows
+        ]
+        vectors = build_preference_vectors(deals)
+        await get_buyer_snapshot_manager().set_preference_vectors(vectors)
+        
+        logger.info(f"Buyer preferences learned from {len(deals)} closed deals "
+                    f"for {len(vectors)} buyers")
+        return {"closed_deals": len(deals), "buyers": len(vectors)}
+    
+    async def run_periodically(self, interval_minutes: Optional[int] = None):
+        """Run a pass every interval until cancelled"""
+        interval = (interval_minutes or settings.buyer_preference_interval_minutes) * 60
+        while True:
+            try:
+                await self.run()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Buyer preference pass failed: {e}", exc_info=True)
+            await asyncio.sleep(interval)
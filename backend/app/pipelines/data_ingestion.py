@@ -3,9 +3,14 @@ Data ingestion pipelines for various real estate data sources
 """
 import logging
 import asyncio
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from datetime import datetime
 
+from sqlalchemy import select
+
+from ..agents.comps_index import CompsIndex, set_comps_index
+from ..database import AsyncSessionLocal, ComparableSale
+
 logger = logging.getLogger(__name__)
 
 
@@ -115,11 +120,66 @@ class PropertyComparablesPipeline:
         
         return []
     
-    async def calculate_arv(self, comps: List[Dict[str, Any]]) -> float:
-        """Calculate After Repair Value based on comparables"""
+    async def load(self, sales: List[Dict[str, Any]]) -> int:
+        """
+        Store comparable sales and rebuild the comps index
+        
+        Args:
+            sales: ComparableSale fields (latitude, longitude and sale_price required)
+            
+        Returns:
+            Number of sales stored
+        """
+        columns = {c.name for c in ComparableSale.__table__.columns}
+        async with AsyncSessionLocal() as session:
+            for sale in sales:
+                session.add(ComparableSale(**{k: v for k, v in sale.items() if k in columns}))
+            await session.commit()
+        
+        await self.load_index()
+        return len(sales)
+    
+    async def load_index(self) -> CompsIndex:
+        """Build the in-memory comps index from the comparable_sales table"""
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(
+                    ComparableSale.address,
+                    ComparableSale.latitude,
+                    ComparableSale.longitude,
+                    ComparableSale.square_feet,
+                    ComparableSale.bedrooms,
+                    ComparableSale.bathrooms,
+                    ComparableSale.sale_price,
+                    ComparableSale.sale_date,
+                )
+            )
+            sales = [dict(row._mapping) for row in result]
+        
+        index = CompsIndex(sales)
+        set_comps_index(index)
+        logger.info(f"Comps index built with {len(index)} sales")
+        return index
+    
+    async def calculate_arv(self, comps: List[Dict[str, Any]],
+                            subject: Optional[Dict[str, Any]] = None) -> float:
+        """
+        Calculate After Repair Value based on comparables
+        
+        With a subject property (latitude/longitude, optionally square_feet,
+        bedrooms, bathrooms) the comps are indexed and the estimate is the
+        distance/recency/similarity weighted, size-adjusted ARV; otherwise
+        the comps are averaged.
+        """
         if not comps:
             return 0
         
+        if subject is not None:
+            sales = [{**c, "sale_price": c.get("sale_price", c.get("price"))} for c in comps]
+            estimate = CompsIndex(sales).estimate_arv(subject, k=len(sales))
+            if estimate is not None:
+                return estimate["arv"]
+        
         total_price = sum(c.get("price", 0) for c in comps)
         avg_price = total_price / len(comps)
         
@@ -0,0 +1,205 @@
+"""
+Incremental background rescoring of stored leads
+"""
+import asyncio
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import select, update
+
+from ..config import settings
+from ..database import AsyncSessionLocal, JobCheckpoint, Lead, LeadStatusEnum, advisory_lock
+from ..scoring import get_lead_scorer, lead_row_to_dict
+from ..services.outreach_queue import get_outreach_queue
+
+logger = logging.getLogger(__name__)
+
+# Leads in these statuses are finished and never rescored
+FINAL_STATUSES = [LeadStatusEnum.CLOSED, LeadStatusEnum.REJECTED, LeadStatusEnum.EXPIRED]
+
+# Only the columns the scorer reads are loaded
+SCORING_COLUMNS = [
+    Lead.id,
+    Lead.data_source,
+    Lead.property_type,
+    Lead.market_value,
+    Lead.estimated_after_repair_value,
+    Lead.tax_assessed_value,
+    Lead.estimated_repair_cost,
+    Lead.listing_time_days,
+    Lead.vacancy_duration_months,
+    Lead.years_delinquent,
+    Lead.tax_lien_amount,
+    Lead.seller_phone,
+    Lead.seller_email,
+    Lead.created_at,
+    Lead.lead_score,
+    Lead.score_inputs_hash,
+]
+
+
+def score_inputs_hash(scorer_version: str, lead_input: Dict[str, Any]) -> str:
+    """
+    Fingerprint of a lead's stored scoring inputs and the scorer version
+    
+    lead_input must not be aged: time-derived inputs change every day for
+    every lead, so aging is handled by the periodic full pass instead.
+    """
+    payload = json.dumps([scorer_version, lead_input], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class LeadRescoringJob:
+    """
+    Walks the leads table in primary-key order and rescores stale rows
+    
+    - Keyset pagination (id > cursor ORDER BY id LIMIT n) keeps every chunk
+      query an index range scan regardless of table size
+    - A row is rescored only when the fingerprint of its stored scoring
+      inputs and scorer version differs from the stored one
+    - Listing time still ages, so every lead_rescoring_aging_interval_hours
+      a full pass rescores every open lead regardless of fingerprint
+    - Changed scores are written back with one bulk UPDATE per chunk
+    - The cursor is committed with each chunk, so an interrupted pass
+      resumes where it stopped
+    - Passes run under a database advisory lock, so only one worker does
+      the work when several start the job
+    """
+    
+    JOB_NAME = "lead_rescoring"
+    AGING_JOB_NAME = "lead_rescoring_aging"
+    
+    def __init__(self, chunk_size: Optional[int] = None):
+        self.chunk_size = chunk_size or settings.lead_rescoring_chunk_size
+    
+    async def run(self, rescore_all: bool = False) -> Dict[str, int]:
+        """
+        Run (or resume) one full pass over the leads table
+        
+        Args:
+            rescore_all: Rescore every open lead (the aging pass), not just
+                those whose inputs changed
+        
+        Returns:
+            Counts of rows scanned and rescored; skipped=1 when another
+            worker holds the job lock
+        """
+        async with advisory_lock(self.JOB_NAME) as acquired:
+            if not acquired:
+                logger.info("Lead rescoring is running in another worker; skipping this pass")
+                return {"scanned": 0, "rescored": 0, "chunks": 0, "skipped": 1}
+            job_name = self.AGING_JOB_NAME if rescore_all else self.JOB_NAME
+            return await self._run(job_name, rescore_all)
+    
+    async def _run(self, job_name: str, rescore_all: bool) -> Dict[str, int]:
+        scorer = get_lead_scorer()
+        stats = {"scanned": 0, "rescored": 0, "chunks": 0}
+        
+        async with AsyncSessionLocal() as session:
+            checkpoint = await session.get(JobCheckpoint, job_name)
+            if checkpoint is None:
+                checkpoint = JobCheckpoint(job_name=job_name)
+                session.add(checkpoint)
+            if checkpoint.cursor is None:
+                checkpoint.started_at = datetime.utcnow()
+            else:
+                logger.info(f"Resuming {job_name} after id {checkpoint.cursor}")
+            await session.commit()
+            cursor = checkpoint.cursor
+        
+        while True:
+            async with AsyncSessionLocal() as session:
+                query = select(*SCORING_COLUMNS).where(
+                    Lead.lead_status.notin_(FINAL_STATUSES)
+                ).order_by(Lead.id).limit(self.chunk_size)
+                if cursor is not None:
+                    query = query.where(Lead.id > cursor)
+                
+                rows = (await session.execute(query)).all()
+                if not rows:
+                    checkpoint = await session.get(JobCheckpoint, job_name)
+                    checkpoint.cursor = None
+                    checkpoint.completed_at = datetime.utcnow()
+                    await session.commit()
+                    break
+                
+                changes = self._rescore_chunk(rows, scorer, rescore_all)
+                if changes:
+                    await session.execute(update(Lead), changes)
+                
+                cursor = rows[-1].id
+                checkpoint = await session.get(JobCheckpoint, job_name)
+                checkpoint.cursor = cursor
+                await session.commit()
+            
+            # Only re-prioritize leads whose score moved (most don't on an aging pass)
+            previous_scores = {row.id: row.lead_score for row in rows}
+            queue = get_outreach_queue()
+            for change in changes:
+                if change["lead_score"] != previous_scores[change["id"]]:
+                    queue.update_score(change["id"], change["lead_score"])
+            
+            stats["scanned"] += len(rows)
+            stats["rescored"] += len(changes)
+            stats["chunks"] += 1
+        
+        logger.info(f"{job_name} pass complete: {stats['rescored']} of "
+                    f"{stats['scanned']} leads rescored ({scorer.version})")
+        return stats
+    
+    async def aging_due(self) -> bool:
+        """Whether the aging pass is in progress or last completed too long ago"""
+        async with AsyncSessionLocal() as session:
+            checkpoint = await session.get(JobCheckpoint, self.AGING_JOB_NAME)
+        if checkpoint is None or checkpoint.cursor is not None or checkpoint.completed_at is None:
+            return True
+        interval = timedelta(hours=settings.lead_rescoring_aging_interval_hours)
+        return datetime.utcnow() - checkpoint.completed_at >= interval
+    
+    def _rescore_chunk(self, rows: List[Any], scorer, rescore_all: bool = False) -> List[Dict[str, Any]]:
+        """Score the rows whose inputs changed (or all rows); return bulk UPDATE parameters"""
+        now = datetime.utcnow()
+        stale_ids, stale_inputs, stale_stored, stale_hashes = [], [], [], []
+        
+        for row in rows:
+            # Fingerprint the stored inputs (no aging); score the aged ones
+            stored_input = lead_row_to_dict(row, as_of=row.created_at)
+            inputs_hash = score_inputs_hash(scorer.version, stored_input)
+            if rescore_all or inputs_hash != row.score_inputs_hash:
+                stale_ids.append(row.id)
+                stale_inputs.append(lead_row_to_dict(row, as_of=now))
+                stale_stored.append(stored_input)
+                stale_hashes.append(inputs_hash)
+        
+        if not stale_ids:
+            return []
+        
+        scores, version = scorer.score(stale_inputs)
+        if version != scorer.version:
+            # Model inference fell back to the heuristic for this chunk
+            stale_hashes = [score_inputs_hash(version, i) for i in stale_stored]
+        
+        return [
+            {
+                "id": lead_id,
+                "lead_score": float(score),
+                "scoring_model_version": version,
+                "score_inputs_hash": inputs_hash,
+            }
+            for lead_id, score, inputs_hash in zip(stale_ids, scores, stale_hashes)
+        ]
+    
+    async def run_periodically(self, interval_minutes: Optional[int] = None):
+        """Run a pass every interval until cancelled"""
+        interval = (interval_minutes or settings.lead_rescoring_interval_minutes) * 60
+        while True:
+            try:
+                await self.run(rescore_all=await self.aging_due())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Lead rescoring pass failed: {e}", exc_info=True)
+            await asyncio.sleep(interval)
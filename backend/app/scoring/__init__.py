@@ -0,0 +1,24 @@
+"""
+Scoring module initialization
+"""
+from .heuristic import HEURISTIC_VERSION, heuristic_score, heuristic_score_factors
+from .features import FEATURE_NAMES, build_feature_matrix, lead_row_to_dict
+from .model import LeadScoringModel
+from .scorer import LeadScorer, get_lead_scorer, reload_lead_scorer
+from .buyer_preferences import BuyerPreferences, build_preference_vectors, encode_properties
+
+__all__ = [
+    "HEURISTIC_VERSION",
+    "heuristic_score",
+    "heuristic_score_factors",
+    "FEATURE_NAMES",
+    "build_feature_matrix",
+    "lead_row_to_dict",
+    "LeadScoringModel",
+    "LeadScorer",
+    "get_lead_scorer",
+    "reload_lead_scorer",
+    "BuyerPreferences",
+    "build_preference_vectors",
+    "encode_properties",
+]
@@ -0,0 +1,144 @@
+"""
+Buyer preference vectors learned from closed deal history
+"""
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .features import PROPERTY_TYPES
+from ..database import PropertyTypeEnum
+
+PRICE_BAND_EDGES = [75_000, 125_000, 200_000, 300_000, 500_000, 800_000]
+REPAIR_RATIO_EDGES = [0.05, 0.15, 0.30]  # estimated repairs / ARV
+US_STATES = [
+    "AL", "AK", "AZ", "AR", "CA", "CO", "CT", "DE", "DC", "FL", "GA", "HI", "ID", "IL", "IN", "IA",
+    "KS", "KY", "LA", "ME", "MD", "MA", "MI", "MN", "MS", "MO", "MT", "NE", "NV", "NH", "NJ", "NM",
+    "NY", "NC", "ND", "OH", "OK", "OR", "PA", "RI", "SC", "SD", "TN", "TX", "UT", "VT", "VA", "WA",
+    "WV", "WI", "WY",
+]
+
+# (name, size) of each one-hot block in a preference vector
+BLOCKS = [
+    ("price_band", len(PRICE_BAND_EDGES) + 1),
+    ("property_type", len(PROPERTY_TYPES)),
+    ("state", len(US_STATES)),
+    ("repair_level", len(REPAIR_RATIO_EDGES) + 1),
+]
+BLOCK_OFFSETS = np.cumsum([0] + [size for _, size in BLOCKS])[:-1]
+VECTOR_SIZE = sum(size for _, size in BLOCKS)
+
+_TYPE_INDEX = {t: i for i, t in enumerate(PROPERTY_TYPES)}
+_STATE_INDEX = {s: i for i, s in enumerate(US_STATES)}
+
+
+def property_bins(property_info: Dict[str, Any]) -> List[Optional[int]]:
+    """Bin index within each block (None where the property doesn't say)"""
+    arv = property_info.get("estimated_after_repair_value") or 0
+    repairs = property_info.get("estimated_repair_cost")
+    # "SFR" and "Single Family" land in the single_family bin; unknown types in none
+    property_type = PropertyTypeEnum.parse(property_info.get("property_type"), strict=True)
+    return [
+        int(np.searchsorted(PRICE_BAND_EDGES, arv, side="right")) if arv > 0 else None,
+        _TYPE_INDEX.get(property_type.value) if property_type is not None else None,
+        _STATE_INDEX.get((property_info.get("state") or "").upper()),
+        int(np.searchsorted(REPAIR_RATIO_EDGES, repairs / arv, side="right"))
+        if repairs is not None and arv > 0 else None,
+    ]
+
+
+def encode_properties(properties: Sequence[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    One-hot encode properties in preference-vector layout
+    
+    Returns:
+        (n_properties, VECTOR_SIZE) float32 matrix and the number of blocks
+        each property has a value for
+    """
+    encoded = np.zeros((len(properties), VECTOR_SIZE), dtype=np.float32)
+    present = np.zeros(len(properties), dtype=np.float32)
+    for row, property_info in enumerate(properties):
+        for offset, bin_index in zip(BLOCK_OFFSETS, property_bins(property_info)):
+            if bin_index is not None:
+                encoded[row, offset + bin_index] = 1.0
+                present[row] += 1
+    return encoded, present
+
+
+def build_preference_vectors(deals: Iterable[Dict[str, Any]],
+                             smoothing: float = 1.0) -> Dict[str, Tuple[np.ndarray, int]]:
+    """
+    Per-buyer preference vectors from closed deals
+    
+    Each block of a buyer's vector is the (Laplace-smoothed) share of their
+    closed deals that fell in each bin, so the dot product with a property's
+    one-hot encoding is how typical that property is for the buyer.
+    
+    Args:
+        deals: Dicts with buyer_id plus the property fields property_bins reads
+        smoothing: Pseudo-count added to every bin
+        
+    Returns:
+        buyer_id -> (vector, closed deal count)
+    """
+    counts: Dict[str, np.ndarray] = {}
+    deal_counts: Dict[str, int] = {}
+    for deal in deals:
+        buyer_id = deal["buyer_id"]
+        if buyer_id not in counts:
+            counts[buyer_id] = np.zeros(VECTOR_SIZE, dtype=np.float64)
+            deal_counts[buyer_id] = 0
+        deal_counts[buyer_id] += 1
+        for offset, bin_index in zip(BLOCK_OFFSETS, property_bins(deal)):
+            if bin_index is not None:
+                counts[buyer_id][offset + bin_index] += 1
+    
+    vectors = {}
+    for buyer_id, vector in counts.items():
+        vector = vector.copy()
+        for offset, (_, size) in zip(BLOCK_OFFSETS, BLOCKS):
+            block = vector[offset:offset + size] + smoothing
+            vector[offset:offset + size] = block / block.sum()
+        vectors[buyer_id] = (vector.astype(np.float32), deal_counts[buyer_id])
+    return vectors
+
+
+class BuyerPreferences:
+    """
+    Preference vectors aligned with a buyer list, for blending into match scores
+    
+    A buyer's blend weight grows with their closed deal count:
+    weight * n / (n + prior_deals). Buyers without history keep their
+    declared-preference score unchanged.
+    """
+    
+    def __init__(self, buyers: Sequence[Dict[str, Any]],
+                 vectors: Dict[str, Tuple[np.ndarray, int]],
+                 weight: float, prior_deals: float):
+        self.vectors = np.zeros((len(buyers), VECTOR_SIZE), dtype=np.float32)
+        deal_counts = np.zeros(len(buyers), dtype=np.float64)
+        for position, buyer in enumerate(buyers):
+            learned = vectors.get(buyer.get("id"))
+            if learned is not None:
+                self.vectors[position], deal_counts[position] = learned
+        self.weights = weight * deal_counts / (deal_counts + prior_deals)
+        self.buyers_with_history = int((deal_counts > 0).sum())
+    
+    def affinity(self, encoded: np.ndarray, present: np.ndarray,
+                 positions: Optional[np.ndarray] = None) -> np.ndarray:
+        """(n_properties, n_buyers) affinity in [0, 1] via one matrix product"""
+        vectors = self.vectors if positions is None else self.vectors[positions]
+        return (encoded @ vectors.T) / np.maximum(present, 1)[:, None]
+    
+    def blend(self, scores: np.ndarray, properties: Sequence[Dict[str, Any]],
+              positions: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Blend declared-preference scores with learned affinity
+        
+        Args:
+            scores: (n_properties, n_buyers) match scores, columns in buyer
+                order or following `positions`
+        """
+        weights = self.weights if positions is None else self.weights[positions]
+        encoded, present = encode_properties(properties)
+        affinity = self.affinity(encoded, present, positions)
+        return (1 - weights) * scores + weights * 100 * affinity
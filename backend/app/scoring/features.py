@@ -0,0 +1,122 @@
+"""
+Feature matrix construction for learned lead scoring
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .heuristic import SOURCE_SCORES
+
+SOURCE_CATEGORIES = list(SOURCE_SCORES)
+PROPERTY_TYPES = ["single_family", "multi_family", "commercial", "vacant", "mobile_home"]
+
+FEATURE_NAMES = (
+    [f"source:{source}" for source in SOURCE_CATEGORIES]
+    + [f"type:{property_type}" for property_type in PROPERTY_TYPES]
+    + [
+        "listing_time_days",
+        "log_estimated_value",
+        "repair_to_value_ratio",
+        "vacancy_duration_months",
+        "equity_ratio",
+        "years_delinquent",
+        "lien_to_value_ratio",
+        "has_phone",
+        "has_email",
+    ]
+)
+
+
+def _column(leads: Sequence[Dict[str, Any]], field: str) -> np.ndarray:
+    """Extract a numeric lead field as a float column (missing -> 0)"""
+    return np.fromiter(
+        (float(lead.get(field) or 0) for lead in leads), dtype=np.float64, count=len(leads)
+    )
+
+
+def _one_hot(values: List[str], categories: List[str]) -> np.ndarray:
+    index = {category: i for i, category in enumerate(categories)}
+    matrix = np.zeros((len(values), len(categories)), dtype=np.float64)
+    rows = [i for i, value in enumerate(values) if value in index]
+    matrix[rows, [index[values[i]] for i in rows]] = 1.0
+    return matrix
+
+
+def build_feature_matrix(leads: Sequence[Dict[str, Any]]) -> np.ndarray:
+    """
+    Build an (n_leads, n_features) matrix from lead dicts
+    
+    Column order follows FEATURE_NAMES. Leads may come from LeadScout sources
+    or from stored rows via lead_row_to_dict.
+    """
+    sources = [lead.get("data_source") or "" for lead in leads]
+    property_types = [
+        getattr(lead.get("property_type"), "value", lead.get("property_type")) or ""
+        for lead in leads
+    ]
+    
+    value = _column(leads, "estimated_value")
+    repair = _column(leads, "estimated_repair_cost")
+    tax_assessed = _column(leads, "tax_assessed_value")
+    lien = _column(leads, "tax_lien_amount")
+    
+    safe_value = np.where(value > 0, value, 1.0)
+    repair_ratio = np.where(value > 0, repair / safe_value, 0.0)
+    lien_ratio = np.where(value > 0, lien / safe_value, 0.0)
+    equity_ratio = np.where(tax_assessed > 0, value / np.where(tax_assessed > 0, tax_assessed, 1.0), 0.0)
+    
+    has_phone = np.fromiter((1.0 if lead.get("seller_phone") else 0.0 for lead in leads),
+                            dtype=np.float64, count=len(leads))
+    has_email = np.fromiter((1.0 if lead.get("seller_email") else 0.0 for lead in leads),
+                            dtype=np.float64, count=len(leads))
+    
+    numeric = np.column_stack([
+        _column(leads, "listing_time_days"),
+        np.log1p(np.maximum(value, 0.0)),
+        repair_ratio,
+        _column(leads, "vacancy_duration_months"),
+        equity_ratio,
+        _column(leads, "years_delinquent"),
+        lien_ratio,
+        has_phone,
+        has_email,
+    ]) if leads else np.zeros((0, 9))
+    
+    return np.hstack([
+        _one_hot(sources, SOURCE_CATEGORIES),
+        _one_hot(property_types, PROPERTY_TYPES),
+        numeric,
+    ])
+
+
+def lead_row_to_dict(lead: Any, as_of: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Map a stored Lead row onto the field names LeadScout sources produce
+    
+    Training and rescoring both build their features here, so a model is
+    trained on exactly the inputs it is later scored with.
+    
+    Args:
+        lead: Lead ORM object or row with the same attribute names
+        as_of: listing_time_days is aged by the days elapsed between the
+            lead's creation and this time (default now)
+    """
+    as_of = as_of or datetime.utcnow()
+    listing_time_days = lead.listing_time_days or 0
+    if lead.created_at is not None:
+        listing_time_days += max((as_of - lead.created_at).days, 0)
+    
+    return {
+        "data_source": lead.data_source,
+        "property_type": getattr(lead.property_type, "value", lead.property_type),
+        "estimated_value": lead.market_value or lead.estimated_after_repair_value or 0,
+        "tax_assessed_value": lead.tax_assessed_value or 0,
+        "estimated_repair_cost": lead.estimated_repair_cost or 0,
+        "listing_time_days": listing_time_days,
+        "vacancy_duration_months": lead.vacancy_duration_months or 0,
+        "years_delinquent": lead.years_delinquent or 0,
+        "tax_lien_amount": lead.tax_lien_amount or 0,
+        "seller_phone": lead.seller_phone,
+        "seller_email": lead.seller_email,
+    }
@@ -0,0 +1,77 @@
+"""
+Rule-based lead scoring (fallback when no learned model is available)
+"""
+from typing import Any, Dict
+
+# Bump whenever the rules or weights below change - stored scores recorded
+# under an older version are picked up by the background rescoring job
+HEURISTIC_VERSION = "heuristic-v1"
+
+# Source scoring (20 points max): Tax delinquent, probate, vacant best
+SOURCE_SCORES = {
+    "Tax Delinquent": 20,
+    "Probate Estate": 18,
+    "Vacant Property List": 18,
+    "FSBO": 15,
+    "Pre-Foreclosure": 18,
+}
+
+
+def heuristic_score(lead: Dict[str, Any]) -> float:
+    """
+    Score a lead based on motivation indicators and property factors
+    
+    Scoring factors:
+    - Data source (20 points max): Tax delinquent, probate, vacant best
+    - Listing age (15 points max): Older listings = more motivated
+    - Price reduction (15 points max)
+    - Property condition (20 points max): Vacant, repair needed = better
+    - Market factors (30 points max): Equity, days on market
+    """
+    score = 0
+    
+    # Source scoring
+    score += SOURCE_SCORES.get(lead.get("data_source", ""), 10)
+    
+    # Listing age (in days)
+    if lead.get("listing_time_days", 0) > 60:
+        score += 15
+    elif lead.get("listing_time_days", 0) > 30:
+        score += 10
+    else:
+        score += 5
+    
+    # Condition indicators
+    if lead.get("data_source") == "Vacant Property List":
+        score += 20
+    elif lead.get("estimated_repair_cost", 0) > 30000:
+        score += 18
+    elif lead.get("vacancy_duration_months", 0) > 6:
+        score += 15
+    
+    # Market factors
+    current_value = lead.get("estimated_value", 0)
+    if current_value > 0:
+        tax_assessed = lead.get("tax_assessed_value", 0)
+        if tax_assessed > 0 and current_value > tax_assessed:
+            equity_ratio = current_value / tax_assessed
+            if equity_ratio > 1.5:
+                score += 20
+            elif equity_ratio > 1.2:
+                score += 15
+            else:
+                score += 10
+        else:
+            score += 10
+    
+    return min(score, 100)  # Cap at 100
+
+
+def heuristic_score_factors(lead: Dict[str, Any]) -> Dict[str, Any]:
+    """Per-factor breakdown reported alongside a lead's score"""
+    return {
+        "source": SOURCE_SCORES.get(lead.get("data_source", ""), 10),
+        "listing_age": min(15, (lead.get("listing_time_days", 0) / 100) * 15),
+        "condition": 15 if lead.get("data_source") == "Vacant Property List" else 10,
+        "market": 20
+    }
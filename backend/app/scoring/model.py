@@ -0,0 +1,119 @@
+"""
+Learned lead scoring model (L2-regularized logistic regression)
+"""
+import json
+import logging
+import os
+from datetime import datetime
+from typing import List, Optional
+
+import numpy as np
+
+from .features import FEATURE_NAMES
+
+logger = logging.getLogger(__name__)
+
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -35.0, 35.0)))
+
+
+class LeadScoringModel:
+    """
+    Logistic regression over standardized lead features
+    
+    Trained offline on leads labelled by whether they produced a closed deal.
+    Scores are calibrated against class-balanced training, so a score of 50
+    means "as likely as not to look like a closed deal" and the existing
+    min_lead_score_threshold keeps its meaning on the 0-100 scale.
+    """
+    
+    def __init__(self, weights: np.ndarray, bias: float, mean: np.ndarray, scale: np.ndarray,
+                 version: str, feature_names: Optional[List[str]] = None):
+        self.weights = weights
+        self.bias = bias
+        self.mean = mean
+        self.scale = scale
+        self.version = version
+        self.feature_names = list(feature_names or FEATURE_NAMES)
+    
+    @classmethod
+    def fit(cls, X: np.ndarray, y: np.ndarray, l2: float = 1.0,
+            max_iterations: int = 50, tolerance: float = 1e-6) -> "LeadScoringModel":
+        """
+        Fit with Newton-Raphson (IRLS) on class-balanced sample weights
+        
+        Args:
+            X: Feature matrix (n_samples, n_features)
+            y: Binary labels (1 = lead closed as a deal)
+            l2: L2 penalty on the (non-bias) weights
+        """
+        y = np.asarray(y, dtype=np.float64)
+        positives = y.sum()
+        if positives == 0 or positives == len(y):
+            raise ValueError("Training data needs both closed and non-closed leads")
+        
+        mean = X.mean(axis=0)
+        scale = X.std(axis=0)
+        scale[scale == 0] = 1.0
+        Z = np.hstack([(X - mean) / scale, np.ones((len(X), 1))])
+        
+        # Weight each class to half of the total mass
+        sample_weight = np.where(y == 1, len(y) / (2 * positives), len(y) / (2 * (len(y) - positives)))
+        
+        penalty = np.full(Z.shape[1], l2)
+        penalty[-1] = 0.0  # don't regularize the bias
+        w = np.zeros(Z.shape[1])
+        
+        for _ in range(max_iterations):
+            p = _sigmoid(Z @ w)
+            gradient = Z.T @ (sample_weight * (p - y)) + penalty * w
+            curvature = sample_weight * p * (1 - p)
+            hessian = (Z * curvature[:, None]).T @ Z + np.diag(penalty) + 1e-9 * np.eye(len(w))
+            step = np.linalg.solve(hessian, gradient)
+            w -= step
+            if np.max(np.abs(step)) < tolerance:
+                break
+        
+        version = f"logreg-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}"
+        return cls(w[:-1], float(w[-1]), mean, scale, version)
+    
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Probability that each lead converts into a closed deal"""
+        return _sigmoid(((X - self.mean) / self.scale) @ self.weights + self.bias)
+    
+    def score(self, X: np.ndarray) -> np.ndarray:
+        """Lead scores on the 0-100 scale"""
+        return np.round(self.predict_proba(X) * 100, 1)
+    
+    def save(self, path: str):
+        """Serialize the model to an .npz file"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.savez(
+            path,
+            weights=self.weights,
+            bias=np.array([self.bias]),
+            mean=self.mean,
+            scale=self.scale,
+            meta=np.array(json.dumps({
+                "version": self.version,
+                "feature_names": self.feature_names,
+            })),
+        )
+        logger.info(f"Lead scoring model {self.version} saved to {path}")
+    
+    @classmethod
+    def load(cls, path: str) -> "LeadScoringModel":
+        """Load a model saved with save()"""
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta["feature_names"] != FEATURE_NAMES:
+                raise ValueError(f"Model at {path} was trained on a different feature set")
+            return cls(
+                weights=data["weights"],
+                bias=float(data["bias"][0]),
+                mean=data["mean"],
+                scale=data["scale"],
+                version=meta["version"],
+                feature_names=meta["feature_names"],
+            )
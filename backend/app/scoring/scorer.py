@@ -0,0 +1,75 @@
+"""
+Batch lead scorer - learned model with heuristic fallback
+"""
+import logging
+import os
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .features import build_feature_matrix
+from .heuristic import HEURISTIC_VERSION, heuristic_score
+from .model import LeadScoringModel
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LeadScorer:
+    """Scores batches of leads, recording which model produced the scores"""
+    
+    def __init__(self, model: Optional[LeadScoringModel] = None):
+        self.model = model
+    
+    @property
+    def version(self) -> str:
+        return self.model.version if self.model is not None else HEURISTIC_VERSION
+    
+    def score(self, leads: Sequence[Dict[str, Any]]) -> Tuple[np.ndarray, str]:
+        """
+        Score leads in one vectorized pass
+        
+        Returns:
+            Tuple of (scores, scorer_version)
+        """
+        if self.model is not None and leads:
+            try:
+                return self.model.score(build_feature_matrix(leads)), self.model.version
+            except Exception as e:
+                logger.error(f"Model {self.model.version} scoring failed, using heuristic: {e}")
+        
+        scores = np.fromiter((heuristic_score(lead) for lead in leads),
+                             dtype=np.float64, count=len(leads))
+        return scores, HEURISTIC_VERSION
+
+
+def _load_model() -> Optional[LeadScoringModel]:
+    path = settings.lead_scoring_model_path
+    if not settings.enable_learned_lead_scoring or not os.path.exists(path):
+        return None
+    try:
+        model = LeadScoringModel.load(path)
+        logger.info(f"Loaded lead scoring model {model.version}")
+        return model
+    except Exception as e:
+        logger.error(f"Failed to load lead scoring model from {path}: {e}")
+        return None
+
+
+# Global scorer instance (model is loaded once per worker)
+_scorer: Optional[LeadScorer] = None
+
+
+def get_lead_scorer() -> LeadScorer:
+    """Get or create the global lead scorer"""
+    global _scorer
+    if _scorer is None:
+        _scorer = LeadScorer(_load_model())
+    return _scorer
+
+
+def reload_lead_scorer() -> LeadScorer:
+    """Reload the model from disk (e.g. after retraining)"""
+    global _scorer
+    _scorer = LeadScorer(_load_model())
+    return _scorer
@@ -0,0 +1,57 @@
+"""
+Offline training for the learned lead scoring model
+
+Usage:
+    python -m app.scoring.train
+"""
+import logging
+from typing import List, Tuple
+
+import numpy as np
+from sqlalchemy import select
+
+from .features import build_feature_matrix, lead_row_to_dict
+from .model import LeadScoringModel
+from ..config import settings
+from ..database import SessionLocal, Lead, Deal
+
+logger = logging.getLogger(__name__)
+
+
+def load_training_data() -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Build (X, y) from leads joined to deals
+    
+    A lead is a positive example when it has at least one closed deal.
+    Features are taken as of the lead's creation, when the decision to
+    pursue it is made: aging every lead to today would give older leads
+    (which have had longer to close) a larger listing time, leaking the
+    label into the feature.
+    """
+    with SessionLocal() as session:
+        closed_lead_ids = set(session.execute(
+            select(Deal.lead_id).where(Deal.status == "closed")
+        ).scalars())
+        
+        leads: List[dict] = []
+        labels: List[int] = []
+        for lead in session.execute(select(Lead)).scalars():
+            leads.append(lead_row_to_dict(lead, as_of=lead.created_at))
+            labels.append(1 if lead.id in closed_lead_ids else 0)
+    
+    return build_feature_matrix(leads), np.array(labels, dtype=np.float64)
+
+
+def train_and_save(path: str = None, l2: float = 1.0) -> LeadScoringModel:
+    """Train a model from the database and serialize it for the workers"""
+    X, y = load_training_data()
+    logger.info(f"Training lead scoring model on {len(y)} leads ({int(y.sum())} closed)")
+    model = LeadScoringModel.fit(X, y, l2=l2)
+    model.save(path or settings.lead_scoring_model_path)
+    return model
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    trained = train_and_save()
+    print(f"Trained {trained.version}")
@@ -1,11 +1,31 @@
 """
 Services module initialization
 """
-from .business_logic import LeadService, OfferService, NegotiationService, SEOService
+from .business_logic import LeadService, OfferService, BuyerService, NegotiationService, SEOService
+from .outreach_queue import OutreachQueue, get_outreach_queue
+from .notifications import NotificationQueue, get_notification_queue
+from .contract_rendering import ContractRenderer, get_contract_renderer, normalize_state
+from .market_stats import MarketStatsEngine, get_market_stats
+from .lender_catalog import LenderCatalog, get_lender_catalog
+from .rehab_costs import RehabCostModel, get_rehab_cost_model
 
 __all__ = [
     "LeadService",
     "OfferService",
+    "BuyerService",
     "NegotiationService",
-    "SEOService"
+    "SEOService",
+    "OutreachQueue",
+    "get_outreach_queue",
+    "NotificationQueue",
+    "get_notification_queue",
+    "ContractRenderer",
+    "get_contract_renderer",
+    "normalize_state",
+    "MarketStatsEngine",
+    "get_market_stats",
+    "LenderCatalog",
+    "get_lender_catalog",
+    "RehabCostModel",
+    "get_rehab_cost_model",
 ]
@@ -2,11 +2,20 @@
 Service layer for business logic - Lead service
 """
 import logging
+import uuid
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 
-from ..database import Lead, LeadStatusEnum, PropertyTypeEnum, AsyncSessionLocal
+from sqlalchemy.exc import IntegrityError
+
+from ..config import settings
+from ..database import Lead, CashBuyer, LeadStatusEnum, PropertyTypeEnum, AsyncSessionLocal
 from ..agents import get_orchestrator
+from ..cache import buyer_row_to_dict, get_buyer_snapshot_manager, get_offer_cache
+from .contract_rendering import format_contract_date, get_contract_renderer
+from .notifications import build_integration_manager, get_notification_queue
+from .outreach_queue import QUEUED_STATUSES, get_outreach_queue
+from .reverse_matching import OPEN_STATUSES, lead_to_property, reverse_match_buyer
 
 logger = logging.getLogger(__name__)
 
@@ -51,18 +60,26 @@ class LeadService:
                 city=lead_data.get("city"),
                 state=lead_data.get("state"),
                 zip_code=lead_data.get("zip_code"),
+                latitude=lead_data.get("latitude"),
+                longitude=lead_data.get("longitude"),
                 property_type=lead_data.get("property_type", PropertyTypeEnum.SINGLE_FAMILY),
                 square_feet=lead_data.get("square_feet"),
                 bedrooms=lead_data.get("bedrooms"),
                 bathrooms=lead_data.get("bathrooms"),
                 year_built=lead_data.get("year_built"),
                 estimated_after_repair_value=lead_data.get("estimated_after_repair_value"),
-                market_value=lead_data.get("market_value"),
+                market_value=lead_data.get("market_value", lead_data.get("estimated_value")),
+                tax_assessed_value=lead_data.get("tax_assessed_value"),
                 estimated_repair_cost=lead_data.get("estimated_repair_cost"),
                 seller_phone=lead_data.get("seller_phone"),
                 seller_email=lead_data.get("seller_email"),
                 seller_name=lead_data.get("seller_name"),
+                listing_time_days=lead_data.get("listing_time_days"),
+                vacancy_duration_months=lead_data.get("vacancy_duration_months"),
+                years_delinquent=lead_data.get("years_delinquent"),
+                tax_lien_amount=lead_data.get("tax_lien_amount"),
                 lead_score=lead_data.get("lead_score", 0.0),
+                scoring_model_version=lead_data.get("scoring_model"),
                 lead_status=LeadStatusEnum.NEW,
                 data_source=lead_data.get("data_source"),
                 mls_id=lead_data.get("mls_id"),
@@ -72,6 +89,7 @@ class LeadService:
             session.add(lead)
             await session.commit()
             await session.refresh(lead)
+            get_outreach_queue().upsert(lead.id, lead.lead_score or 0.0, lead.created_at)
             return lead
     
     @staticmethod
@@ -89,19 +107,43 @@ class LeadService:
                 lead.lead_status = status
                 lead.updated_at = datetime.utcnow()
                 await session.commit()
+                
+                queue = get_outreach_queue()
+                if status in QUEUED_STATUSES:
+                    queue.upsert(lead.id, lead.lead_score or 0.0, lead.created_at, lead.last_contacted)
+                else:
+                    queue.discard(lead.id)
+                return lead
+            return None
+    
+    @staticmethod
+    async def record_contact(lead_id: str) -> Optional[Lead]:
+        """Record that a rep reached out to a lead"""
+        async with AsyncSessionLocal() as session:
+            lead = await session.get(Lead, lead_id)
+            if lead:
+                lead.last_contacted = datetime.utcnow()
+                await session.commit()
+                
+                if lead.lead_status in QUEUED_STATUSES:
+                    get_outreach_queue().upsert(lead.id, lead.lead_score or 0.0,
+                                                last_contacted=lead.last_contacted)
                 return lead
             return None
     
     @staticmethod
-    async def get_qualified_leads(min_score: int = 65, limit: int = 20) -> List[Lead]:
-        """Get leads above minimum quality threshold"""
+    async def get_qualified_leads(min_score: Optional[int] = None, limit: int = 20) -> List[Lead]:
+        """Get leads above minimum quality threshold (defaults to settings.min_lead_score_threshold)"""
+        if min_score is None:
+            min_score = settings.min_lead_score_threshold
+        
         async with AsyncSessionLocal() as session:
             from sqlalchemy import select
             
             query = select(Lead).where(
                 Lead.lead_score >= min_score,
                 Lead.lead_status == LeadStatusEnum.NEW
-            ).limit(limit)
+            ).order_by(Lead.lead_score.desc(), Lead.created_at.desc()).limit(limit)
             
             result = await session.execute(query)
             return result.scalars().all()
@@ -127,6 +169,118 @@ class OfferService:
             logger.error(f"Offer generation failed: {e}")
             return {"error": str(e)}
     
+    @staticmethod
+    async def generate_offers_batch(leads: List[Dict[str, Any]],
+                                    discount_percent: Optional[float] = None,
+                                    wholesale_fee_percentage: Optional[float] = None,
+                                    terms_for: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Price offers for many leads in one vectorized pass"""
+        orchestrator = get_orchestrator()
+        
+        task = {
+            "leads": leads,
+            "discount_percent": discount_percent,
+            "wholesale_fee_percentage": wholesale_fee_percentage,
+            "terms_for": terms_for or []
+        }
+        
+        try:
+            result = await orchestrator.agents["OfferGenerator"].run(task)
+            return result
+        except Exception as e:
+            logger.error(f"Batch offer generation failed: {e}")
+            return {"error": str(e)}
+    
+    @staticmethod
+    async def generate_contract(offer_id: str, state: str, buyer_name: str, seller_name: str,
+                                signer_email: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Render the purchase agreement for a generated offer
+        
+        Args:
+            signer_email: When given, the PDF is sent for signature via DocuSign
+        
+        Returns:
+            Document details (None if the offer is unknown or expired)
+        """
+        offer = await get_offer_cache().get(offer_id)
+        if offer is None:
+            return None
+        
+        # Dated by the offer, so the same offer always renders the same document
+        terms = {**offer["terms"], "state": state, "buyer_name": buyer_name, "seller_name": seller_name,
+                 "contract_date": format_contract_date(offer["created_at"])}
+        document = await get_contract_renderer().render(terms)
+        result = {
+            "offer_id": offer_id,
+            "document_path": document["document_path"],
+            "document_sha256": document["sha256"],
+            "cached": document["cached"],
+            "envelope": None
+        }
+        
+        if signer_email:
+            integrations = build_integration_manager()
+            if integrations.docusign is None:
+                raise RuntimeError("DocuSign is not configured")
+            result["envelope"] = await integrations.docusign.send_contract(
+                signer_email, seller_name, document["document_path"],
+                {"offer_id": offer_id, "document_sha256": document["sha256"]}
+            )
+        return result
+    
+    @staticmethod
+    def offer_scenarios(property_details: Dict[str, Any], ranges: Dict[str, List[float]],
+                        wholesale_fee_percentage: Optional[float] = None) -> Dict[str, Any]:
+        """Evaluate an offer what-if grid in one vectorized pass"""
+        agent = get_orchestrator().agents["OfferGenerator"]
+        grid = agent.scenario_grid(property_details, ranges, wholesale_fee_percentage)
+        return grid.to_dict()
+    
+    @staticmethod
+    async def reprice_pipeline(discount_percent: Optional[float] = None,
+                               wholesale_fee_percentage: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Re-price every open lead (e.g. after a discount or fee change)
+        
+        Only the valuation columns are loaded, and pricing runs as one
+        vectorized batch.
+        """
+        async with AsyncSessionLocal() as session:
+            from sqlalchemy import select
+            
+            result = await session.execute(
+                select(
+                    Lead.id,
+                    Lead.address,
+                    Lead.estimated_after_repair_value,
+                    Lead.estimated_repair_cost,
+                    Lead.estimated_holding_cost,
+                    Lead.latitude,
+                    Lead.longitude,
+                    Lead.square_feet,
+                    Lead.bedrooms,
+                    Lead.bathrooms,
+                ).where(Lead.lead_status.in_(OPEN_STATUSES))
+            )
+            rows = result.all()
+        
+        leads = []
+        for row in rows:
+            details = {"address": row.address, "estimated_after_repair_value": row.estimated_after_repair_value or 0}
+            # Missing costs are left out so the agent's defaults apply
+            if row.estimated_repair_cost is not None:
+                details["estimated_repair_cost"] = row.estimated_repair_cost
+            if row.estimated_holding_cost is not None:
+                details["estimated_holding_cost"] = row.estimated_holding_cost
+            if not details["estimated_after_repair_value"]:
+                # Lets the agent estimate ARV from the comps index
+                details.update(latitude=row.latitude, longitude=row.longitude, square_feet=row.square_feet,
+                               bedrooms=row.bedrooms, bathrooms=row.bathrooms)
+            leads.append({"lead_id": row.id, "property_details": details})
+        
+        return await OfferService.generate_offers_batch(leads, discount_percent, wholesale_fee_percentage)
+    
     @staticmethod
     async def match_buyers(property_info: Dict[str, Any]) -> Dict[str, Any]:
         """Match property with qualified buyers"""
@@ -142,6 +296,172 @@ class OfferService:
         except Exception as e:
             logger.error(f"Buyer matching failed: {e}")
             return {"error": str(e)}
+    
+    @staticmethod
+    async def match_buyers_batch(properties: List[Dict[str, Any]], top_k: int = 5) -> Dict[str, Any]:
+        """Match a batch of properties with their top buyers in one pass"""
+        orchestrator = get_orchestrator()
+        
+        task = {
+            "properties": properties,
+            "top_k": top_k
+        }
+        
+        try:
+            result = await orchestrator.agents["BuyerMatcher"].run(task)
+            return result
+        except Exception as e:
+            logger.error(f"Batch buyer matching failed: {e}")
+            return {"error": str(e)}
+
+
+class BuyerService:
+    """Service for managing cash buyers"""
+    
+    @staticmethod
+    def buyer_to_dict(buyer: CashBuyer) -> Dict[str, Any]:
+        """Map a CashBuyer row onto the dict shape BuyerMatcherAgent scores"""
+        return buyer_row_to_dict(buyer)
+    
+    @staticmethod
+    async def register_buyer(profile: Dict[str, Any]) -> Optional[CashBuyer]:
+        """Save a new cash buyer (None when the email is already registered)"""
+        async with AsyncSessionLocal() as session:
+            buyer = CashBuyer(
+                name=profile.get("name"),
+                email=profile.get("email"),
+                phone=profile.get("phone"),
+                company_name=profile.get("company_name"),
+                target_states=[s.upper() for s in profile.get("target_states", [])],
+                min_deal_size=profile.get("min_deal_size", 0),
+                max_deal_size=profile.get("max_deal_size", 10000000),
+                preferred_property_types=profile.get("preferred_property_types", []),
+                min_roi_percent=profile.get("min_roi_percent", 20.0),
+                notification_method=profile.get("notification_method", "email"),
+                notification_frequency=profile.get("notification_frequency"),
+                last_activity=datetime.utcnow(),
+            )
+            
+            session.add(buyer)
+            try:
+                await session.commit()
+            except IntegrityError:
+                await session.rollback()
+                logger.info(f"Buyer registration rejected: {buyer.email} is already registered")
+                return None
+            await session.refresh(buyer)
+            return buyer
+    
+    @staticmethod
+    async def update_preferences(buyer_id: str, changes: Dict[str, Any]) -> Optional[CashBuyer]:
+        """Update a buyer's investment or contact preferences"""
+        async with AsyncSessionLocal() as session:
+            buyer = await session.get(CashBuyer, buyer_id)
+            if buyer:
+                if "target_states" in changes:
+                    changes["target_states"] = [s.upper() for s in changes["target_states"]]
+                for field, value in changes.items():
+                    setattr(buyer, field, value)
+                buyer.last_activity = datetime.utcnow()
+                await session.commit()
+                return buyer
+            return None
+    
+    @staticmethod
+    async def reverse_match(buyer_id: str) -> Dict[str, Any]:
+        """Find open leads for a buyer and queue notifications (run in background)"""
+        async with AsyncSessionLocal() as session:
+            buyer = await session.get(CashBuyer, buyer_id)
+        if buyer is None:
+            return {"error": f"Buyer {buyer_id} not found"}
+        
+        try:
+            return await reverse_match_buyer(BuyerService.buyer_to_dict(buyer))
+        except Exception as e:
+            logger.error(f"Reverse matching for buyer {buyer_id} failed: {e}")
+            return {"error": str(e)}
+    
+    @staticmethod
+    async def blast_property(lead_id: str, min_score: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Queue alerts about a property to every matched buyer
+        
+        Args:
+            lead_id: Lead the property comes from
+            min_score: Only notify matches at or above this score
+            
+        Returns:
+            Blast id and match counts, or None if the lead doesn't exist
+        
+        Raises:
+            RuntimeError: The buyer snapshot could not be loaded
+        """
+        async with AsyncSessionLocal() as session:
+            lead = await session.get(Lead, lead_id)
+        if lead is None:
+            return None
+        
+        snapshots = get_buyer_snapshot_manager()
+        if not snapshots.is_loaded:
+            try:
+                await snapshots.load()
+            except Exception as e:
+                logger.error(f"Buyer snapshot load for blast of lead {lead_id} failed: {e}")
+                raise RuntimeError("Buyer snapshot is not loaded yet") from e
+        snapshot = snapshots.snapshot
+        
+        property_info = lead_to_property(lead)
+        matcher = get_orchestrator().agents["BuyerMatcher"]
+        result = await matcher.execute({"property": property_info, "buyer_index": snapshot.index})
+        
+        blast_id = uuid.uuid4().hex
+        queue = get_notification_queue()
+        queued = 0
+        digested = 0
+        for match in result["all_matches"]:
+            if min_score is not None and match["match_score"] < min_score:
+                continue
+            buyer = snapshot.get(match["buyer_id"])
+            if buyer is None:
+                continue
+            if queue.wants_digest(buyer):
+                digested += queue.digests.add(buyer, property_info, match["match_score"])
+            else:
+                queued += len(queue.enqueue(buyer, property_info, match["match_score"],
+                                            reason="property_blast", blast_id=blast_id))
+        
+        logger.info(f"Blast {blast_id} for lead {lead_id}: {len(result['all_matches'])} matches, "
+                    f"{queued} messages queued, {digested} held for digests")
+        return {
+            "blast_id": blast_id,
+            "property_id": lead_id,
+            "matched_buyers": len(result["all_matches"]),
+            "messages_queued": queued,
+            "held_for_digest": digested,
+        }
+    
+    @staticmethod
+    async def notify_buyer(buyer_id: str, lead_id: str) -> Optional[Dict[str, Any]]:
+        """Queue an alert about one property to one buyer (None if either is missing)"""
+        async with AsyncSessionLocal() as session:
+            buyer = await session.get(CashBuyer, buyer_id)
+            lead = await session.get(Lead, lead_id)
+        if buyer is None or lead is None:
+            return None
+        
+        buyer_info = BuyerService.buyer_to_dict(buyer)
+        property_info = lead_to_property(lead)
+        matcher = get_orchestrator().agents["BuyerMatcher"]
+        match_score = matcher._calculate_match_score(property_info, buyer_info)
+        delivery_ids = get_notification_queue().enqueue(buyer_info, property_info, match_score,
+                                                        reason="manual", allow_digest=False)
+        return {
+            "buyer_id": buyer_id,
+            "property_id": lead_id,
+            "match_score": round(match_score, 1),
+            "delivery_ids": delivery_ids,
+            "method": buyer_info["notification_method"],
+        }
 
 
 class NegotiationService:
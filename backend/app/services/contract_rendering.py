@@ -0,0 +1,236 @@
+"""
+Contract document rendering - per-state templates to content-addressed PDFs
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import textwrap
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from string import Template
+from typing import Any, Dict, List, Optional
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TEMPLATE_DIR = Path(__file__).resolve().parent.parent / "templates" / "contracts"
+
+STATE_NAMES = {
+    "AL": "Alabama", "AK": "Alaska", "AZ": "Arizona", "AR": "Arkansas", "CA": "California",
+    "CO": "Colorado", "CT": "Connecticut", "DE": "Delaware", "DC": "District of Columbia",
+    "FL": "Florida", "GA": "Georgia", "HI": "Hawaii", "ID": "Idaho", "IL": "Illinois",
+    "IN": "Indiana", "IA": "Iowa", "KS": "Kansas", "KY": "Kentucky", "LA": "Louisiana",
+    "ME": "Maine", "MD": "Maryland", "MA": "Massachusetts", "MI": "Michigan", "MN": "Minnesota",
+    "MS": "Mississippi", "MO": "Missouri", "MT": "Montana", "NE": "Nebraska", "NV": "Nevada",
+    "NH": "New Hampshire", "NJ": "New Jersey", "NM": "New Mexico", "NY": "New York",
+    "NC": "North Carolina", "ND": "North Dakota", "OH": "Ohio", "OK": "Oklahoma", "OR": "Oregon",
+    "PA": "Pennsylvania", "RI": "Rhode Island", "SC": "South Carolina", "SD": "South Dakota",
+    "TN": "Tennessee", "TX": "Texas", "UT": "Utah", "VT": "Vermont", "VA": "Virginia",
+    "WA": "Washington", "WV": "West Virginia", "WI": "Wisconsin", "WY": "Wyoming",
+}
+
+
+def normalize_state(state: Optional[str]) -> Optional[str]:
+    """Two-letter state code, or None if it is not a known state"""
+    code = (state or "").strip().upper()
+    return code if code in STATE_NAMES else None
+
+
+def format_contract_date(value: Any) -> str:
+    """Contract date line for a datetime or ISO timestamp (e.g. an offer's created_at)"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.strftime("%B %d, %Y")
+
+
+# PDF page layout (US Letter, points)
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792
+MARGIN = 72
+FONT_SIZE = 10
+LINE_HEIGHT = 13
+WRAP_COLUMNS = 95
+LINES_PER_PAGE = (PAGE_HEIGHT - 2 * MARGIN) // LINE_HEIGHT
+
+
+def _pdf_escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(text: str, path: str) -> int:
+    """
+    Write plain text as a paginated Helvetica PDF
+    
+    Runs in a worker process. Writes to a temporary file and renames it, so
+    a content-addressed path never holds a partial document.
+    
+    Returns:
+        Number of pages
+    """
+    lines: List[str] = []
+    for paragraph in text.splitlines():
+        lines.extend(textwrap.wrap(paragraph, WRAP_COLUMNS) or [""])
+    pages = [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)] or [[]]
+    
+    # Objects: 1 catalog, 2 page tree, 3 font, then a (page, content) pair per page
+    objects: List[bytes] = []
+    page_ids = [4 + 2 * i for i in range(len(pages))]
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    kids = " ".join(f"{pid} 0 R" for pid in page_ids)
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode())
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    for page_id, page_lines in zip(page_ids, pages):
+        stream_lines = [f"BT /F1 {FONT_SIZE} Tf {LINE_HEIGHT} TL {MARGIN} {PAGE_HEIGHT - MARGIN} Td"]
+        stream_lines += [f"({_pdf_escape(line)}) '" for line in page_lines]
+        stream_lines.append("ET")
+        stream = "\n".join(stream_lines).encode("cp1252", errors="replace")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>".encode()
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref_at = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_at)
+    
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(output)
+    os.replace(tmp_path, path)
+    return len(pages)
+
+
+class ContractRenderer:
+    """
+    Renders purchase agreements from per-state templates
+    
+    - Each state's template (base agreement + state clauses) is compiled
+      once and cached
+    - Documents are stored under the SHA-256 of their text, so identical
+      terms are never rendered twice
+    - PDF generation runs in a process pool off the event loop
+    """
+    
+    def __init__(self, template_dir: Optional[str] = None, output_dir: Optional[str] = None,
+                 workers: Optional[int] = None):
+        self.template_dir = Path(template_dir or settings.contract_template_dir or DEFAULT_TEMPLATE_DIR)
+        self.output_dir = Path(output_dir or settings.contract_output_dir)
+        self.workers = workers or settings.contract_render_workers
+        self._templates: Dict[str, Template] = {}
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+    
+    def template_for(self, state: str) -> Template:
+        """Compiled template for a state (unknown states use the generic clauses)"""
+        # Only known state codes reach the filesystem or the template cache
+        state = normalize_state(state) or "default"
+        template = self._templates.get(state)
+        if template is None:
+            base = (self.template_dir / "purchase_agreement.txt").read_text()
+            clauses_file = self.template_dir / f"{state}.txt"
+            if not clauses_file.exists():
+                clauses_file = self.template_dir / "default.txt"
+            # State clauses are substituted now; only deal terms vary per render
+            template = Template(Template(base).safe_substitute(
+                state_name=STATE_NAMES.get(state, "the Property's jurisdiction"),
+                state_clauses=clauses_file.read_text().strip(),
+            ))
+            self._templates[state] = template
+        return template
+    
+    def render_text(self, terms: Dict[str, Any]) -> str:
+        """
+        Fill a state's template with offer terms
+        
+        Args:
+            terms: Contract terms (OfferGeneratorAgent terms plus state,
+                buyer_name, seller_name and contract_date)
+        
+        Raises:
+            ValueError: If contract_date is missing - the date is part of the
+                hashed text, so defaulting it to today would re-render
+                identical terms every day
+        """
+        if not terms.get("contract_date"):
+            raise ValueError("contract_date is required to render a contract")
+        
+        def bullet_list(items: Any) -> str:
+            if isinstance(items, (list, tuple)):
+                return "\n".join(f"  - {item}" for item in items) or "  None."
+            return f"  {items}"
+        
+        def money(value: Any) -> str:
+            return f"${value:,.2f}" if isinstance(value, (int, float)) else str(value)
+        
+        return self.template_for(terms.get("state", "")).substitute(
+            contract_date=terms["contract_date"],
+            seller_name=terms.get("seller_name") or "Seller",
+            buyer_name=terms.get("buyer_name") or "Buyer",
+            property_address=terms.get("property_address") or terms.get("address", ""),
+            offer_price=money(terms.get("offer_price", "")),
+            earnest_money=money(terms.get("earnest_money", "")),
+            inspection_period_days=terms.get("inspection_period_days", 10),
+            contingencies=bullet_list(terms.get("contingencies", [])),
+            special_terms=bullet_list(terms.get("special_terms", [])),
+            closing_timeline=terms.get("closing_timeline", "30 days"),
+            closing_costs_paid_by=terms.get("closing_costs_paid_by", "Buyer"),
+            offer_valid_days=terms.get("offer_valid_days", 7),
+        )
+    
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+    
+    async def render(self, terms: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Render a contract PDF, reusing the stored document for identical text
+        
+        Returns:
+            document_path, sha256, contract text and whether it was cached
+        """
+        text = self.render_text(terms)
+        digest = hashlib.sha256(text.encode()).hexdigest()
+        path = self.output_dir / digest[:2] / f"{digest}.pdf"
+        result = {"document_path": str(path), "sha256": digest, "contract": text}
+        
+        if path.exists():
+            return {**result, "cached": True}
+        
+        future = self._inflight.get(digest)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self._get_pool(), write_pdf, text, str(path))
+            self._inflight[digest] = future
+            future.add_done_callback(lambda _: self._inflight.pop(digest, None))
+        pages = await asyncio.shield(future)
+        logger.info(f"Rendered contract {digest[:12]} ({pages} pages)")
+        return {**result, "cached": False, "pages": pages}
+    
+    def close(self):
+        """Shut down the render worker processes"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+# Global contract renderer instance
+_contract_renderer: Optional[ContractRenderer] = None
+
+
+def get_contract_renderer() -> ContractRenderer:
+    """Get or create the global contract renderer"""
+    global _contract_renderer
+    if _contract_renderer is None:
+        _contract_renderer = ContractRenderer()
+    return _contract_renderer
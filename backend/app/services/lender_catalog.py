@@ -0,0 +1,153 @@
+"""
+Indexed lender catalog for financing matches
+"""
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+from ..config import settings
+from ..database import PropertyTypeEnum
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATALOG_PATH = Path(__file__).resolve().parent.parent / "data" / "lenders.json"
+
+# Property type -> bit in each lender's accepted-types mask
+PROPERTY_TYPE_BITS = {t.value: 1 << i for i, t in enumerate(PropertyTypeEnum)}
+
+# Flip/rental deals completed, for named experience levels
+EXPERIENCE_LEVELS = {
+    "beginner": 0,
+    "novice": 0,
+    "intermediate": 3,
+    "experienced": 10,
+    "expert": 25,
+}
+
+
+def property_type_bit(property_type: Optional[str]) -> Optional[int]:
+    """
+    Mask bit for a property type ("Single Family", "single_family" and "SFR" all work)
+    
+    None when the type is missing or unrecognized.
+    """
+    parsed = PropertyTypeEnum.parse(property_type, strict=True)
+    return PROPERTY_TYPE_BITS[parsed.value] if parsed is not None else None
+
+
+def experience_deals(level: Union[str, int, float, None]) -> float:
+    """Deals completed for a numeric or named experience level (0 when unknown)"""
+    if isinstance(level, (int, float)):
+        return float(level)
+    return float(EXPERIENCE_LEVELS.get((level or "").strip().lower(), 0))
+
+
+class LenderCatalog:
+    """
+    Lender programs in columnar arrays, ordered by minimum loan amount
+    
+    A lookup binary-searches the loan amount to the programs whose minimum
+    it meets, then applies the max loan, credit score, experience,
+    property type and state limits as vector filters over that prefix.
+    """
+    
+    def __init__(self, lenders: List[Dict[str, Any]]):
+        self.lenders = sorted(lenders, key=lambda lender: lender["min_loan"])
+        self.min_loan = np.array([l["min_loan"] for l in self.lenders], dtype=float)
+        self.max_loan = np.array([l["max_loan"] for l in self.lenders], dtype=float)
+        self.min_credit = np.array([l.get("min_credit_score", 0) for l in self.lenders], dtype=float)
+        self.min_experience = np.array([l.get("min_experience_deals", 0) for l in self.lenders], dtype=float)
+        self.rate = np.array([l["rate_percent"] for l in self.lenders], dtype=float)
+        self.points = np.array([l.get("points", 0) for l in self.lenders], dtype=float)
+        self.days_to_fund = np.array([l["days_to_fund"][1] for l in self.lenders], dtype=float)
+        self.type_mask = np.array(
+            [sum(PROPERTY_TYPE_BITS[PropertyTypeEnum.parse(t).value] for t in set(l.get("property_types", [])))
+             for l in self.lenders],
+            dtype=np.int64,
+        )
+        # Empty states list = lends nationwide
+        self.states = [frozenset(s.upper() for s in l.get("states", [])) for l in self.lenders]
+        self.nationwide = np.array([not states for states in self.states], dtype=bool)
+    
+    def __len__(self) -> int:
+        return len(self.lenders)
+    
+    @classmethod
+    def from_file(cls, path: Optional[str] = None) -> "LenderCatalog":
+        path = Path(path or settings.lender_catalog_path or DEFAULT_CATALOG_PATH)
+        catalog = cls(json.loads(path.read_text()))
+        logger.info(f"Lender catalog loaded with {len(catalog)} programs from {path}")
+        return catalog
+    
+    def match(self, loan_amount: float, property_type: Optional[str] = None,
+              credit_score: Optional[float] = None, experience: Union[str, float, None] = None,
+              state: Optional[str] = None, max_days_to_fund: Optional[float] = None,
+              priority: str = "cost", limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Ranked lender programs that would fund a deal
+        
+        Args:
+            property_type: Skips the property type filter when missing or unrecognized
+            credit_score: Skips the credit filter when unknown
+            max_days_to_fund: Drop programs slower than this
+            priority: "cost" (rate + points, then speed) or "speed"
+        
+        Returns:
+            Lender dicts, best first
+        """
+        n = int(np.searchsorted(self.min_loan, loan_amount, side="right"))
+        ok = self.max_loan[:n] >= loan_amount
+        type_bit = property_type_bit(property_type)
+        if type_bit is not None:
+            ok &= (self.type_mask[:n] & type_bit) != 0
+        ok &= self.min_experience[:n] <= experience_deals(experience)
+        if credit_score is not None:
+            ok &= self.min_credit[:n] <= credit_score
+        if max_days_to_fund is not None:
+            ok &= self.days_to_fund[:n] <= max_days_to_fund
+        if state:
+            state = state.upper()
+            ok &= self.nationwide[:n] | np.array([state in s for s in self.states[:n]], dtype=bool)
+        
+        candidates = np.flatnonzero(ok)
+        # Points are amortized over a one-year hold for the cost ranking
+        cost = self.rate[candidates] + self.points[candidates]
+        speed = self.days_to_fund[candidates]
+        if priority == "speed":
+            order = np.lexsort((cost, speed))
+        else:
+            order = np.lexsort((speed, cost))
+        ranked = candidates[order][:limit or settings.lender_match_limit]
+        return [self.lender_to_dict(int(i)) for i in ranked]
+    
+    def lender_to_dict(self, i: int) -> Dict[str, Any]:
+        lender = self.lenders[i]
+        term_min, term_max = lender["term_months"]
+        days_min, days_max = lender["days_to_fund"]
+        return {
+            "lender": lender["name"],
+            "type": lender["type"],
+            "rate": f"{lender['rate_percent']}%",
+            "points": lender.get("points", 0),
+            "term": f"{term_min}-{term_max} months" if term_min != term_max else f"{term_min} months",
+            "speed": f"{days_min}-{days_max} days",
+            "max_ltv_percent": lender.get("max_ltv_percent"),
+            "min_credit_score": lender.get("min_credit_score", 0),
+            "loan_range": [lender["min_loan"], lender["max_loan"]],
+            "contact": lender.get("contact")
+        }
+
+
+# Global lender catalog instance
+_lender_catalog: Optional[LenderCatalog] = None
+
+
+def get_lender_catalog() -> LenderCatalog:
+    """Get or load the global lender catalog"""
+    global _lender_catalog
+    if _lender_catalog is None:
+        _lender_catalog = LenderCatalog.from_file()
+    return _lender_catalog
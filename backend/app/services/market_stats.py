@@ -0,0 +1,405 @@
+"""
+Per-ZIP and per-neighborhood market statistics
+"""
+import asyncio
+import logging
+import math
+import re
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import or_, select
+
+from ..config import settings
+from ..database import AsyncSessionLocal, ComparableSale, Lead
+from .reverse_matching import OPEN_STATUSES
+
+logger = logging.getLogger(__name__)
+
+# Stats table columns, in storage order
+STAT_COLUMNS = (
+    "median_price",
+    "median_price_per_sqft",
+    "median_days_on_market",
+    "median_rent",
+    "cap_rate",
+    "trend_pct",  # annualized change in price per sqft
+    "stack_days",  # days to absorb the open listings at the recent sales rate
+    "sales",
+    "listings",
+)
+_COLUMN = {name: i for i, name in enumerate(STAT_COLUMNS)}
+
+# Recent sales that set the absorption rate behind stack_days
+ABSORPTION_WINDOW_DAYS = 90
+WATERMARK_OVERLAP = timedelta(seconds=5)
+# Full rebuilds drop sales that aged out of the window and emptied neighborhoods
+FULL_REBUILD_INTERVAL = timedelta(days=1)
+
+ZIP_PATTERN = re.compile(r"\b(\d{5})(?:-\d{4})?\s*$")
+
+
+def neighborhood_key(zip_code: str, latitude: float, longitude: float) -> str:
+    """Neighborhood = one grid cell within a ZIP"""
+    cell = settings.market_neighborhood_cell_degrees
+    return f"{zip_code}:{math.floor(latitude / cell)}:{math.floor(longitude / cell)}"
+
+
+def _median(values: np.ndarray) -> float:
+    return float(np.median(values)) if values.size else float("nan")
+
+
+def group_stats(price: np.ndarray, sqft: np.ndarray, age_days: np.ndarray, rent: np.ndarray,
+                days_on_market: np.ndarray, open_listings: int) -> np.ndarray:
+    """
+    One stats row from a group's sales and listings
+    
+    Args:
+        price, sqft, age_days, rent: Per-sale arrays (nan where unknown)
+        days_on_market: Listing days for the group's leads (nan where unknown)
+        open_listings: Leads in the group still open
+    """
+    row = np.full(len(STAT_COLUMNS), np.nan)
+    row[_COLUMN["sales"]] = price.size
+    row[_COLUMN["listings"]] = open_listings
+    row[_COLUMN["median_days_on_market"]] = _median(days_on_market[~np.isnan(days_on_market)])
+    
+    recent_sales = np.count_nonzero(age_days <= ABSORPTION_WINDOW_DAYS)
+    if recent_sales:
+        row[_COLUMN["stack_days"]] = open_listings / (recent_sales / ABSORPTION_WINDOW_DAYS)
+    if not price.size:
+        return row
+    
+    median_price = _median(price)
+    row[_COLUMN["median_price"]] = median_price
+    
+    sized = sqft > 0
+    ppsf = price[sized] / sqft[sized]
+    row[_COLUMN["median_price_per_sqft"]] = _median(ppsf)
+    if ppsf.size >= 3:
+        # Least-squares slope of price per sqft over time, annualized
+        t = -age_days[sized]
+        dt = t - t.mean()
+        variance = np.dot(dt, dt)
+        if variance > 0 and ppsf.mean() > 0:
+            slope = np.dot(dt, ppsf - ppsf.mean()) / variance
+            row[_COLUMN["trend_pct"]] = slope * 365 / ppsf.mean() * 100
+    
+    median_rent = _median(rent[~np.isnan(rent)])
+    if math.isnan(median_rent):
+        median_rent = median_price * settings.market_rent_to_price_ratio
+    row[_COLUMN["median_rent"]] = median_rent
+    if median_price > 0:
+        net_income = median_rent * 12 * (1 - settings.market_operating_expense_ratio)
+        row[_COLUMN["cap_rate"]] = net_income / median_price * 100
+    return row
+
+
+def _group_positions(keys: List[str]) -> Dict[str, np.ndarray]:
+    """Positions of each distinct key"""
+    if not keys:
+        return {}
+    unique, inverse = np.unique(np.array(keys, dtype=object), return_inverse=True)
+    order = np.argsort(inverse, kind="stable")
+    bounds = np.cumsum(np.bincount(inverse))[:-1]
+    return dict(zip(unique.tolist(), np.split(order, bounds)))
+
+
+class MarketStatsTable:
+    """
+    Columnar market statistics: one float64 row per ZIP or neighborhood
+    
+    Immutable once built; updates return a new table so readers always see
+    a consistent version.
+    """
+    
+    def __init__(self, keys: Optional[List[str]] = None, values: Optional[np.ndarray] = None):
+        self.keys = list(keys or [])
+        self.values = values if values is not None else np.empty((0, len(STAT_COLUMNS)))
+        self._rows = {key: i for i, key in enumerate(self.keys)}
+    
+    def __len__(self) -> int:
+        return len(self.keys)
+    
+    def row(self, key: str) -> Optional[Dict[str, float]]:
+        i = self._rows.get(key)
+        if i is None:
+            return None
+        return dict(zip(STAT_COLUMNS, self.values[i].tolist()))
+    
+    def column(self, name: str) -> np.ndarray:
+        return self.values[:, _COLUMN[name]]
+    
+    def updated(self, rows: Dict[str, np.ndarray]) -> "MarketStatsTable":
+        """Copy of the table with rows replaced or appended"""
+        keys = self.keys + [key for key in rows if key not in self._rows]
+        values = np.empty((len(keys), len(STAT_COLUMNS)))
+        values[:len(self.keys)] = self.values
+        positions = {key: i for i, key in enumerate(keys)}
+        for key, row in rows.items():
+            values[positions[key]] = row
+        return MarketStatsTable(keys, values)
+
+
+class MarketStatsEngine:
+    """
+    Precomputed market statistics from comparable sales and lead listings
+    
+    - Sales: price, price per sqft, rent, cap rate and trend over the last
+      market_stats_window_days
+    - Listings (leads): days on market and open inventory
+    
+    refresh() recomputes only the ZIPs (and their neighborhoods) with new
+    or changed rows since the last pass.
+    """
+    
+    def __init__(self):
+        self._table = MarketStatsTable()
+        self._watermark: Optional[datetime] = None
+        self._built_at: Optional[datetime] = None
+        self._lock = asyncio.Lock()
+    
+    @property
+    def table(self) -> MarketStatsTable:
+        return self._table
+    
+    async def _compute(self, zips: Optional[Set[str]] = None) -> Dict[str, np.ndarray]:
+        """Stats rows for the given ZIPs (all ZIPs when None)"""
+        now = datetime.utcnow()
+        cutoff = now - timedelta(days=settings.market_stats_window_days)
+        sales_query = select(
+            ComparableSale.zip_code,
+            ComparableSale.latitude,
+            ComparableSale.longitude,
+            ComparableSale.sale_price,
+            ComparableSale.square_feet,
+            ComparableSale.sale_date,
+            ComparableSale.monthly_rent,
+        ).where(ComparableSale.sale_date >= cutoff, ComparableSale.zip_code.isnot(None))
+        listings_query = select(
+            Lead.zip_code,
+            Lead.latitude,
+            Lead.longitude,
+            Lead.listing_time_days,
+            Lead.lead_status,
+        ).where(Lead.created_at >= cutoff)
+        if zips is not None:
+            sales_query = sales_query.where(ComparableSale.zip_code.in_(zips))
+            listings_query = listings_query.where(Lead.zip_code.in_(zips))
+        
+        async with AsyncSessionLocal() as session:
+            sales = (await session.execute(sales_query)).all()
+            listings = (await session.execute(listings_query)).all()
+        
+        def floats(values) -> np.ndarray:
+            return np.array([np.nan if v is None else v for v in values], dtype=float)
+        
+        price = floats(s.sale_price for s in sales)
+        sqft = floats(s.square_feet for s in sales)
+        age_days = np.array([(now - s.sale_date).total_seconds() / 86400 for s in sales], dtype=float)
+        rent = floats(s.monthly_rent for s in sales)
+        days_on_market = floats(l.listing_time_days for l in listings)
+        is_open = np.array([l.lead_status in OPEN_STATUSES for l in listings], dtype=bool)
+        
+        # Every row counts toward its ZIP and, when located, its neighborhood
+        sale_keys, sale_rows = [], []
+        for i, s in enumerate(sales):
+            sale_keys += [s.zip_code, neighborhood_key(s.zip_code, s.latitude, s.longitude)]
+            sale_rows += [i, i]
+        listing_keys, listing_rows = [], []
+        for i, l in enumerate(listings):
+            listing_keys.append(l.zip_code)
+            listing_rows.append(i)
+            if l.latitude is not None and l.longitude is not None:
+                listing_keys.append(neighborhood_key(l.zip_code, l.latitude, l.longitude))
+                listing_rows.append(i)
+        sale_rows = np.array(sale_rows, dtype=np.intp)
+        listing_rows = np.array(listing_rows, dtype=np.intp)
+        
+        empty = np.array([], dtype=np.intp)
+        sale_groups = {k: sale_rows[p] for k, p in _group_positions(sale_keys).items()}
+        listing_groups = {k: listing_rows[p] for k, p in _group_positions(listing_keys).items()}
+        rows = {}
+        for key in sale_groups.keys() | listing_groups.keys():
+            s = sale_groups.get(key, empty)
+            l = listing_groups.get(key, empty)
+            rows[key] = group_stats(price[s], sqft[s], age_days[s], rent[s],
+                                    days_on_market[l], int(np.count_nonzero(is_open[l])))
+        return rows
+    
+    async def _changed_zips(self, since: Optional[datetime]) -> Tuple[Set[str], Optional[datetime]]:
+        """ZIPs with sales or listings added/updated after since, and the new watermark"""
+        sales_query = select(ComparableSale.zip_code, ComparableSale.created_at)
+        listings_query = select(Lead.zip_code, Lead.created_at, Lead.updated_at)
+        if since is not None:
+            sales_query = sales_query.where(ComparableSale.created_at > since)
+            listings_query = listings_query.where(or_(Lead.created_at > since, Lead.updated_at > since))
+        
+        async with AsyncSessionLocal() as session:
+            sales = (await session.execute(sales_query)).all()
+            listings = (await session.execute(listings_query)).all()
+        
+        zips = {row.zip_code for row in sales if row.zip_code} | {row.zip_code for row in listings if row.zip_code}
+        stamps = [row.created_at for row in sales] + [t for row in listings for t in (row.created_at, row.updated_at)]
+        watermark = max([t for t in stamps if t] + ([self._watermark] if self._watermark else []), default=None)
+        return zips, watermark
+    
+    async def load(self):
+        """Full rebuild of the stats table"""
+        async with self._lock:
+            _, watermark = await self._changed_zips(None)
+            rows = await self._compute()
+            self._table = MarketStatsTable().updated(rows)
+            self._watermark = watermark
+            self._built_at = datetime.utcnow()
+        logger.info(f"Market stats built for {len(self._table)} ZIPs/neighborhoods")
+    
+    async def refresh(self) -> int:
+        """
+        Recompute the ZIPs whose sales or listings changed since the last pass
+        
+        Returns:
+            Number of stats rows updated
+        """
+        if self._built_at is None or datetime.utcnow() - self._built_at > FULL_REBUILD_INTERVAL:
+            await self.load()
+            return len(self._table)
+        
+        async with self._lock:
+            since = self._watermark - WATERMARK_OVERLAP if self._watermark else None
+            zips, watermark = await self._changed_zips(since)
+            if not zips:
+                return 0
+            rows = await self._compute(zips)
+            self._table = self._table.updated(rows)
+            self._watermark = watermark
+        logger.info(f"Market stats: {len(rows)} rows updated across {len(zips)} ZIPs")
+        return len(rows)
+    
+    async def run_periodically(self, interval_minutes: Optional[int] = None):
+        """Keep the stats current until cancelled"""
+        interval = 60 * (interval_minutes or settings.market_stats_refresh_minutes)
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Market stats refresh failed: {e}")
+            await asyncio.sleep(interval)
+    
+    def lookup(self, zip_code: Optional[str], latitude: Optional[float] = None,
+               longitude: Optional[float] = None) -> Optional[Tuple[str, Dict[str, float]]]:
+        """
+        Stats for a location: its neighborhood when it has enough sales,
+        otherwise its ZIP
+        
+        Returns:
+            (key, stats) or None if the ZIP has no data
+        """
+        if not zip_code:
+            return None
+        table = self._table
+        if latitude is not None and longitude is not None:
+            key = neighborhood_key(zip_code, latitude, longitude)
+            stats = table.row(key)
+            if stats is not None and stats["sales"] >= settings.market_stats_min_samples:
+                return key, stats
+        stats = table.row(zip_code)
+        return (zip_code, stats) if stats is not None else None
+    
+    def analyze(self, address: str, market_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Market analysis for a property from the precomputed stats
+        
+        Args:
+            market_data: Optional zip_code, latitude/longitude and the
+                subject's price (asking_price/offer_price/price) and sqft
+        
+        Returns:
+            MarketAnalysis fields plus market_key and sample_size
+        """
+        zip_code = market_data.get("zip_code")
+        if not zip_code:
+            match = ZIP_PATTERN.search(address or "")
+            zip_code = match.group(1) if match else None
+        found = self.lookup(zip_code, market_data.get("latitude"), market_data.get("longitude"))
+        if found is None:
+            return {
+                "market_trend": "Insufficient data",
+                "price_per_sqft": 0.0,
+                "days_on_market": 0.0,
+                "stack_days": 0.0,
+                "rental_income_potential": 0.0,
+                "cap_rate": 0.0,
+                "property_score": 0.0,
+                "investment_rating": "Unknown",
+                "market_key": zip_code,
+                "sample_size": 0
+            }
+        key, stats = found
+        
+        def value(name: str) -> float:
+            v = stats[name]
+            return 0.0 if math.isnan(v) else round(v, 2)
+        
+        trend = stats["trend_pct"]
+        if math.isnan(trend):
+            market_trend = "Insufficient data"
+        elif trend > settings.market_trend_threshold_pct:
+            market_trend = "Appreciating"
+        elif trend < -settings.market_trend_threshold_pct:
+            market_trend = "Declining"
+        else:
+            market_trend = "Stable"
+        
+        # Investment score: yield 40, momentum 30, liquidity 20, subject discount 10
+        def scaled(v: float, low: float, high: float) -> float:
+            return 0.5 if math.isnan(v) else min(max((v - low) / (high - low), 0.0), 1.0)
+        
+        score = (40 * scaled(stats["cap_rate"], 4.0, 10.0)
+                 + 30 * scaled(trend, -5.0, 10.0)
+                 + 20 * (1 - scaled(stats["median_days_on_market"], 0.0, 120.0)))
+        subject_price = market_data.get("asking_price") or market_data.get("offer_price") or market_data.get("price")
+        subject_sqft = market_data.get("sqft") or market_data.get("square_feet")
+        median_ppsf = stats["median_price_per_sqft"]
+        if subject_price and subject_sqft and median_ppsf > 0:
+            discount = 1 - (subject_price / subject_sqft) / median_ppsf
+            score += 10 * scaled(discount, 0.0, 0.3)
+        else:
+            score += 5
+        
+        if score >= 80:
+            rating = "Excellent"
+        elif score >= 65:
+            rating = "Good"
+        elif score >= 50:
+            rating = "Fair"
+        else:
+            rating = "Poor"
+        
+        return {
+            "market_trend": market_trend,
+            "price_per_sqft": value("median_price_per_sqft"),
+            "days_on_market": value("median_days_on_market"),
+            "stack_days": value("stack_days"),
+            "rental_income_potential": value("median_rent"),
+            "cap_rate": value("cap_rate"),
+            "property_score": round(score, 1),
+            "investment_rating": rating,
+            "market_key": key,
+            "sample_size": int(stats["sales"])
+        }
+
+
+# Global market stats engine instance
+_market_stats: Optional[MarketStatsEngine] = None
+
+
+def get_market_stats() -> MarketStatsEngine:
+    """Get or create the global market stats engine"""
+    global _market_stats
+    if _market_stats is None:
+        _market_stats = MarketStatsEngine()
+    return _market_stats
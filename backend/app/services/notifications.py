@@ -0,0 +1,463 @@
+"""
+Buyer notification pipeline
+"""
+import asyncio
+import heapq
+import logging
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from ..cache import get_buyer_snapshot_manager
+from ..config import settings
+from ..integrations import IntegrationManager
+
+logger = logging.getLogger(__name__)
+
+# Largest batch each provider accepts in one call
+CHANNEL_MAX_BATCH = {"email": 1000, "sms": 100}
+
+
+def build_integration_manager() -> IntegrationManager:
+    """IntegrationManager with every integration that has credentials configured"""
+    return IntegrationManager({
+        "sendgrid_enabled": bool(settings.sendgrid_api_key),
+        "sendgrid_api_key": settings.sendgrid_api_key,
+        "sendgrid_from_email": settings.sendgrid_from_email,
+        "twilio_enabled": bool(settings.twilio_account_sid and settings.twilio_auth_token),
+        "twilio_account_sid": settings.twilio_account_sid,
+        "twilio_auth_token": settings.twilio_auth_token,
+        "twilio_phone_number": settings.twilio_phone_number,
+        "docusign_enabled": bool(settings.docusign_api_key),
+        "docusign_api_key": settings.docusign_api_key,
+        "docusign_account_id": settings.docusign_account_id,
+    })
+
+
+def render_property_alert(buyer: Dict[str, Any], property_info: Dict[str, Any],
+                          match_score: float) -> Dict[str, str]:
+    """Subject, HTML and SMS text for a single-property buyer alert"""
+    address = property_info.get("address", "")
+    location = f"{property_info.get('city', '')}, {property_info.get('state', '')}".strip(", ")
+    arv = property_info.get("estimated_after_repair_value") or 0
+    subject = f"New deal matching your criteria: {address}"
+    return {
+        "subject": subject,
+        "html": (
+            f"<p>Hi {buyer.get('name', 'Investor')},</p>"
+            f"<p>A new property matches your buying criteria ({match_score:.0f}% match):</p>"
+            f"<p><strong>{address}</strong><br>{location}<br>ARV: ${arv:,.0f}</p>"
+        ),
+        "sms": f"New deal ({match_score:.0f}% match): {address}, {location}. ARV ${arv:,.0f}",
+    }
+
+
+def render_property_digest(buyer: Dict[str, Any], items: List[Tuple[float, str, str, float]],
+                           more: int = 0) -> Dict[str, str]:
+    """
+    Subject, HTML and SMS text for a digest of matching properties
+    
+    Args:
+        items: (match_score, address, location, arv), best first
+        more: Matches left out of the listing
+    """
+    total = len(items) + more
+    noun = "deal" if total == 1 else "deals"
+    rows = "".join(
+        f"<li><strong>{address}</strong>, {location} - ARV ${arv:,.0f} ({score:.0f}% match)</li>"
+        for score, address, location, arv in items
+    )
+    more_html = f"<p>...and {more} more.</p>" if more else ""
+    top_score, top_address = items[0][0], items[0][1]
+    return {
+        "subject": f"{total} new {noun} matching your criteria",
+        "html": (
+            f"<p>Hi {buyer.get('name', 'Investor')},</p>"
+            f"<p>{total} new {noun} matched your buying criteria:</p>"
+            f"<ul>{rows}</ul>{more_html}"
+        ),
+        "sms": f"{total} new {noun} match your criteria. Top: {top_address} ({top_score:.0f}% match)",
+    }
+
+
+def buyer_channels(buyer: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """(channel, address) pairs a buyer should be reached on"""
+    method = buyer.get("notification_method") or "email"
+    channels = []
+    if method in ("email", "both") and buyer.get("email"):
+        channels.append(("email", buyer["email"]))
+    if method in ("sms", "both") and buyer.get("phone"):
+        channels.append(("sms", buyer["phone"]))
+    return channels
+
+
+class TokenBucket:
+    """Async token bucket - `rate` sends per second with bursts up to one second's worth"""
+    
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.capacity = max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self, count: int = 1):
+        """Wait until `count` sends are allowed (large batches borrow against future tokens)"""
+        async with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= count
+            if self._tokens < 0:
+                await asyncio.sleep(-self._tokens / self.rate)
+
+
+class _DigestBuffer:
+    """Best matches held for one buyer during a digest window"""
+    __slots__ = ("buyer", "opened_at", "items", "more", "property_ids")
+    
+    def __init__(self, buyer: Dict[str, Any], opened_at: float):
+        self.buyer = buyer
+        self.opened_at = opened_at
+        self.items: List[Tuple[float, str, str, float]] = []  # min-heap on score
+        self.more = 0
+        self.property_ids: Set[str] = set()
+
+
+class DigestScheduler:
+    """
+    Collects matches per buyer and sends one consolidated alert per window
+    
+    A buyer's window opens with their first buffered match and closes
+    notification_digest_window_minutes later. Each buffer keeps only the
+    top notification_digest_max_items matches and counts the rest.
+    """
+    
+    def __init__(self, queue: "NotificationQueue"):
+        self._queue = queue
+        self._buffers: Dict[str, _DigestBuffer] = {}
+    
+    def __len__(self) -> int:
+        return len(self._buffers)
+    
+    def add(self, buyer: Dict[str, Any], property_info: Dict[str, Any], match_score: float) -> bool:
+        """Buffer a match for the buyer's next digest (False if opted out or already sent)"""
+        if not buyer.get("auto_notify", True):
+            return False
+        buyer_id = str(buyer.get("id"))
+        property_id = str(property_info.get("id") or property_info.get("address", ""))
+        buffer = self._buffers.get(buyer_id)
+        if buffer is not None and property_id in buffer.property_ids:
+            return False
+        if self._queue.is_duplicate((buyer_id, property_id, "digest")):
+            return False
+        
+        if buffer is None:
+            buffer = self._buffers[buyer_id] = _DigestBuffer(buyer, time.time())
+        buffer.property_ids.add(property_id)
+        location = f"{property_info.get('city', '')}, {property_info.get('state', '')}".strip(", ")
+        item = (float(match_score), property_info.get("address", ""), location,
+                float(property_info.get("estimated_after_repair_value") or 0))
+        if len(buffer.items) < settings.notification_digest_max_items:
+            heapq.heappush(buffer.items, item)
+        else:
+            heapq.heappushpop(buffer.items, item)
+            buffer.more += 1
+        return True
+    
+    def flush_due(self, now: Optional[float] = None, force: bool = False) -> int:
+        """
+        Queue digests for every buyer whose window has closed
+        
+        Returns:
+            Number of digest messages queued
+        """
+        now = now if now is not None else time.time()
+        window = settings.notification_digest_window_minutes * 60
+        due = [buyer_id for buyer_id, buffer in self._buffers.items()
+               if force or now - buffer.opened_at >= window]
+        
+        snapshot = get_buyer_snapshot_manager().snapshot
+        queued = 0
+        for buyer_id in due:
+            buffer = self._buffers.pop(buyer_id)
+            # Contact preferences may have changed since the window opened
+            buyer = (snapshot.get(buyer_id) if snapshot else None) or buffer.buyer
+            if not buyer.get("auto_notify", True):
+                continue
+            message = render_property_digest(buyer, sorted(buffer.items, reverse=True), buffer.more)
+            # The properties count as sent only once the digest is queued,
+            # and become eligible again if its delivery fails
+            dedup_keys = [(buyer_id, property_id, "digest") for property_id in buffer.property_ids]
+            queued += len(self._queue.queue_message(buyer, message, reason="digest", dedup_keys=dedup_keys))
+        return queued
+    
+    async def run(self):
+        """Flush closed digest windows until cancelled"""
+        tick = max(1, min(60, settings.notification_digest_window_minutes * 6))
+        while True:
+            await asyncio.sleep(tick)
+            try:
+                flushed = self.flush_due()
+                if flushed:
+                    logger.info(f"Queued {flushed} buyer digest messages")
+            except Exception as e:
+                logger.error(f"Digest flush failed: {e}")
+
+
+class NotificationQueue:
+    """
+    Batched, rate-limited buyer notification pipeline
+    
+    Producers (property blasts, reverse matching) enqueue and return
+    immediately; matches for digest buyers go to the DigestScheduler. The worker drains the queue in batches, groups messages by
+    channel and hands each group to SendGrid / Twilio in bulk, throttled by a
+    per-channel token bucket. A buyer is notified about a property at most
+    once per dedup window, and every message gets a delivery record that can
+    be looked up by delivery or blast id.
+    """
+    
+    def __init__(self, integrations: Optional[IntegrationManager] = None):
+        self._queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+        self._integrations = integrations
+        self._limits = {
+            "email": TokenBucket(settings.notification_email_rate_per_second),
+            "sms": TokenBucket(settings.notification_sms_rate_per_second),
+        }
+        # Dedup key -> last send time, oldest first
+        self._sent: "OrderedDict[Tuple[str, str, str], float]" = OrderedDict()
+        self._deliveries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._blasts: "OrderedDict[str, List[str]]" = OrderedDict()
+        self.digests = DigestScheduler(self)
+    
+    @property
+    def integrations(self) -> IntegrationManager:
+        if self._integrations is None:
+            self._integrations = build_integration_manager()
+        return self._integrations
+    
+    def pending(self) -> int:
+        return self._queue.qsize()
+    
+    def is_duplicate(self, key: Tuple[str, str, str]) -> bool:
+        """Whether a message with this dedup key was sent within the dedup window"""
+        now = time.time()
+        window = settings.notification_dedup_hours * 3600
+        # Entries are in send order, so expired ones are all at the front
+        while self._sent:
+            if now - next(iter(self._sent.values())) < window:
+                break
+            self._sent.popitem(last=False)
+        return key in self._sent
+    
+    def _track(self, delivery: Dict[str, Any]):
+        self._deliveries[delivery["delivery_id"]] = delivery
+        while len(self._deliveries) > settings.notification_status_max_entries:
+            self._deliveries.popitem(last=False)
+    
+    @staticmethod
+    def wants_digest(buyer: Dict[str, Any]) -> bool:
+        frequency = buyer.get("notification_frequency") or settings.default_notification_frequency
+        return frequency == "digest"
+    
+    def enqueue(self, buyer: Dict[str, Any], property_info: Dict[str, Any],
+                match_score: float, reason: str = "property_match",
+                blast_id: Optional[str] = None, allow_digest: bool = True) -> List[str]:
+        """
+        Queue a property alert for a buyer on each of their channels
+        
+        Skipped when the buyer opted out, or was already alerted about the
+        property on that channel within the dedup window. Buyers on digest
+        frequency get the match buffered for their next digest instead.
+        
+        Returns:
+            Delivery ids of the queued messages (empty when buffered)
+        """
+        if not buyer.get("auto_notify", True):
+            return []
+        if allow_digest and self.wants_digest(buyer):
+            self.digests.add(buyer, property_info, match_score)
+            return []
+        
+        property_id = str(property_info.get("id") or property_info.get("address", ""))
+        message = render_property_alert(buyer, property_info, match_score)
+        delivery_ids = self.queue_message(buyer, message, reason, property_id)
+        
+        if blast_id is not None:
+            self._blasts.setdefault(blast_id, []).extend(delivery_ids)
+            while len(self._blasts) > settings.notification_status_max_entries:
+                self._blasts.popitem(last=False)
+        return delivery_ids
+    
+    def queue_message(self, buyer: Dict[str, Any], message: Dict[str, str], reason: str,
+                      property_id: Optional[str] = None,
+                      dedup_keys: Sequence[Tuple[str, str, str]] = ()) -> List[str]:
+        """
+        Queue a rendered message on each of the buyer's channels
+        
+        Dedup keys are recorded only once a message is queued, and released
+        again if its delivery fails, so a failed send doesn't suppress the
+        next attempt for the whole dedup window.
+        
+        Args:
+            property_id: Skip channels that already alerted the buyer about
+                this property within the dedup window
+            dedup_keys: Extra keys to record with the message (e.g. the
+                properties a digest lists)
+        
+        Returns:
+            Delivery ids of the queued messages
+        """
+        delivery_ids = []
+        for channel, address in buyer_channels(buyer):
+            keys = list(dedup_keys)
+            if property_id is not None:
+                channel_key = (str(buyer.get("id")), property_id, channel)
+                if self.is_duplicate(channel_key):
+                    continue
+                keys.append(channel_key)
+            delivery = {
+                "delivery_id": uuid.uuid4().hex,
+                "buyer_id": buyer.get("id"),
+                "property_id": property_id,
+                "channel": channel,
+                "reason": reason,
+                "status": "queued",
+                "queued_at": datetime.utcnow().isoformat(),
+            }
+            self._track(delivery)
+            self._queue.put_nowait({
+                "delivery_id": delivery["delivery_id"],
+                "dedup_keys": keys,
+                "channel": channel,
+                "to": address,
+                "subject": message["subject"],
+                "body": message["html"] if channel == "email" else message["sms"],
+            })
+            now = time.time()
+            for key in keys:
+                self._sent.pop(key, None)
+                self._sent[key] = now
+            delivery_ids.append(delivery["delivery_id"])
+        return delivery_ids
+    
+    def delivery_status(self, delivery_id: str) -> Optional[Dict[str, Any]]:
+        return self._deliveries.get(delivery_id)
+    
+    def blast_status(self, blast_id: str) -> Optional[Dict[str, Any]]:
+        """Delivery counts by status for a blast"""
+        delivery_ids = self._blasts.get(blast_id)
+        if delivery_ids is None:
+            return None
+        counts: Dict[str, int] = defaultdict(int)
+        for delivery_id in delivery_ids:
+            delivery = self._deliveries.get(delivery_id)
+            counts[delivery["status"] if delivery else "expired"] += 1
+        return {"blast_id": blast_id, "total": len(delivery_ids), "by_status": dict(counts)}
+    
+    def _mark(self, message: Dict[str, Any], status: str, error: Optional[str] = None):
+        delivery = self._deliveries.get(message["delivery_id"])
+        if delivery is not None:
+            delivery["status"] = status
+            delivery["updated_at"] = datetime.utcnow().isoformat()
+            if error:
+                delivery["error"] = error
+        if status == "failed":
+            # Let a later match retry the alert
+            for key in message["dedup_keys"]:
+                self._sent.pop(key, None)
+    
+    async def _send_channel(self, channel: str, messages: List[Dict[str, Any]]):
+        """Send one channel's messages in provider-sized, rate-limited chunks"""
+        provider = self.integrations.sendgrid if channel == "email" else self.integrations.twilio
+        if provider is None:
+            for message in messages:
+                self._mark(message, "skipped", f"{channel} provider not configured")
+            return
+        
+        chunk_size = CHANNEL_MAX_BATCH[channel]
+        for start in range(0, len(messages), chunk_size):
+            chunk = messages[start:start + chunk_size]
+            await self._limits[channel].acquire(len(chunk))
+            try:
+                if channel == "email":
+                    results = await provider.send_bulk_email(
+                        [{"to": m["to"], "subject": m["subject"], "html_content": m["body"]} for m in chunk]
+                    )
+                else:
+                    results = await provider.send_bulk_sms(
+                        [{"to": m["to"], "message": m["body"]} for m in chunk]
+                    )
+            except Exception as e:
+                logger.error(f"Bulk {channel} send of {len(chunk)} messages failed: {e}")
+                for message in chunk:
+                    self._mark(message, "failed", str(e))
+                continue
+            
+            for message, result in zip(chunk, results):
+                if result.get("status") == "failed":
+                    self._mark(message, "failed", result.get("error"))
+                else:
+                    self._mark(message, "sent")
+    
+    async def _next_batch(self) -> List[Dict[str, Any]]:
+        """Wait for a message, then collect more for up to the batch window"""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + settings.notification_batch_window_ms / 1000
+        while len(batch) < settings.notification_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+    
+    async def _send_and_ack(self, channel: str, messages: List[Dict[str, Any]]):
+        try:
+            await self._send_channel(channel, messages)
+        except Exception as e:
+            logger.error(f"Notification batch of {len(messages)} {channel} messages failed: {e}")
+        finally:
+            for _ in messages:
+                self._queue.task_done()
+    
+    async def run_worker(self):
+        """Deliver queued notifications in batches until cancelled"""
+        # Channel sends run as tasks so a throttled channel (SMS) doesn't hold
+        # up the next batch on another; each channel's bucket orders its sends
+        in_flight = set()
+        try:
+            while True:
+                batch = await self._next_batch()
+                by_channel: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+                for message in batch:
+                    by_channel[message["channel"]].append(message)
+                for channel, messages in by_channel.items():
+                    task = asyncio.create_task(self._send_and_ack(channel, messages))
+                    in_flight.add(task)
+                    task.add_done_callback(in_flight.discard)
+        finally:
+            for task in in_flight:
+                task.cancel()
+
+
+# Global notification queue instance
+_notification_queue: Optional[NotificationQueue] = None
+
+
+def get_notification_queue() -> NotificationQueue:
+    """Get or create the global notification queue"""
+    global _notification_queue
+    if _notification_queue is None:
+        _notification_queue = NotificationQueue()
+    return _notification_queue
@@ -0,0 +1,254 @@
+"""
+Live outreach priority queue over NEW/QUALIFIED leads
+"""
+import heapq
+import itertools
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from ..config import settings
+from ..database import AsyncSessionLocal, Lead, LeadStatusEnum
+
+logger = logging.getLogger(__name__)
+
+# Lead statuses that belong in the outreach queue
+QUEUED_STATUSES = (LeadStatusEnum.NEW, LeadStatusEnum.QUALIFIED)
+
+
+def _timestamp(value: Optional[datetime]) -> float:
+    """Epoch seconds for a naive UTC datetime (0 when missing)"""
+    return value.replace(tzinfo=timezone.utc).timestamp() if value is not None else 0.0
+
+
+class OutreachQueue:
+    """
+    Priority queue answering "which lead should a rep call next?"
+    
+    Priority (best first):
+    1. Higher lead_score
+    2. Never / least recently contacted (leads contacted within the
+       cool-down are held back until it ends)
+    3. Newer leads (speed to lead)
+    
+    Backed by binary heaps with lazy invalidation, so inserts, score
+    updates, contact updates and removals are O(log n) amortized; a heap
+    is compacted once its stale entries outnumber its live ones. Leads
+    contacted within the cool-down wait in a second heap ordered by when
+    they become callable again. Leased leads leave the heaps until released or until
+    the lease expires.
+    """
+    
+    def __init__(self, lease_seconds: Optional[int] = None,
+                 contact_cooldown_hours: Optional[float] = None):
+        self.lease_seconds = lease_seconds or settings.outreach_lease_seconds
+        self.contact_cooldown_seconds = 3600 * (
+            contact_cooldown_hours if contact_cooldown_hours is not None
+            else settings.outreach_contact_cooldown_hours
+        )
+        self._heap: List[list] = []
+        self._cooling: List[list] = []
+        self._stale = {"ready": 0, "cooling": 0}  # invalidated entries left in each heap
+        self._entries: Dict[str, list] = {}
+        self._leases: Dict[str, Tuple[str, float, Dict[str, Any]]] = {}
+        self._counter = itertools.count()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    @staticmethod
+    def _priority(lead_score: float, created_at: float, last_contacted: float) -> tuple:
+        return (-lead_score, last_contacted, -created_at)
+    
+    def upsert(self, lead_id: str, lead_score: float, created_at: Optional[datetime] = None,
+               last_contacted: Optional[datetime] = None):
+        """Add a lead, or re-prioritize it if already queued or leased"""
+        lease = self._leases.get(lead_id)
+        entry = self._entries.get(lead_id)
+        if lease is not None:
+            current = lease[2]
+        elif entry is not None:
+            current = entry[3]
+        else:
+            current = {"lead_id": lead_id, "created_at": time.time(), "last_contacted": 0.0}
+        
+        item = {**current, "lead_score": lead_score}
+        if created_at is not None:
+            item["created_at"] = _timestamp(created_at)
+        if last_contacted is not None:
+            item["last_contacted"] = _timestamp(last_contacted)
+        
+        if lease is not None:
+            self._leases[lead_id] = (lease[0], lease[1], item)
+        else:
+            self._push(item)
+    
+    def _push(self, item: Dict[str, Any]):
+        self.remove(item["lead_id"])
+        available_at = item["last_contacted"] + self.contact_cooldown_seconds
+        # Entries are [sort key, counter, lead_id, item, heap name]; the
+        # unique counter means comparisons never reach the item
+        if item["last_contacted"] and available_at > time.time():
+            entry = [available_at, next(self._counter), item["lead_id"], item, "cooling"]
+            heapq.heappush(self._cooling, entry)
+        else:
+            priority = self._priority(item["lead_score"], item["created_at"], item["last_contacted"])
+            entry = [priority, next(self._counter), item["lead_id"], item, "ready"]
+            heapq.heappush(self._heap, entry)
+        self._entries[item["lead_id"]] = entry
+    
+    def _compact(self, name: str):
+        """Drop invalidated entries once they outnumber the live ones"""
+        heap = self._heap if name == "ready" else self._cooling
+        if self._stale[name] * 2 <= len(heap):
+            return
+        heap[:] = [entry for entry in heap if entry[2] is not None]
+        heapq.heapify(heap)
+        self._stale[name] = 0
+    
+    def _ready_count(self) -> int:
+        """Live entries in the ready heap"""
+        return len(self._heap) - self._stale["ready"]
+    
+    def _promote_cooled(self):
+        """Move leads whose contact cool-down has ended into the ready heap"""
+        now = time.time()
+        while self._cooling and self._cooling[0][0] <= now:
+            _, _, lead_id, item, _ = heapq.heappop(self._cooling)
+            if lead_id is None:
+                self._stale["cooling"] -= 1
+            else:
+                del self._entries[lead_id]
+                self._push(item)
+    
+    def update_score(self, lead_id: str, lead_score: float):
+        """Re-prioritize a queued lead after rescoring (no-op if not queued)"""
+        entry = self._entries.get(lead_id)
+        if entry is not None:
+            if entry[3]["lead_score"] != lead_score:
+                self._push({**entry[3], "lead_score": lead_score})
+        elif lead_id in self._leases:
+            self._leases[lead_id][2]["lead_score"] = lead_score
+    
+    def remove(self, lead_id: str):
+        """Drop a lead from the queue (e.g. its status left NEW/QUALIFIED)"""
+        entry = self._entries.pop(lead_id, None)
+        if entry is not None:
+            entry[2] = None  # mark invalid; discarded when it reaches the top
+            self._stale[entry[4]] += 1
+            self._compact(entry[4])
+    
+    def discard(self, lead_id: str):
+        """Remove a lead from the queue and drop any lease on it"""
+        self.remove(lead_id)
+        self._leases.pop(lead_id, None)
+    
+    def _reclaim_expired_leases(self):
+        now = time.time()
+        expired = [lead_id for lead_id, (_, expires_at, _) in self._leases.items() if expires_at <= now]
+        for lead_id in expired:
+            _, _, item = self._leases.pop(lead_id)
+            self._push(item)
+    
+    def _pop(self) -> Optional[Dict[str, Any]]:
+        self._promote_cooled()
+        while self._heap:
+            _, _, lead_id, item, _ = heapq.heappop(self._heap)
+            if lead_id is None:
+                self._stale["ready"] -= 1
+                continue
+            del self._entries[lead_id]
+            return item
+        return None
+    
+    def lease(self, rep_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Lease the highest-priority lead to a rep
+        
+        Returns:
+            Lead priority data with lease_expires_at, or None if the queue is empty
+        """
+        self._reclaim_expired_leases()
+        item = self._pop()
+        if item is None:
+            return None
+        expires_at = time.time() + self.lease_seconds
+        self._leases[item["lead_id"]] = (rep_id, expires_at, item)
+        return {**item, "rep_id": rep_id, "lease_expires_at": expires_at}
+    
+    def release(self, lead_id: str, rep_id: str, contacted: bool = False) -> bool:
+        """
+        Return a leased lead to the queue
+        
+        Args:
+            contacted: The rep reached out; the lead drops behind leads
+                that haven't been contacted yet
+        """
+        lease = self._leases.get(lead_id)
+        if lease is None or lease[0] != rep_id:
+            return False
+        del self._leases[lead_id]
+        item = lease[2]
+        if contacted:
+            item["last_contacted"] = time.time()
+        self._push(item)
+        return True
+    
+    def peek(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Top leads without leasing them
+        
+        Walks the heap best-first from the root, so only about limit entries
+        (plus any stale ones among them) are visited.
+        """
+        self._reclaim_expired_leases()
+        self._promote_cooled()
+        limit = min(limit, self._ready_count())
+        top: List[Dict[str, Any]] = []
+        frontier = [(self._heap[0], 0)] if limit > 0 else []
+        while frontier and len(top) < limit:
+            entry, index = heapq.heappop(frontier)
+            if entry[2] is not None:
+                top.append(entry[3])
+            for child in (2 * index + 1, 2 * index + 2):
+                if child < len(self._heap):
+                    heapq.heappush(frontier, (self._heap[child], child))
+        return top
+    
+    async def rebuild(self):
+        """Rebuild the queue from the leads table"""
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(Lead.id, Lead.lead_score, Lead.created_at, Lead.last_contacted)
+                .where(Lead.lead_status.in_(QUEUED_STATUSES))
+            )
+            rows = result.all()
+        
+        self._heap = []
+        self._cooling = []
+        self._stale = {"ready": 0, "cooling": 0}
+        self._entries = {}
+        self._leases = {}
+        for row in rows:
+            self._push({
+                "lead_id": row.id,
+                "lead_score": row.lead_score or 0.0,
+                "created_at": _timestamp(row.created_at),
+                "last_contacted": _timestamp(row.last_contacted),
+            })
+        logger.info(f"Outreach queue rebuilt with {len(self._entries)} leads")
+
+
+# Global outreach queue instance
+_outreach_queue: Optional[OutreachQueue] = None
+
+
+def get_outreach_queue() -> OutreachQueue:
+    """Get or create the global outreach queue"""
+    global _outreach_queue
+    if _outreach_queue is None:
+        _outreach_queue = OutreachQueue()
+    return _outreach_queue
@@ -0,0 +1,222 @@
+"""
+Deterministic rehab cost model from per-trade unit cost tables
+"""
+import json
+import logging
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..config import settings
+from .market_stats import ZIP_PATTERN
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COST_TABLE_PATH = Path(__file__).resolve().parent.parent / "data" / "rehab_costs.json"
+
+
+def _issue_list(issues: Any) -> List[str]:
+    """Issues as a list of lowercase strings (accepts a list or a comma-separated string)"""
+    if not issues:
+        return []
+    if isinstance(issues, str):
+        issues = issues.split(",")
+    return [str(issue).strip().lower() for issue in issues if str(issue).strip()]
+
+
+class RehabBatch:
+    """
+    Rehab estimates for many properties, held as NumPy columns
+    
+    cost[i, t] is trade t's cost for property i, after condition scope,
+    issue overrides and the regional multiplier.
+    """
+    
+    def __init__(self, model: "RehabCostModel", properties: Sequence[Dict[str, Any]]):
+        self.model = model
+        self.properties = list(properties)
+        n, trades = len(self.properties), model.trades
+        
+        self.sqft = np.array([p.get("sqft") or p.get("square_feet") or model.default_sqft
+                              for p in self.properties], dtype=float)
+        self.bathrooms = np.array([p.get("bathrooms") or max(1.0, round(s / 900))
+                                   for p, s in zip(self.properties, self.sqft)], dtype=float)
+        self.grade = np.array([model.condition_grade(p.get("condition")) for p in self.properties], dtype=np.intp)
+        self.region = np.array([model.region_multiplier(p) for p in self.properties], dtype=float)
+        
+        scope = model.scope[self.grade] if n else np.zeros((0, len(trades)))
+        self.uncovered: List[List[str]] = []
+        for i, p in enumerate(self.properties):
+            overrides, uncovered = model.issue_scope(tuple(_issue_list(p.get("issues"))))
+            scope[i] = np.maximum(scope[i], overrides)
+            self.uncovered.append(list(uncovered))
+        self.scope = scope
+        
+        units = {
+            "sqft": self.sqft,
+            "system": np.ceil(self.sqft / 2500),
+            "kitchen": np.ones(n),
+            "bathroom": self.bathrooms,
+        }
+        quantity = np.column_stack([units[model.units[t]] for t in range(len(trades))]) if n \
+            else np.zeros((0, len(trades)))
+        self.cost = quantity * model.quantity_factor * model.unit_cost * scope * self.region[:, None]
+        
+        self.subtotal = self.cost.sum(axis=1)
+        self.contingency_percent = model.contingency[self.grade]
+        self.contingency = self.subtotal * self.contingency_percent / 100
+        self.total = self.subtotal + self.contingency
+        self.timeline_days = np.ceil(
+            model.base_days + model.parallel_factor * (scope * model.days).sum(axis=1)
+        ).astype(int)
+    
+    def __len__(self) -> int:
+        return len(self.properties)
+    
+    def row(self, i: int) -> Dict[str, Any]:
+        """One estimate in RehabEstimate's shape (breakdown by trade label)"""
+        model = self.model
+        cost = self.cost[i]
+        breakdown = {model.labels[t]: round(float(cost[t]), 2) for t in np.flatnonzero(cost > 0)}
+        # Contractors for the largest trades first
+        contractors = [model.contractors[t] for t in np.argsort(-cost) if cost[t] > 0][:5]
+        return {
+            "total_cost": round(float(self.total[i]), 2),
+            "cost_per_sqft": round(float(self.total[i] / self.sqft[i]), 2),
+            "timeline_days": int(self.timeline_days[i]),
+            "breakdown": breakdown,
+            "contingency_percentage": int(self.contingency_percent[i]),
+            "contingency_cost": round(float(self.contingency[i]), 2),
+            "contractor_recommendations": contractors,
+            "condition_grade": model.conditions[self.grade[i]],
+            "region_multiplier": float(self.region[i]),
+            "uncovered_issues": self.uncovered[i]
+        }
+    
+    def rows(self) -> List[Dict[str, Any]]:
+        return [self.row(i) for i in range(len(self))]
+    
+    def summary(self) -> Dict[str, Any]:
+        """Portfolio totals across the batch"""
+        if not len(self):
+            return {"properties": 0}
+        by_trade = self.cost.sum(axis=0)
+        return {
+            "properties": len(self),
+            "total_cost": round(float(self.total.sum()), 2),
+            "median_cost": round(float(np.median(self.total)), 2),
+            "median_cost_per_sqft": round(float(np.median(self.total / self.sqft)), 2),
+            "max_timeline_days": int(self.timeline_days.max()),
+            "subtotal_by_trade": {self.model.labels[t]: round(float(by_trade[t]), 2)
+                                  for t in np.flatnonzero(by_trade > 0)},
+            "with_uncovered_issues": sum(1 for items in self.uncovered if items),
+        }
+
+
+class RehabCostModel:
+    """
+    Rehab costs from per-trade unit cost tables
+    
+    cost = quantity (sqft, systems, kitchens, bathrooms) x unit cost
+           x scope for the condition grade (raised by matching issues)
+           x regional multiplier (ZIP3, then state)
+    
+    The tables are loaded once; estimate() is a one-row batch so single and
+    portfolio estimates always agree.
+    """
+    
+    def __init__(self, table: Dict[str, Any]):
+        self.conditions: List[str] = table["conditions"]
+        self._condition_index = {name: i for i, name in enumerate(self.conditions)}
+        self._condition_aliases: Dict[str, str] = table.get("condition_aliases", {})
+        self.default_grade = self._condition_index[table.get("default_condition", "fair")]
+        self.default_sqft = float(table.get("default_sqft", 1500))
+        
+        self.trades = list(table["trades"])
+        self._trade_index = {name: t for t, name in enumerate(self.trades)}
+        specs = [table["trades"][name] for name in self.trades]
+        self.labels = [spec["label"] for spec in specs]
+        self.units = [spec["unit"] for spec in specs]
+        self.contractors = [spec.get("contractor", f"{spec['label']} contractor") for spec in specs]
+        self.unit_cost = np.array([spec["unit_cost"] for spec in specs], dtype=float)
+        self.quantity_factor = np.array([spec.get("quantity_factor", 1.0) for spec in specs], dtype=float)
+        self.days = np.array([spec["days"] for spec in specs], dtype=float)
+        # scope[grade, trade]: share of the trade's full cost at that condition
+        self.scope = np.array([spec["scope"] for spec in specs], dtype=float).T
+        
+        self.contingency = np.array([table["contingency_percent"][name] for name in self.conditions], dtype=float)
+        self.base_days = float(table["timeline"]["base_days"])
+        self.parallel_factor = float(table["timeline"]["parallel_factor"])
+        
+        self.issue_rules: List[Tuple[Tuple[str, ...], int, float]] = [
+            (tuple(rule["keywords"]), self._trade_index[rule["trade"]], float(rule["scope"]))
+            for rule in table.get("issue_rules", [])
+        ]
+        self.state_multipliers: Dict[str, float] = table.get("state_multipliers", {})
+        self.zip3_multipliers: Dict[str, float] = table.get("zip3_multipliers", {})
+        # Per-instance cache: portfolios repeat the same issue lists
+        self.issue_scope = lru_cache(maxsize=4096)(self._issue_scope)
+    
+    @classmethod
+    def from_file(cls, path: Optional[str] = None) -> "RehabCostModel":
+        path = Path(path or settings.rehab_cost_table_path or DEFAULT_COST_TABLE_PATH)
+        model = cls(json.loads(path.read_text()))
+        logger.info(f"Rehab cost tables loaded ({len(model.trades)} trades) from {path}")
+        return model
+    
+    def condition_grade(self, condition: Optional[str]) -> int:
+        """Grade index for a condition name or alias (default grade when unknown)"""
+        name = (condition or "").strip().lower()
+        name = self._condition_aliases.get(name, name)
+        return self._condition_index.get(name, self.default_grade)
+    
+    def region_multiplier(self, property_data: Dict[str, Any]) -> float:
+        zip_code = property_data.get("zip_code")
+        if not zip_code:
+            match = ZIP_PATTERN.search(property_data.get("address") or "")
+            zip_code = match.group(1) if match else None
+        if zip_code and zip_code[:3] in self.zip3_multipliers:
+            return self.zip3_multipliers[zip_code[:3]]
+        return self.state_multipliers.get((property_data.get("state") or "").upper(), 1.0)
+    
+    def _issue_scope(self, issues: Tuple[str, ...]) -> Tuple[np.ndarray, Tuple[str, ...]]:
+        """Minimum scope per trade implied by the issues, plus issues no rule covers"""
+        scope = np.zeros(len(self.trades))
+        uncovered = []
+        for issue in issues:
+            matched = False
+            for keywords, trade, trade_scope in self.issue_rules:
+                if any(keyword in issue for keyword in keywords):
+                    scope[trade] = max(scope[trade], trade_scope)
+                    matched = True
+            if not matched:
+                uncovered.append(issue)
+        scope.flags.writeable = False
+        return scope, tuple(uncovered)
+    
+    def estimate_batch(self, properties: Sequence[Dict[str, Any]]) -> RehabBatch:
+        """
+        Estimate many properties in one vectorized pass
+        
+        Args:
+            properties: Dicts with sqft/square_feet, condition, issues and
+                optionally bathrooms, state, zip_code or address
+        """
+        return RehabBatch(self, properties)
+    
+    def estimate(self, property_data: Dict[str, Any]) -> Dict[str, Any]:
+        return self.estimate_batch([property_data]).row(0)
+
+
+# Global rehab cost model instance
+_rehab_cost_model: Optional[RehabCostModel] = None
+
+
+def get_rehab_cost_model() -> RehabCostModel:
+    """Get or load the global rehab cost model"""
+    global _rehab_cost_model
+    if _rehab_cost_model is None:
+        _rehab_cost_model = RehabCostModel.from_file()
+    return _rehab_cost_model
@@ -0,0 +1,144 @@
+"""
+Reverse matching - find open leads for a newly registered or updated buyer
+"""
+import logging
+from typing import Any, Dict, List, Optional, Set
+
+from sqlalchemy import case, func, literal, select
+
+from ..agents import get_orchestrator
+from ..agents.buyer_index import buyer_property_types, buyer_states
+from ..config import settings
+from ..database import AsyncSessionLocal, Lead, LeadStatusEnum, PropertyTypeEnum
+from .notifications import get_notification_queue
+
+logger = logging.getLogger(__name__)
+
+# Leads a buyer can still be offered
+OPEN_STATUSES = (
+    LeadStatusEnum.NEW,
+    LeadStatusEnum.QUALIFIED,
+    LeadStatusEnum.CONTACTED,
+    LeadStatusEnum.NEGOTIATING,
+)
+
+
+def lead_to_property(lead: Lead) -> Dict[str, Any]:
+    """Map a Lead row onto the property dict BuyerMatcherAgent scores"""
+    return {
+        "id": lead.id,
+        "address": lead.address,
+        "city": lead.city,
+        "state": lead.state,
+        "zip_code": lead.zip_code,
+        "property_type": getattr(lead.property_type, "value", lead.property_type) or "",
+        "estimated_after_repair_value": lead.estimated_after_repair_value or 0,
+        "estimated_repair_cost": lead.estimated_repair_cost,
+    }
+
+
+def _match_rank(preferred_types: Set[str], min_size: float, max_size: float):
+    """
+    SQL expression for the lead-dependent part of the buyer match score
+    
+    Mirrors the property type and deal size terms of
+    BuyerMatcherAgent._calculate_match_score, so capped lookups keep the
+    leads that score best.
+    
+    Args:
+        preferred_types: The buyer's normalized preferred types; ones that
+            are not PropertyTypeEnum values match no stored lead
+    """
+    arv = func.coalesce(Lead.estimated_after_repair_value, 0)
+    parsed = (PropertyTypeEnum.parse(t, strict=True, aliases=False) for t in preferred_types)
+    known_types = sorted((t for t in parsed if t is not None), key=lambda t: t.value)
+    if not preferred_types:
+        type_points = literal(20.0)
+    elif known_types:
+        type_points = case((Lead.property_type.in_(known_types), 20.0), else_=10.0)
+    else:
+        type_points = literal(10.0)
+    
+    half_band = (max_size - min_size) / 2
+    if half_band > 0:
+        alignment = 20.0 - 20.0 * func.abs(arv - (min_size + max_size) / 2) / half_band
+    else:
+        alignment = literal(0.0)
+    size_points = case((arv.between(min_size, max_size), alignment), else_=5.0)
+    return type_points + size_points
+
+
+async def find_candidate_leads(buyer: Dict[str, Any],
+                               candidate_limit: Optional[int] = None) -> List[Lead]:
+    """
+    Open leads that can clear the match threshold for a buyer
+    
+    Derived from BuyerMatcherAgent._calculate_match_score (leads carry no
+    ROI estimate, so the ROI term is the same for every lead):
+    - a lead in the buyer's target states (or any lead, for a buyer with
+      no state limits) can clear the threshold whatever its type or value
+    - an out-of-state lead loses 10 geography points and can only clear it
+      for an active buyer whose deal size band contains it
+    
+    Each lookup returns at most candidate_limit leads, best estimated match
+    first, so every qualifying lead is returned unless a lookup hits the cap.
+    """
+    limit = candidate_limit or settings.reverse_match_candidate_limit
+    target_states = sorted(buyer_states(buyer))
+    preferred_types = buyer_property_types(buyer)
+    min_size = buyer.get("min_deal_size", 0)
+    max_size = buyer.get("max_deal_size", 10000000)
+    
+    open_leads = Lead.lead_status.in_(OPEN_STATUSES)
+    rank = _match_rank(preferred_types, min_size, max_size)
+    
+    lookups = []
+    if target_states:
+        in_states = Lead.state.in_(target_states)
+        lookups.append(select(Lead).where(open_leads, in_states))
+        if buyer.get("is_active", False):
+            in_band = Lead.estimated_after_repair_value.between(min_size, max_size)
+            lookups.append(select(Lead).where(open_leads, in_band, ~in_states))
+    else:
+        lookups.append(select(Lead).where(open_leads))
+    
+    candidates: Dict[str, Lead] = {}
+    async with AsyncSessionLocal() as session:
+        for query in lookups:
+            result = await session.execute(
+                query.order_by(rank.desc(), Lead.lead_score.desc(), Lead.created_at.desc()).limit(limit)
+            )
+            for lead in result.scalars():
+                candidates.setdefault(lead.id, lead)
+    
+    return list(candidates.values())
+
+
+async def reverse_match_buyer(buyer: Dict[str, Any], notify_top_n: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Score open leads for a buyer and queue notifications for the best ones
+    
+    Args:
+        buyer: Buyer dict in the shape BuyerMatcherAgent expects
+        notify_top_n: How many top matches to notify about
+    """
+    top_n = notify_top_n or settings.reverse_match_notify_top_n
+    leads = await find_candidate_leads(buyer)
+    properties = [lead_to_property(lead) for lead in leads]
+    
+    matcher = get_orchestrator().agents["BuyerMatcher"]
+    matches = matcher.match_properties_for_buyer(buyer, properties, limit=top_n)
+    
+    properties_by_id = {p["id"]: p for p in properties}
+    queue = get_notification_queue()
+    for match in matches:
+        queue.enqueue(buyer, properties_by_id[match["property_id"]], match["match_score"],
+                      reason="reverse_match")
+    
+    logger.info(f"Reverse matching for buyer {buyer.get('id')}: {len(leads)} candidates, "
+                f"{len(matches)} matches queued")
+    return {
+        "buyer_id": buyer.get("id"),
+        "candidates_scored": len(leads),
+        "matches": matches,
+    }
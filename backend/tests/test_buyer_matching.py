@@ -0,0 +1,118 @@
+"""
+Buyer match scoring parity with the original BuyerMatcherAgent formula
+"""
+import random
+
+import numpy as np
+import pytest
+
+from app.agents.buyer_index import BuyerIndex, normalize_property_type
+from app.agents.buyer_matcher import BuyerMatcherAgent
+from app.agents.buyer_matrix import BuyerMatrix
+
+STATES = ["CA", "TX", "FL", "AZ", "WA", "OR", "NY", "GA"]
+PROPERTY_TYPES = ["single_family", "multi_family", "commercial", "vacant", "mobile_home", "other",
+                  "sfr", "duplex", "mansion", "houseboat"]
+
+
+def baseline_match_score(property_info, buyer):
+    """_calculate_match_score as it was before the buyer index"""
+    score = 0
+
+    property_state = property_info.get("state", "").upper()
+    target_states = buyer.get("target_states", [])
+    if property_state in target_states or not target_states:
+        score += 25
+    else:
+        score -= 10
+
+    property_type = property_info.get("property_type", "")
+    preferred_types = buyer.get("preferred_property_types", [])
+    if property_type in preferred_types or not preferred_types:
+        score += 20
+    else:
+        score += 10
+
+    property_value = property_info.get("estimated_after_repair_value", 0)
+    min_size = buyer.get("min_deal_size", 0)
+    max_size = buyer.get("max_deal_size", 10000000)
+
+    if min_size <= property_value <= max_size:
+        mid_point = (min_size + max_size) / 2
+        distance = abs(property_value - mid_point)
+        max_distance = (max_size - min_size) / 2
+        alignment = 1 - (distance / max_distance if max_distance > 0 else 1)
+        score += alignment * 20
+    else:
+        score += 5
+
+    buyer_roi = buyer.get("min_roi_percent", 20)
+    estimated_roi = property_info.get("roi_percent", 25)
+
+    if estimated_roi >= buyer_roi:
+        score += 20
+    elif estimated_roi >= (buyer_roi * 0.8):
+        score += 12
+    else:
+        score += 5
+
+    if buyer.get("is_active", False):
+        score += 15
+
+    return min(score, 100)
+
+
+@pytest.fixture(scope="module")
+def market():
+    rng = random.Random(7)
+    buyers = [
+        {
+            "id": f"buyer_{i}",
+            "target_states": rng.sample(STATES, rng.randint(0, 3)),
+            "preferred_property_types": rng.sample(PROPERTY_TYPES, rng.randint(0, 3)),
+            "min_deal_size": rng.randint(0, 300000),
+            "max_deal_size": rng.randint(300000, 900000),
+            "min_roi_percent": rng.randint(10, 30),
+            "is_active": rng.random() < 0.6,
+        }
+        for i in range(300)
+    ]
+    properties = [
+        {
+            "state": rng.choice(STATES + ["ZZ"]).lower() if rng.random() < 0.2 else rng.choice(STATES + ["ZZ"]),
+            "property_type": rng.choice(PROPERTY_TYPES),
+            "estimated_after_repair_value": rng.randint(0, 1000000),
+            "roi_percent": rng.randint(5, 40),
+        }
+        for _ in range(150)
+    ]
+    baseline = np.array([[baseline_match_score(p, b) for b in buyers] for p in properties])
+    return buyers, properties, baseline
+
+
+def test_match_score_matches_baseline(market):
+    buyers, properties, baseline = market
+    agent = BuyerMatcherAgent()
+    scores = np.array([[agent._calculate_match_score(p, b) for b in buyers] for p in properties])
+    assert np.array_equal(scores, baseline)
+
+
+def test_score_matrix_matches_baseline(market):
+    buyers, properties, baseline = market
+    matrix = BuyerMatrix(buyers)
+    scores = matrix.score_matrix(*matrix.encode_properties(properties))
+    assert np.allclose(scores, baseline)
+
+
+def test_index_candidates_cover_qualified_buyers(market):
+    buyers, properties, baseline = market
+    index = BuyerIndex(buyers)
+    for row, property_info in zip(baseline, properties):
+        candidates = set(index.candidates(property_info))
+        assert {i for i, score in enumerate(row) if score > 50} <= candidates
+
+
+def test_unknown_property_types_only_match_themselves():
+    assert normalize_property_type("Mansion") != normalize_property_type("Houseboat")
+    assert normalize_property_type("Mansion") == normalize_property_type(" mansion ")
+    assert normalize_property_type("SFR") != normalize_property_type("single_family")